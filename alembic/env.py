@@ -9,13 +9,17 @@ import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Importar el objeto Base desde tu aplicación
+from app.config import DATABASE_URL
 from app.database import Base
-from app.models import maintenance, vehicle
+from app.models import idempotency, maintenance, vehicle
 
 # Configuración general de logging de config file.
 config = context.config
 fileConfig(config.config_file_name)
 
+# Las migraciones usan la misma base de datos que la aplicación (DATABASE_URL)
+config.set_main_option("sqlalchemy.url", DATABASE_URL.replace("%", "%%"))
+
 # Asegúrate de que el objeto `target_metadata` contenga los metadatos de tus modelos
 target_metadata = Base.metadata
 
@@ -0,0 +1,62 @@
+"""initial schema
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing databases were created with Base.metadata.create_all; only missing tables are created
+    inspector = sa.inspect(op.get_bind())
+    if not inspector.has_table("vehicles"):
+        op.create_table(
+            "vehicles",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("license_plate", sa.String(), nullable=True),
+            sa.Column("make", sa.String(), nullable=True),
+            sa.Column("model", sa.String(), nullable=True),
+            sa.Column("year", sa.Integer(), nullable=True),
+            sa.Column("owner_id", sa.Integer(), nullable=True),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_vehicles_id", "vehicles", ["id"])
+        op.create_index("ix_vehicles_license_plate", "vehicles", ["license_plate"], unique=True)
+    if not inspector.has_table("maintenance_orders"):
+        op.create_table(
+            "maintenance_orders",
+            sa.Column("id", sa.Integer(), nullable=False),
+            sa.Column("vehicle_id", sa.Integer(), nullable=True),
+            sa.Column("service_type", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column(
+                "status",
+                sa.Enum(
+                    "pending", "in_progress", "completed", "cancelled", "rejected",
+                    name="maintenanceorderstatus",
+                ),
+                nullable=False,
+            ),
+            sa.Column("mechanical_parts", sa.JSON(), nullable=True),
+            sa.ForeignKeyConstraint(["vehicle_id"], ["vehicles.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index("ix_maintenance_orders_id", "maintenance_orders", ["id"])
+
+
+def downgrade() -> None:
+    op.drop_table("maintenance_orders")
+    op.drop_table("vehicles")
+    sa.Enum(name="maintenanceorderstatus").drop(op.get_bind(), checkfirst=True)
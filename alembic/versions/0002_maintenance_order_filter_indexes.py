@@ -0,0 +1,53 @@
+"""maintenance order filter indexes
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:30:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+OPEN_STATUSES = sa.text("status IN ('pending', 'in_progress')")
+
+# name, columns, extra keyword arguments
+INDEXES = [
+    ("ix_maintenance_orders_vehicle_id_id", ["vehicle_id", "id"], {}),
+    ("ix_maintenance_orders_status_id", ["status", "id"], {}),
+    ("ix_maintenance_orders_service_type_id", ["service_type", "id"], {}),
+    (
+        "ix_maintenance_orders_open_vehicle_id_id",
+        ["vehicle_id", "id"],
+        {"postgresql_where": OPEN_STATUSES, "sqlite_where": OPEN_STATUSES},
+    ),
+]
+
+
+def upgrade() -> None:
+    # On Postgres the indexes are built CONCURRENTLY, outside a transaction, so writes
+    # to maintenance_orders are not blocked while they are created
+    concurrently = op.get_bind().dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for name, columns, kwargs in INDEXES:
+            op.create_index(
+                name,
+                "maintenance_orders",
+                columns,
+                if_not_exists=True,
+                postgresql_concurrently=concurrently,
+                **kwargs,
+            )
+
+
+def downgrade() -> None:
+    for name, _, _ in INDEXES:
+        op.drop_index(name, table_name="maintenance_orders", if_exists=True)
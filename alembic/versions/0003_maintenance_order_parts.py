@@ -0,0 +1,94 @@
+"""maintenance order parts index
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 11:00:00.000000
+
+"""
+import json
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BATCH_SIZE = 10000
+
+orders = sa.table(
+    "maintenance_orders",
+    sa.column("id", sa.Integer),
+    sa.column("mechanical_parts", sa.JSON),
+)
+order_parts = sa.table(
+    "maintenance_order_parts",
+    sa.column("order_id", sa.Integer),
+    sa.column("part", sa.String),
+)
+
+
+def normalize_part(part):
+    # Same normalization as app.crud.maintenance.normalize_part at the time of this revision
+    return " ".join(str(part).split()).lower()
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # The table already exists when it was created by create_all
+    if not sa.inspect(bind).has_table("maintenance_order_parts"):
+        op.create_table(
+            "maintenance_order_parts",
+            sa.Column("order_id", sa.Integer(), nullable=False),
+            sa.Column(
+                "part",
+                sa.String().with_variant(sa.String(collation="C"), "postgresql"),
+                nullable=False,
+            ),
+            sa.ForeignKeyConstraint(["order_id"], ["maintenance_orders.id"], ondelete="CASCADE"),
+            sa.PrimaryKeyConstraint("order_id", "part"),
+        )
+    op.create_index(
+        "ix_maintenance_order_parts_part_order_id",
+        "maintenance_order_parts",
+        ["part", "order_id"],
+        if_not_exists=True,
+    )
+
+    # Backfill the existing orders in batches by ID, so memory use stays flat on large
+    # tables; orders that already have indexed parts are skipped
+    indexed = sa.exists().where(order_parts.c.order_id == orders.c.id)
+    last_id = 0
+    while True:
+        batch = bind.execute(
+            sa.select(orders.c.id, orders.c.mechanical_parts)
+            .where(orders.c.id > last_id)
+            .order_by(orders.c.id)
+            .limit(BATCH_SIZE)
+        ).all()
+        if not batch:
+            break
+        done = set(bind.scalars(
+            sa.select(orders.c.id).where(orders.c.id.between(batch[0][0], batch[-1][0]), indexed)
+        ))
+        rows = []
+        for order_id, parts in batch:
+            if order_id in done:
+                continue
+            if isinstance(parts, str):
+                parts = json.loads(parts)
+            for part in dict.fromkeys(normalize_part(part) for part in parts or []):
+                if part:
+                    rows.append({"order_id": order_id, "part": part})
+        if rows:
+            bind.execute(order_parts.insert(), rows)
+        last_id = batch[-1][0]
+
+
+def downgrade() -> None:
+    op.drop_index("ix_maintenance_order_parts_part_order_id", table_name="maintenance_order_parts")
+    op.drop_table("maintenance_order_parts")
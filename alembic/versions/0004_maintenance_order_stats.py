@@ -0,0 +1,47 @@
+"""maintenance order stats
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    # The table already exists when it was created by create_all
+    if not sa.inspect(bind).has_table("maintenance_order_stats"):
+        op.create_table(
+            "maintenance_order_stats",
+            sa.Column("kind", sa.String(), nullable=False),
+            sa.Column("value", sa.String(), nullable=False),
+            sa.Column("count", sa.Integer(), nullable=False),
+            sa.PrimaryKeyConstraint("kind", "value"),
+        )
+
+    # Fill the counters from the existing orders; `python -m app.cli rebuild-stats` does the same
+    op.execute("DELETE FROM maintenance_order_stats")
+    op.execute(
+        "INSERT INTO maintenance_order_stats (kind, value, count) "
+        "SELECT 'status', CAST(status AS VARCHAR), COUNT(*) FROM maintenance_orders GROUP BY status"
+    )
+    op.execute(
+        "INSERT INTO maintenance_order_stats (kind, value, count) "
+        "SELECT 'service_type', service_type, COUNT(*) FROM maintenance_orders "
+        "WHERE service_type IS NOT NULL GROUP BY service_type"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("maintenance_order_stats")
@@ -0,0 +1,69 @@
+"""maintenance order full-text search
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_TRIGGERS = [
+    "CREATE TRIGGER maintenance_orders_fts_insert AFTER INSERT ON maintenance_orders BEGIN "
+    "INSERT INTO maintenance_orders_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER maintenance_orders_fts_delete AFTER DELETE ON maintenance_orders BEGIN "
+    "INSERT INTO maintenance_orders_fts (maintenance_orders_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER maintenance_orders_fts_update AFTER UPDATE OF description ON maintenance_orders BEGIN "
+    "INSERT INTO maintenance_orders_fts (maintenance_orders_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO maintenance_orders_fts (rowid, description) VALUES (new.id, new.description); END",
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # The search structures already exist when the table was created by create_all
+    if bind.dialect.name == "postgresql":
+        columns = {column["name"] for column in inspector.get_columns("maintenance_orders")}
+        if "description_tsv" not in columns:
+            # Adding a stored generated column rewrites the table once
+            op.execute(
+                "ALTER TABLE maintenance_orders ADD COLUMN description_tsv tsvector "
+                "GENERATED ALWAYS AS (to_tsvector('english', coalesce(description, ''))) STORED"
+            )
+        with op.get_context().autocommit_block():
+            op.execute(
+                "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_maintenance_orders_description_tsv "
+                "ON maintenance_orders USING GIN (description_tsv)"
+            )
+    elif bind.dialect.name == "sqlite" and not inspector.has_table("maintenance_orders_fts"):
+        op.execute(
+            "CREATE VIRTUAL TABLE maintenance_orders_fts USING fts5("
+            "description, content='maintenance_orders', content_rowid='id', tokenize='porter unicode61')"
+        )
+        for trigger in SQLITE_TRIGGERS:
+            op.execute(trigger)
+        # Index the existing descriptions
+        op.execute("INSERT INTO maintenance_orders_fts (maintenance_orders_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_maintenance_orders_description_tsv")
+        op.execute("ALTER TABLE maintenance_orders DROP COLUMN IF EXISTS description_tsv")
+    elif bind.dialect.name == "sqlite":
+        for name in ("insert", "delete", "update"):
+            op.execute(f"DROP TRIGGER IF EXISTS maintenance_orders_fts_{name}")
+        op.execute("DROP TABLE IF EXISTS maintenance_orders_fts")
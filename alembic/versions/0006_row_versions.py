@@ -0,0 +1,52 @@
+"""row versions
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# table, index covering (id, version_id)
+TABLES = [
+    ("vehicles", "ix_vehicles_id_version_id"),
+    ("maintenance_orders", "ix_maintenance_orders_id_version_id"),
+]
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    for table, _ in TABLES:
+        # The column already exists when the table was created by create_all. A constant
+        # default is stored in the catalog, so existing rows are not rewritten on Postgres
+        if "version_id" not in {column["name"] for column in inspector.get_columns(table)}:
+            op.add_column(table, sa.Column("version_id", sa.Integer(), nullable=False, server_default=sa.text("1")))
+
+    concurrently = bind.dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        for table, index in TABLES:
+            op.create_index(
+                index,
+                table,
+                ["id", "version_id"],
+                if_not_exists=True,
+                postgresql_concurrently=concurrently,
+            )
+
+
+def downgrade() -> None:
+    for table, index in TABLES:
+        op.drop_index(index, table_name=table, if_exists=True)
+        # A plain DROP COLUMN (SQLite 3.35+): a batch rebuild would drop the search triggers
+        op.drop_column(table, "version_id")
@@ -0,0 +1,90 @@
+"""maintenance order archive
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    inspector = sa.inspect(bind)
+    # The columns and the archive already exist when the tables were created by create_all
+    columns = {column["name"] for column in inspector.get_columns("maintenance_orders")}
+    for name in TIMESTAMP_COLUMNS:
+        if name in columns:
+            continue
+        if bind.dialect.name == "postgresql":
+            # now() is evaluated once and kept in the catalog, so existing rows are not rewritten
+            op.add_column(
+                "maintenance_orders",
+                sa.Column(name, sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+            )
+        else:
+            # SQLite cannot add a column with a non-constant default: existing rows are filled
+            # instead, and new rows get their timestamps from the application
+            op.add_column("maintenance_orders", sa.Column(name, sa.DateTime(timezone=True), nullable=True))
+            op.execute(f"UPDATE maintenance_orders SET {name} = CURRENT_TIMESTAMP")
+
+    concurrently = bind.dialect.name == "postgresql"
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_maintenance_orders_status_updated_at",
+            "maintenance_orders",
+            ["status", "updated_at"],
+            if_not_exists=True,
+            postgresql_concurrently=concurrently,
+        )
+
+    if not inspector.has_table("maintenance_orders_archive"):
+        op.create_table(
+            "maintenance_orders_archive",
+            sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+            sa.Column("vehicle_id", sa.Integer(), nullable=True),
+            sa.Column("service_type", sa.String(), nullable=True),
+            sa.Column("description", sa.String(), nullable=True),
+            sa.Column(
+                "status",
+                # The type was created with maintenance_orders
+                postgresql.ENUM(
+                    "pending", "in_progress", "completed", "cancelled", "rejected",
+                    name="maintenanceorderstatus",
+                    create_type=False,
+                ),
+                nullable=False,
+            ),
+            sa.Column("mechanical_parts", sa.JSON(), nullable=True),
+            sa.Column("version_id", sa.Integer(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("updated_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("archived_at", sa.DateTime(timezone=True), nullable=False),
+            sa.ForeignKeyConstraint(["vehicle_id"], ["vehicles.id"]),
+            sa.PrimaryKeyConstraint("id"),
+        )
+        op.create_index(
+            "ix_maintenance_orders_archive_vehicle_id", "maintenance_orders_archive", ["vehicle_id"]
+        )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_maintenance_orders_archive_vehicle_id", table_name="maintenance_orders_archive")
+    op.drop_table("maintenance_orders_archive")
+    op.drop_index("ix_maintenance_orders_status_updated_at", table_name="maintenance_orders", if_exists=True)
+    for name in TIMESTAMP_COLUMNS:
+        # A plain DROP COLUMN (SQLite 3.35+): a batch rebuild would drop the search triggers
+        op.drop_column("maintenance_orders", name)
@@ -0,0 +1,44 @@
+import asyncio
+import logging
+from datetime import timedelta
+
+from starlette.concurrency import run_in_threadpool
+
+from app.crud.archive import archive_maintenance_orders
+from app.database import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+def archive_closed_orders(session_factory, after_days: float, batch_size: int) -> int:
+    """
+    Archive the orders closed more than ``after_days`` days ago, batch by batch.
+
+    Args:
+    - session_factory: Callable returning a new sync database session.
+    - after_days (float): Days an order must have stayed closed.
+    - batch_size (int): Most orders moved per transaction.
+
+    Returns:
+    - int: Number of orders archived.
+    """
+    with session_factory() as db:
+        return archive_maintenance_orders(db, utcnow() - timedelta(days=after_days), batch_size)
+
+
+async def archive_periodically(session_factory, interval: float, after_days: float, batch_size: int):
+    """
+    Background task archiving the closed orders every ``interval`` seconds until cancelled.
+
+    Failures are logged and retried on the next pass. Every worker may run it: on Postgres
+    concurrent runs skip each other's locked rows, on SQLite the writes are serialized.
+    """
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            archived = await run_in_threadpool(archive_closed_orders, session_factory, after_days, batch_size)
+        except Exception:
+            logger.exception("Archiving closed maintenance orders failed")
+            continue
+        if archived:
+            logger.info("Archived %d closed maintenance orders", archived)
@@ -0,0 +1,111 @@
+"""
+Command line tasks that run once per deployment, outside the API workers.
+
+Usage:
+    python -m app.cli create-tables
+    python -m app.cli seed
+    python -m app.cli rebuild-stats
+    python -m app.cli purge-idempotency-keys
+    python -m app.cli archive --after-days 90
+"""
+import argparse
+
+
+def create_tables(args):
+    """
+    Create the tables that do not exist yet, for local development (deployments run alembic upgrade head).
+    """
+    from app.database import Base, engine
+    import app.models.idempotency  # noqa: F401 - registers the tables in the metadata
+    import app.models.maintenance  # noqa: F401
+    import app.models.vehicle  # noqa: F401
+
+    Base.metadata.create_all(bind=engine)
+    print("Tables created")
+
+
+def seed(args):
+    """
+    Load the initial vehicles and maintenance orders into empty tables.
+    """
+    from app.database import SessionLocal
+    from app.seed import create_initial_data
+
+    with SessionLocal() as db:
+        create_initial_data(db)
+    print("Initial data loaded")
+
+
+def rebuild_stats(args):
+    """
+    Recompute the maintenance order counters of GET /maintenance-orders/stats from the orders.
+    """
+    from app.crud.stats import rebuild_order_stats
+    from app.database import SessionLocal
+    import app.models.vehicle  # noqa: F401 - registers the mappers used by the orders
+
+    with SessionLocal() as db:
+        stats = rebuild_order_stats(db)
+    print(f"Statistics rebuilt from {stats['total']} maintenance orders")
+
+
+def purge_idempotency_keys(args):
+    """
+    Delete the Idempotency-Key responses older than IDEMPOTENCY_TTL.
+    """
+    from app.config import IDEMPOTENCY_TTL
+    from app.crud.idempotency import purge_idempotency_keys as db_purge_idempotency_keys
+    from app.database import SessionLocal
+
+    with SessionLocal() as db:
+        deleted = db_purge_idempotency_keys(db, IDEMPOTENCY_TTL)
+    print(f"Deleted {deleted} expired idempotency keys")
+
+
+def archive(args):
+    """
+    Move the closed maintenance orders not updated for a number of days into the archive table.
+    """
+    from app.archive import archive_closed_orders
+    from app.database import SessionLocal
+    import app.models.vehicle  # noqa: F401 - registers the mappers used by the orders
+
+    archived = archive_closed_orders(SessionLocal, args.after_days, args.batch_size)
+    print(f"Archived {archived} maintenance orders")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli", description="Maintenance Order API tasks")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    parser_create_tables = subparsers.add_parser("create-tables", help=create_tables.__doc__.strip())
+    parser_create_tables.set_defaults(func=create_tables)
+
+    parser_seed = subparsers.add_parser("seed", help=seed.__doc__.strip())
+    parser_seed.set_defaults(func=seed)
+
+    parser_rebuild_stats = subparsers.add_parser("rebuild-stats", help=rebuild_stats.__doc__.strip())
+    parser_rebuild_stats.set_defaults(func=rebuild_stats)
+
+    parser_purge_idempotency_keys = subparsers.add_parser("purge-idempotency-keys", help=purge_idempotency_keys.__doc__.strip())
+    parser_purge_idempotency_keys.set_defaults(func=purge_idempotency_keys)
+
+    from app.config import ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE
+
+    parser_archive = subparsers.add_parser("archive", help=archive.__doc__.strip())
+    parser_archive.add_argument(
+        "--after-days", type=float, default=ARCHIVE_AFTER_DAYS,
+        help="Days an order must have stayed closed (default: ARCHIVE_AFTER_DAYS)",
+    )
+    parser_archive.add_argument(
+        "--batch-size", type=int, default=ARCHIVE_BATCH_SIZE,
+        help="Orders moved per transaction (default: ARCHIVE_BATCH_SIZE)",
+    )
+    parser_archive.set_defaults(func=archive)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
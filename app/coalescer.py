@@ -0,0 +1,140 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+# Put in the queue by close() to stop the writer thread once the queued writes are done
+_STOP = object()
+
+
+class WriteCoalescer:
+    """
+    Group commit: collect writes submitted concurrently and apply them together, so many
+    requests share one statement and one commit (and one fsync on the database).
+
+    A single writer thread takes the first pending write, keeps collecting for up to
+    ``max_wait_ms`` or until ``max_batch`` writes are gathered, and passes the batch to
+    ``write_batch``. Each caller gets its own result through the Future returned by
+    ``submit``. When the batch fails as a whole and ``write_one`` is given, its writes are
+    retried one by one, so a bad item only fails its own caller. Writes whose Future was
+    cancelled before the batch started (a client that went away) are dropped. ``write_batch``
+    must return one result per write, in order; otherwise every Future of the batch fails.
+
+    The writer thread starts with the first write and stops with ``close``; statements run
+    on it are not attributed to the requests that submitted them.
+
+    Attributes:
+    - max_batch (int): Most writes applied together.
+    - max_wait (float): Seconds the first write of a batch waits for others (0 only takes
+      the writes already queued).
+    - batches, items, fallbacks (int): Counters exposed for monitoring.
+    """
+
+    def __init__(
+        self,
+        write_batch: Callable[[List], List],
+        write_one: Optional[Callable] = None,
+        max_batch: int = 100,
+        max_wait_ms: float = 2.0,
+    ):
+        self.write_batch = write_batch
+        self.write_one = write_one
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self._queue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self.batches = 0
+        self.items = 0
+        self.fallbacks = 0
+
+    def submit(self, item) -> Future:
+        """
+        Queue a write and return the Future resolved with its result once its batch is committed.
+        """
+        future = Future()
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="write-coalescer", daemon=True)
+                self._thread.start()
+            self._queue.put((item, future))
+        return future
+
+    def close(self):
+        """
+        Apply the writes already queued and stop the writer thread; a later submit restarts it.
+        """
+        with self._lock:
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join()
+
+    def stats(self) -> dict:
+        """
+        Return the settings and counters of the coalescer.
+        """
+        return {
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            "batches": self.batches,
+            "items": self.items,
+            "fallbacks": self.fallbacks,
+            "avg_batch_size": round(self.items / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def _collect(self, first):
+        batch = [first]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+            try:
+                entry = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if entry is _STOP:
+                return batch, True
+            batch.append(entry)
+        return batch, False
+
+    def _run(self):
+        while True:
+            entry = self._queue.get()
+            if entry is _STOP:
+                return
+            batch, stop = self._collect(entry)
+            self._flush(batch)
+            if stop:
+                return
+
+    def _flush(self, batch):
+        batch = [(item, future) for item, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        self.batches += 1
+        self.items += len(batch)
+        try:
+            results = self.write_batch([item for item, _ in batch])
+        except Exception as error:
+            if self.write_one is None:
+                for _, future in batch:
+                    future.set_exception(error)
+                return
+            self.fallbacks += 1
+            for item, future in batch:
+                try:
+                    future.set_result(self.write_one(item))
+                except Exception as item_error:
+                    future.set_exception(item_error)
+            return
+        results = list(results)
+        if len(results) != len(batch):
+            # Results cannot be matched to their writes; failing them beats leaving callers hanging
+            error = RuntimeError(f"write_batch returned {len(results)} results for {len(batch)} writes")
+            for _, future in batch:
+                future.set_exception(error)
+            return
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
@@ -0,0 +1,184 @@
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+
+# brotli and zstandard are optional: their encodings are only offered when installed
+try:
+    import brotli
+except ImportError:  # pragma: no cover - depends on the environment
+    brotli = None
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+# Media types worth compressing; images, archives and the like are already compressed
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/")
+
+
+class GzipEncoder:
+    def __init__(self, level: int):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        chunk = self._compressor.compress(data)
+        return chunk + self._compressor.flush(zlib.Z_SYNC_FLUSH) if flush else chunk
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    def __init__(self, level: int):
+        self._compressor = brotli.Compressor(quality=level)
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        chunk = self._compressor.process(data)
+        return chunk + self._compressor.flush() if flush else chunk
+
+    def finish(self) -> bytes:
+        return self._compressor.finish()
+
+
+class ZstdEncoder:
+    def __init__(self, level: int):
+        self._compressor = zstandard.ZstdCompressor(level=level).compressobj()
+
+    def compress(self, data: bytes, flush: bool = False) -> bytes:
+        chunk = self._compressor.compress(data)
+        return chunk + self._compressor.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK) if flush else chunk
+
+    def finish(self) -> bytes:
+        return self._compressor.flush()
+
+
+# Content-Encoding -> encoder class, in order of preference when the client accepts several
+ENCODERS = {
+    name: encoder
+    for name, encoder, available in (
+        ("zstd", ZstdEncoder, zstandard is not None),
+        ("br", BrotliEncoder, brotli is not None),
+        ("gzip", GzipEncoder, True),
+    )
+    if available
+}
+
+
+def choose_encoding(accept_encoding: Optional[str], available=ENCODERS) -> Optional[str]:
+    """
+    Pick the response encoding from an Accept-Encoding header.
+
+    The encoding with the highest q-value wins; ties go to the order of ``available``.
+    ``*`` stands for every encoding not listed, and ``q=0`` refuses one.
+
+    Args:
+    - accept_encoding (str): Value of the Accept-Encoding header, or None when absent.
+    - available (Iterable[str]): Supported encodings, most preferred first.
+
+    Returns:
+    - str: The chosen Content-Encoding, or None to send the body uncompressed.
+    """
+    if not accept_encoding:
+        return None
+    weights = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.strip().partition(";")
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        weights[name.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    best, best_weight = None, 0.0
+    for name in available:
+        weight = weights.get(name, wildcard)
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing responses with the best encoding the client accepts
+    (zstd, br or gzip, as installed).
+
+    Bodies sent in one piece are compressed only from ``minimum_size`` bytes. Streamed
+    bodies (the exports) are compressed chunk by chunk and flushed after each one, so the
+    client keeps receiving rows as they are produced. Compressed responses get
+    ``Vary: Accept-Encoding``, and a strong ETag becomes weak, as the bytes now depend on
+    the encoding.
+
+    Args:
+    - app: The ASGI application.
+    - minimum_size (int): Smallest body, in bytes, worth compressing.
+    - levels (dict): Compression level by encoding (``gzip`` 1-9, ``br`` 0-11, ``zstd`` 1-22).
+    """
+
+    def __init__(self, app, minimum_size: int = 1024, levels: Optional[dict] = None):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.levels = {"gzip": 6, "br": 4, "zstd": 3, **(levels or {})}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding"))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        encoder = None
+
+        async def send_compressed(message):
+            nonlocal start, encoder
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if (
+                    message["status"] in (204, 304)
+                    or "content-encoding" in headers
+                    or not headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+                ):
+                    await send(message)
+                    return
+                # Wait for the first chunk to know whether the body is streamed and how large it is
+                start = message
+                return
+            if start is None or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is None:
+                headers = MutableHeaders(raw=list(start["headers"]))
+                headers.add_vary_header("Accept-Encoding")
+                if not more_body and len(body) < self.minimum_size:
+                    await send({**start, "headers": headers.raw})
+                    start = None
+                    await send(message)
+                    return
+                encoder = ENCODERS[encoding](self.levels[encoding])
+                headers["Content-Encoding"] = encoding
+                if "etag" in headers and not headers["etag"].startswith("W/"):
+                    headers["ETag"] = "W/" + headers["etag"]
+                if more_body:
+                    del headers["Content-Length"]
+                else:
+                    body = encoder.compress(body) + encoder.finish()
+                    headers["Content-Length"] = str(len(body))
+                    await send({**start, "headers": headers.raw})
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                await send({**start, "headers": headers.raw})
+            chunk = encoder.compress(body, flush=more_body)
+            if not more_body:
+                chunk += encoder.finish()
+            await send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
@@ -4,6 +4,25 @@ from dotenv import load_dotenv
 # Carga las variables de entorno desde el archivo .env
 load_dotenv()
 
+
+def get_bool(name: str, default: bool = False) -> bool:
+    """
+    Read a boolean flag from the environment ("1", "true", "yes" and "on" are truthy).
+    """
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def get_mapping(name: str) -> dict:
+    """
+    Read "key=value" pairs separated by commas from the environment (values are kept as strings).
+    """
+    pairs = (item.rsplit("=", 1) for item in os.getenv(name, "").split(",") if "=" in item)
+    return {key.strip(): value.strip() for key, value in pairs}
+
+
 # Obtiene las variables de entorno
 POSTGRES_USER = os.getenv("POSTGRES_USER", "postgres")
 POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "password")
@@ -12,4 +31,119 @@ POSTGRES_HOST = os.getenv("POSTGRES_HOST", "db")
 POSTGRES_PORT = os.getenv("POSTGRES_PORT", "5432")
 
 
-DATABASE_URL = f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}"
+# DATABASE_URL permite apuntar a otra base de datos (por ejemplo sqlite:///./local.db)
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    f"postgresql://{POSTGRES_USER}:{POSTGRES_PASSWORD}@{POSTGRES_HOST}:{POSTGRES_PORT}/{POSTGRES_DB}",
+)
+
+# Réplicas de lectura, separadas por comas; los GET se reparten entre ellas (round robin)
+# y las escrituras van siempre a DATABASE_URL
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+# Réplicas asíncronas; si no se definen, se derivan de DATABASE_REPLICA_URLS cambiando el driver
+ASYNC_DATABASE_REPLICA_URLS = [
+    url.strip() for url in os.getenv("ASYNC_DATABASE_REPLICA_URLS", "").split(",") if url.strip()
+]
+# Segundos que una réplica con errores de conexión queda fuera de la rotación
+REPLICA_EJECT_SECONDS = float(os.getenv("REPLICA_EJECT_SECONDS", "30"))
+# Segundos tras una escritura en los que las lecturas del mismo cliente van a la base principal
+# (debe superar el retraso de replicación)
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Modo asíncrono: usa AsyncSession (asyncpg / aiosqlite) en los endpoints principales
+DATABASE_ASYNC = get_bool("DATABASE_ASYNC", False)
+# Si no se define, se deriva de DATABASE_URL cambiando el driver
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL")
+
+# Caché en memoria (LRU + TTL) para las búsquedas de vehículos por ID y por placa
+VEHICLE_CACHE_ENABLED = get_bool("VEHICLE_CACHE_ENABLED", True)
+VEHICLE_CACHE_MAXSIZE = int(os.getenv("VEHICLE_CACHE_MAXSIZE", "10000"))
+VEHICLE_CACHE_TTL = float(os.getenv("VEHICLE_CACHE_TTL", "300"))
+
+# Pool de conexiones (ver la documentación de create_engine de SQLAlchemy)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+# Segundos tras los cuales se recicla una conexión (-1 desactiva el reciclado)
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "-1"))
+DB_POOL_PRE_PING = get_bool("DB_POOL_PRE_PING", False)
+DB_POOL_USE_LIFO = get_bool("DB_POOL_USE_LIFO", False)
+
+# Arranque: crea las tablas faltantes y/o carga los datos iniciales al iniciar cada worker.
+# Solo para desarrollo local con un único worker: en despliegues usa DB_CREATE_ALL=false,
+# `alembic upgrade head` y `python -m app.cli seed` una sola vez.
+DB_CREATE_ALL = get_bool("DB_CREATE_ALL", True)
+DB_SEED_ON_STARTUP = get_bool("DB_SEED_ON_STARTUP", False)
+
+# Listados que usan la serialización rápida (filas SQL + TypeAdapter + orjson),
+# separados por comas: "vehicles", "maintenance_orders"
+FAST_SERIALIZATION_ENDPOINTS = {
+    name.strip() for name in os.getenv("FAST_SERIALIZATION_ENDPOINTS", "").split(",") if name.strip()
+}
+
+# Métricas por ruta (latencia, códigos de estado, consultas SQL) expuestas en /metrics
+METRICS_ENABLED = get_bool("METRICS_ENABLED", True)
+# Añade la cabecera Server-Timing (tiempo en base de datos y total) a cada respuesta
+SERVER_TIMING_ENABLED = get_bool("SERVER_TIMING_ENABLED", True)
+
+# Registro de consultas lentas: sentencias que tardan al menos este número de milisegundos
+# (0 lo desactiva), con sus parámetros, la ruta que las ejecutó y su duración
+SLOW_QUERY_THRESHOLD_MS = float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "0"))
+# Captura el plan de los SELECT lentos: EXPLAIN (ANALYZE, BUFFERS) en Postgres (vuelve a
+# ejecutar la consulta) o EXPLAIN QUERY PLAN en SQLite
+SLOW_QUERY_EXPLAIN = get_bool("SLOW_QUERY_EXPLAIN", False)
+SLOW_QUERY_LOG_PARAMETERS = get_bool("SLOW_QUERY_LOG_PARAMETERS", True)
+
+# Tiempo máximo de cada sentencia SQL ejecutada durante una petición, en milisegundos (0 = sin límite)
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "0"))
+# Límites por endpoint, que reemplazan al anterior:
+# "GET /maintenance-orders/search=2000,GET /maintenance-orders/export=0"
+DB_STATEMENT_TIMEOUTS = {route: int(value) for route, value in get_mapping("DB_STATEMENT_TIMEOUTS").items()}
+
+# Compresión de respuestas negociada con Accept-Encoding (gzip; br y zstd si están instalados)
+COMPRESSION_ENABLED = get_bool("COMPRESSION_ENABLED", True)
+# Tamaño mínimo en bytes de las respuestas que se comprimen (las respuestas en streaming siempre)
+COMPRESSION_MINIMUM_SIZE = int(os.getenv("COMPRESSION_MINIMUM_SIZE", "1024"))
+# Nivel de compresión: gzip 1-9, brotli 0-11, zstd 1-22
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "6"))
+COMPRESSION_BROTLI_LEVEL = int(os.getenv("COMPRESSION_BROTLI_LEVEL", "4"))
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+
+# Agrupa las creaciones de órdenes concurrentes (POST /maintenance-orders/) en un único
+# INSERT y un único commit ("group commit"); cada petición recibe su propia respuesta
+WRITE_COALESCING_ENABLED = get_bool("WRITE_COALESCING_ENABLED", False)
+# Órdenes máximas por lote y milisegundos que la primera espera a las demás
+WRITE_COALESCING_MAX_BATCH = int(os.getenv("WRITE_COALESCING_MAX_BATCH", "100"))
+WRITE_COALESCING_MAX_WAIT_MS = float(os.getenv("WRITE_COALESCING_MAX_WAIT_MS", "2"))
+
+# Cabecera Idempotency-Key en POST /vehicles/ y POST /maintenance-orders/: los reintentos
+# reciben la respuesta original sin volver a crear nada
+IDEMPOTENCY_ENABLED = get_bool("IDEMPOTENCY_ENABLED", True)
+# Segundos que se conservan las claves y sus respuestas (python -m app.cli purge-idempotency-keys borra las vencidas)
+IDEMPOTENCY_TTL = float(os.getenv("IDEMPOTENCY_TTL", "86400"))
+# Segundos que una clave puede quedar "en curso" (el worker que la reservó cayó o no pudo guardar
+# la respuesta) antes de que otra petición con la misma clave la vuelva a ejecutar; debe superar
+# la duración de la petición más lenta
+IDEMPOTENCY_LEASE_SECONDS = float(os.getenv("IDEMPOTENCY_LEASE_SECONDS", "60"))
+# Respuestas guardadas además en la caché en memoria de cada worker
+IDEMPOTENCY_CACHE_MAXSIZE = int(os.getenv("IDEMPOTENCY_CACHE_MAXSIZE", "10000"))
+
+# Archivo de órdenes cerradas (completed, cancelled, rejected): se mueven a
+# maintenance_orders_archive cuando llevan este número de días sin cambios
+ARCHIVE_AFTER_DAYS = float(os.getenv("ARCHIVE_AFTER_DAYS", "90"))
+# Órdenes movidas por transacción
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE", "1000"))
+# Segundos entre dos pasadas del archivo en segundo plano en cada worker (0 lo desactiva;
+# también se puede ejecutar con python -m app.cli archive)
+ARCHIVE_INTERVAL_SECONDS = float(os.getenv("ARCHIVE_INTERVAL_SECONDS", "0"))
+
+# Eventos de las órdenes (GET /maintenance-orders/stream, SSE y WebSocket): últimos eventos
+# guardados en cada worker para que un cliente que se reconecta reciba los que perdió
+ORDER_EVENTS_HISTORY = int(os.getenv("ORDER_EVENTS_HISTORY", "1000"))
+# Eventos pendientes por cliente; un cliente que se queda atrás se desconecta y se reanuda con Last-Event-ID
+ORDER_EVENTS_QUEUE_SIZE = int(os.getenv("ORDER_EVENTS_QUEUE_SIZE", "100"))
+# Segundos sin eventos tras los que el stream SSE envía un comentario para mantener la conexión
+ORDER_EVENTS_KEEPALIVE_SECONDS = float(os.getenv("ORDER_EVENTS_KEEPALIVE_SECONDS", "15"))
+# Reparte los eventos entre workers con LISTEN/NOTIFY de Postgres (solo Postgres)
+ORDER_EVENTS_NOTIFY = get_bool("ORDER_EVENTS_NOTIFY", False)
+ORDER_EVENTS_CHANNEL = os.getenv("ORDER_EVENTS_CHANNEL", "maintenance_order_events")
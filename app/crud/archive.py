@@ -0,0 +1,94 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import delete, func, insert, literal, select
+from sqlalchemy.orm import Session
+
+from app.database import utcnow
+from app.models.maintenance import CLOSED_STATUSES, ArchivedMaintenanceOrder, MaintenanceOrder
+
+# Columns copied from maintenance_orders into maintenance_orders_archive
+ARCHIVED_COLUMNS = [
+    "id", "vehicle_id", "service_type", "description", "status", "mechanical_parts",
+    "version_id", "created_at", "updated_at",
+]
+
+
+def archive_maintenance_order_batch(db: Session, closed_before: datetime, batch_size: int = 1000) -> int:
+    """
+    Move one batch of closed maintenance orders into the archive, in its own transaction.
+
+    The batch is copied with INSERT ... SELECT and removed with one DELETE; its parts go
+    with it through the ON DELETE CASCADE of the parts index, and its description leaves
+    the search index. The status counters are not changed, as archived orders still count.
+    On Postgres the rows are locked with FOR UPDATE SKIP LOCKED, so concurrent runs take
+    different batches and orders being changed are left for the next run.
+
+    Args:
+    - db (Session): Database session dependency.
+    - closed_before (datetime): Only orders closed (last updated) before this time are moved.
+    - batch_size (int): Most orders moved by the batch.
+
+    Returns:
+    - int: Number of orders archived.
+    """
+    # SQLite gives a new row the highest ID plus one, so the newest order is never moved:
+    # its ID would be handed out again and clash with the archived one
+    newest_id = select(func.max(MaintenanceOrder.id)).scalar_subquery()
+    ids = db.scalars(
+        select(MaintenanceOrder.id)
+        .where(
+            MaintenanceOrder.status.in_(CLOSED_STATUSES),
+            MaintenanceOrder.updated_at < closed_before,
+            MaintenanceOrder.id < newest_id,
+        )
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).all()
+    if not ids:
+        db.rollback()
+        return 0
+    archived_at = literal(utcnow(), ArchivedMaintenanceOrder.archived_at.type)
+    db.execute(
+        insert(ArchivedMaintenanceOrder).from_select(
+            [*ARCHIVED_COLUMNS, "archived_at"],
+            select(*(getattr(MaintenanceOrder, name) for name in ARCHIVED_COLUMNS), archived_at)
+            .where(MaintenanceOrder.id.in_(ids)),
+        )
+    )
+    db.execute(
+        delete(MaintenanceOrder)
+        .where(MaintenanceOrder.id.in_(ids))
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return len(ids)
+
+
+def archive_maintenance_orders(
+    db: Session, closed_before: datetime, batch_size: int = 1000, max_batches: Optional[int] = None
+) -> int:
+    """
+    Move the closed maintenance orders last updated before a cutoff into the archive.
+
+    Orders are moved in batches of ``batch_size``, each committed on its own, so locks are
+    held for one batch only and the work can be stopped and resumed at any point.
+
+    Args:
+    - db (Session): Database session dependency.
+    - closed_before (datetime): Only orders closed (last updated) before this time are moved.
+    - batch_size (int): Most orders moved per transaction.
+    - max_batches (int): Stop after this many batches, None to archive every eligible order.
+
+    Returns:
+    - int: Number of orders archived.
+    """
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        moved = archive_maintenance_order_batch(db, closed_before, batch_size)
+        archived += moved
+        batches += 1
+        if moved < batch_size:
+            break
+    return archived
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from sqlalchemy import and_, delete, or_, update
+from sqlalchemy.orm import Session
+
+from app.database import upsert_insert, utcnow
+from app.models.idempotency import IdempotencyKey
+
+
+def claim_idempotency_key(
+    db: Session, key: str, route: str, fingerprint: str, ttl: float, lease: float = 60
+) -> Optional[datetime]:
+    """
+    Reserve an idempotency key for the request about to run.
+
+    A single INSERT ... ON CONFLICT decides the winner among concurrent duplicates, on
+    every worker; a key that expired is taken over in the same statement. A key still in
+    progress after ``lease`` seconds (its worker crashed, or its response could not be
+    stored) is taken over too, without waiting for the whole ``ttl``.
+
+    The returned ``created_at`` identifies this claim: saving or releasing the key only
+    applies while it still matches, so a request that outlived its lease cannot overwrite
+    or drop the claim of the retry that took the key over.
+
+    Args:
+    - db (Session): Database session dependency.
+    - key (str): Value of the Idempotency-Key header.
+    - route (str): Method and path of the request.
+    - fingerprint (str): Hash of the request.
+    - ttl (float): Seconds a key stays valid.
+    - lease (float): Seconds a key may stay in progress.
+
+    Returns:
+    - datetime: ``created_at`` of the claim when the key was reserved for this request,
+      None when it is already taken.
+    """
+    now = utcnow()
+    stmt = upsert_insert(db, IdempotencyKey).values(key=key, route=route, fingerprint=fingerprint, created_at=now)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[IdempotencyKey.key],
+        set_={
+            "route": stmt.excluded.route,
+            "fingerprint": stmt.excluded.fingerprint,
+            "status_code": None,
+            "response_headers": None,
+            "response_body": None,
+            "created_at": stmt.excluded.created_at,
+        },
+        where=or_(
+            IdempotencyKey.created_at < now - timedelta(seconds=ttl),
+            and_(IdempotencyKey.status_code.is_(None), IdempotencyKey.created_at < now - timedelta(seconds=lease)),
+        ),
+    ).returning(IdempotencyKey.created_at)
+    claimed_at = db.scalar(stmt)
+    db.commit()
+    return claimed_at
+
+
+def get_idempotency_key(db: Session, key: str) -> Optional[IdempotencyKey]:
+    """
+    Retrieve an idempotency key with its stored response.
+
+    Args:
+    - db (Session): Database session dependency.
+    - key (str): Value of the Idempotency-Key header.
+
+    Returns:
+    - IdempotencyKey: The key, or None if it does not exist.
+    """
+    return db.get(IdempotencyKey, key)
+
+
+def save_idempotent_response(
+    db: Session, key: str, claimed_at: datetime, status_code: int, headers: List[List[str]], body: bytes
+) -> bool:
+    """
+    Store the response of the request that reserved an idempotency key.
+
+    Args:
+    - db (Session): Database session dependency.
+    - key (str): Value of the Idempotency-Key header.
+    - claimed_at (datetime): Claim returned by claim_idempotency_key.
+    - status_code (int): Status code of the response.
+    - headers (List[List[str]]): Response headers to replay.
+    - body (bytes): Body of the response.
+
+    Returns:
+    - bool: False when the claim was taken over by another request, which keeps the key.
+    """
+    result = db.execute(
+        update(IdempotencyKey)
+        .where(IdempotencyKey.key == key, IdempotencyKey.created_at == claimed_at)
+        .values(status_code=status_code, response_headers=headers, response_body=body)
+    )
+    db.commit()
+    return result.rowcount == 1
+
+
+def release_idempotency_key(db: Session, key: str, claimed_at: datetime):
+    """
+    Drop a reserved idempotency key whose request failed, so the client can retry it.
+
+    Args:
+    - db (Session): Database session dependency.
+    - key (str): Value of the Idempotency-Key header.
+    - claimed_at (datetime): Claim returned by claim_idempotency_key; a claim taken over
+      by another request is left alone.
+    """
+    db.execute(
+        delete(IdempotencyKey).where(
+            IdempotencyKey.key == key,
+            IdempotencyKey.created_at == claimed_at,
+            IdempotencyKey.status_code.is_(None),
+        )
+    )
+    db.commit()
+
+
+def purge_idempotency_keys(db: Session, ttl: float, now: Optional[datetime] = None) -> int:
+    """
+    Delete the expired idempotency keys.
+
+    Args:
+    - db (Session): Database session dependency.
+    - ttl (float): Seconds a key stays valid.
+    - now (datetime): Current time, for tests.
+
+    Returns:
+    - int: Number of keys deleted.
+    """
+    cutoff = (now or utcnow()) - timedelta(seconds=ttl)
+    result = db.execute(delete(IdempotencyKey).where(IdempotencyKey.created_at < cutoff))
+    db.commit()
+    return result.rowcount
@@ -1,23 +1,194 @@
-from sqlalchemy.orm import Session
-from app.models.maintenance import MaintenanceOrder
-from app.schemas.maintenance import MaintenanceOrderCreate
+import re
+from collections import Counter
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import Double, and_, bindparam, cast, column, func, insert, literal_column, or_, select, table, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from app.crud.stats import order_stat_deltas, record_order_stats, status_change_deltas
+from app.database import insert_returning, insert_returning_ids, is_foreign_key_violation
+from app.events import publish_orders_created, publish_status_changes
+from app.models.maintenance import (
+    ALLOWED_TRANSITIONS,
+    SEARCH_CONFIG,
+    ArchivedMaintenanceOrder,
+    MaintenanceOrder,
+    MaintenanceOrderPart,
+    MaintenanceOrderStatus,
+)
+from app.models.vehicle import Vehicle
+from app.schemas.maintenance import MaintenanceOrderCreate, PartMatch
+
+# Detail of the orders that do not exist
+ORDER_NOT_FOUND = "Order not found"
+
+# Columns written by the maintenance order export, in order
+EXPORT_COLUMNS = ["id", "vehicle_id", "service_type", "description", "status", "mechanical_parts"]
 
 
 def get_maintenance_order(db: Session, order_id: int):
     """
-    Retrieve a maintenance order by its ID.
+    Retrieve a maintenance order by its ID, looking in the archive when it is not in
+    ``maintenance_orders``.
 
     Args:
     - db (Session): Database session dependency.
     - order_id (int): ID of the maintenance order to retrieve.
 
     Returns:
-    - MaintenanceOrder: The retrieved maintenance order.
+    - MaintenanceOrder | ArchivedMaintenanceOrder: The retrieved maintenance order, or None
+      if it does not exist.
+    """
+    db_order = db.query(MaintenanceOrder).filter(MaintenanceOrder.id == order_id).first()
+    if db_order is None:
+        return db.get(ArchivedMaintenanceOrder, order_id)
+    return db_order
+
+
+def get_maintenance_order_version(db: Session, order_id: int) -> Optional[int]:
+    """
+    Retrieve the row version of a maintenance order from the (id, version_id) index,
+    without loading the row, to answer conditional GETs.
+
+    Args:
+    - db (Session): Database session dependency.
+    - order_id (int): ID of the maintenance order.
+
+    Returns:
+    - int: The ``version_id`` of the order (archived or not), or None if it does not exist.
+    """
+    version_id = db.scalar(select(MaintenanceOrder.version_id).where(MaintenanceOrder.id == order_id))
+    if version_id is None:
+        return db.scalar(select(ArchivedMaintenanceOrder.version_id).where(ArchivedMaintenanceOrder.id == order_id))
+    return version_id
+
+
+def normalize_part(part: str) -> str:
+    """
+    Normalize the name of a mechanical part for the parts index: lower case, single spaces.
+
+    Args:
+    - part (str): Name of the part as sent by the client.
+
+    Returns:
+    - str: The normalized name.
+    """
+    return " ".join(part.split()).lower()
+
+
+def order_part_rows(order_id: int, parts: Sequence[str]):
+    """
+    Build the rows of the parts index for one maintenance order.
+
+    Args:
+    - order_id (int): ID of the maintenance order.
+    - parts (List[str]): Mechanical parts of the order.
+
+    Returns:
+    - List[dict]: One row per distinct normalized part.
+    """
+    normalized = dict.fromkeys(normalize_part(part) for part in parts or [])
+    return [{"order_id": order_id, "part": part} for part in normalized if part]
+
+
+def index_order_parts(db: Session, rows):
+    """
+    Write rows of the parts index in the current transaction.
+
+    Args:
+    - db (Session): Database session dependency.
+    - rows (List[dict]): Rows built with order_part_rows.
+    """
+    if rows:
+        db.execute(insert(MaintenanceOrderPart), rows)
+
+
+def part_criterion(part: str, part_match: PartMatch = PartMatch.exact):
+    """
+    Build the criterion selecting the orders that use a mechanical part.
+
+    Both modes are range scans over the (part, order_id) index: a prefix ``p`` is matched
+    as ``p <= part < next(p)``, where ``next(p)`` increments the last character of ``p``.
+
+    Args:
+    - part (str): Name of the part, or its beginning; it is normalized like the index.
+    - part_match (PartMatch): "exact" or "prefix".
+
+    Returns:
+    - ColumnElement: The criterion over ``MaintenanceOrder.id``.
+    """
+    part = normalize_part(part)
+    if part_match == PartMatch.exact:
+        condition = MaintenanceOrderPart.part == part
+    else:
+        upper = part[:-1] + chr(ord(part[-1]) + 1) if part and ord(part[-1]) < 0x10FFFF else None
+        condition = MaintenanceOrderPart.part >= part
+        if upper is not None:
+            condition = and_(condition, MaintenanceOrderPart.part < upper)
+    return MaintenanceOrder.id.in_(select(MaintenanceOrderPart.order_id).where(condition))
+
+
+def maintenance_order_filters(
+    status: Optional[Sequence[MaintenanceOrderStatus]] = None,
+    vehicle_id: Optional[int] = None,
+    service_type: Optional[str] = None,
+    part: Optional[str] = None,
+    part_match: PartMatch = PartMatch.exact,
+    model=MaintenanceOrder,
+):
+    """
+    Build the WHERE criteria of a filtered maintenance order listing.
+
+    Each filter is backed by an index ending in ``id`` (see MaintenanceOrder), the open
+    orders of a vehicle by a partial index on Postgres and SQLite, and the parts filter
+    by the maintenance_order_parts side table.
+
+    Args:
+    - status (List[MaintenanceOrderStatus]): Only orders with one of these statuses.
+    - vehicle_id (int): Only orders of this vehicle.
+    - service_type (str): Only orders with this service type.
+    - part (str): Only orders that use this mechanical part.
+    - part_match (PartMatch): Match ``part`` exactly or as a prefix.
+    - model: MaintenanceOrder, or ArchivedMaintenanceOrder to filter the archive (its parts
+      are not indexed, so ``part`` is not supported there).
+
+    Returns:
+    - List[ColumnElement]: The criteria, to be passed to ``filter`` or ``where``.
+    """
+    criteria = []
+    if status:
+        # Statuses are rendered as literals (there are only a few), so the planner can match
+        # the predicate of the partial index even with server-side bound parameters
+        statuses = sorted(set(status), key=list(MaintenanceOrderStatus).index)
+        criteria.append(
+            model.status.in_(bindparam("status", statuses, expanding=True, literal_execute=True))
+        )
+    if vehicle_id is not None:
+        criteria.append(model.vehicle_id == vehicle_id)
+    if service_type is not None:
+        criteria.append(model.service_type == service_type)
+    if part is not None:
+        criteria.append(part_criterion(part, part_match))
+    return criteria
+
+
+def maintenance_order_options(include_vehicle: bool = False):
+    """
+    Build the loader options of a maintenance order listing.
+
+    Related rows are loaded with ``selectinload``: a single ``SELECT ... WHERE id IN (...)``
+    for the whole page, so the number of queries does not grow with the page size.
+
+    Args:
+    - include_vehicle (bool): Load the vehicle of every order.
+
+    Returns:
+    - List[LoaderOption]: The options, to be passed to ``options``.
     """
-    return db.query(MaintenanceOrder).filter(MaintenanceOrder.id == order_id).first()
+    return [selectinload(MaintenanceOrder.vehicle)] if include_vehicle else []
 
 
-def get_maintenance_orders(db: Session, skip: int = 0, limit: int = 10):
+def get_maintenance_orders(db: Session, skip: int = 0, limit: int = 10, include_vehicle: bool = False, **filters):
     """
     Retrieve a list of maintenance orders with pagination support.
 
@@ -25,26 +196,364 @@ def get_maintenance_orders(db: Session, skip: int = 0, limit: int = 10):
     - db (Session): Database session dependency.
     - skip (int): Number of records to skip.
     - limit (int): Maximum number of records to return.
+    - include_vehicle (bool): Also load the vehicle of every order, with one extra query for the whole page.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - List[MaintenanceOrder]: A list of maintenance orders ordered by ID.
+    """
+    return (
+        db.query(MaintenanceOrder)
+        .options(*maintenance_order_options(include_vehicle))
+        .filter(*maintenance_order_filters(**filters))
+        .order_by(MaintenanceOrder.id)
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+
+
+def get_maintenance_orders_after(
+    db: Session, after_id: int = 0, limit: int = 10, include_vehicle: bool = False, **filters
+):
+    """
+    Retrieve a page of maintenance orders using keyset pagination on the primary key.
+
+    Unlike offset pagination, the cost of a page does not depend on how deep it is.
+
+    Args:
+    - db (Session): Database session dependency.
+    - after_id (int): Only orders with an ID greater than this one are returned.
+    - limit (int): Maximum number of records to return.
+    - include_vehicle (bool): Also load the vehicle of every order, with one extra query for the whole page.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - List[MaintenanceOrder]: A list of maintenance orders ordered by ID.
+    """
+    return (
+        db.query(MaintenanceOrder)
+        .options(*maintenance_order_options(include_vehicle))
+        .filter(MaintenanceOrder.id > after_id, *maintenance_order_filters(**filters))
+        .order_by(MaintenanceOrder.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def maintenance_order_rows_stmt(skip: int = 0, limit: int = 10, after_id: Optional[int] = None, **filters):
+    """
+    Build the SELECT of the maintenance order listing over plain columns, without ORM entities.
+
+    Args:
+    - skip (int): Number of records to skip (offset pagination).
+    - limit (int): Maximum number of records to return.
+    - after_id (int): Start after this ID (keyset pagination); overrides ``skip``.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - Select: The statement, returning the columns in EXPORT_COLUMNS ordered by ID.
+    """
+    stmt = (
+        select(*[getattr(MaintenanceOrder, column) for column in EXPORT_COLUMNS])
+        .where(*maintenance_order_filters(**filters))
+        .order_by(MaintenanceOrder.id)
+    )
+    if after_id is not None:
+        return stmt.where(MaintenanceOrder.id > after_id).limit(limit)
+    return stmt.offset(skip).limit(limit)
+
+
+def get_maintenance_order_rows(db: Session, skip: int = 0, limit: int = 10, after_id: Optional[int] = None, **filters):
+    """
+    Retrieve a page of maintenance orders as plain rows, for the fast serialization path.
+
+    Args:
+    - db (Session): Database session dependency.
+    - skip (int): Number of records to skip (offset pagination).
+    - limit (int): Maximum number of records to return.
+    - after_id (int): Start after this ID (keyset pagination); overrides ``skip``.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - List[Mapping]: The maintenance orders, with the keys in EXPORT_COLUMNS.
+    """
+    stmt = maintenance_order_rows_stmt(skip=skip, limit=limit, after_id=after_id, **filters)
+    return db.execute(stmt).mappings().all()
+
+
+def iter_maintenance_orders(db: Session, batch_size: int = 1000, **filters):
+    """
+    Stream maintenance orders ordered by ID without loading the whole table.
+
+    Rows are fetched through a server-side cursor (on Postgres) ``batch_size`` at a time
+    and are returned as plain mappings, so no ORM objects are kept in the session.
+
+    Args:
+    - db (Session): Database session; it must stay open while the rows are consumed.
+    - batch_size (int): Number of rows fetched per round trip.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - Iterator[Mapping]: The maintenance orders, with the keys in EXPORT_COLUMNS.
+    """
+    stmt = (
+        select(*[getattr(MaintenanceOrder, column) for column in EXPORT_COLUMNS])
+        .where(*maintenance_order_filters(**filters))
+        .order_by(MaintenanceOrder.id)
+    )
+    result = db.execute(stmt, execution_options={"stream_results": True, "yield_per": batch_size})
+    yield from result.mappings()
+
+
+def fts5_query(q: str) -> str:
+    """
+    Turn free text into an FTS5 query matching every word, without FTS5 operators.
+
+    Args:
+    - q (str): Words to search for, as typed by the user.
+
+    Returns:
+    - str: The MATCH expression, or "" when ``q`` has no words.
+    """
+    return " ".join('"%s"' % word for word in re.findall(r"\w+", q))
+
+
+def search_hits(dialect: str, q: str, **filters):
+    """
+    Build the subquery of the orders matching a full-text search, with their rank.
+
+    On Postgres the generated ``description_tsv`` column is matched through its GIN index
+    and ranked with ts_rank_cd; on SQLite the FTS5 table is matched and ranked with bm25.
+    Ranks are doubles (higher is better) so they survive the round trip through a cursor.
+
+    Args:
+    - dialect (str): Name of the database dialect.
+    - q (str): Words to search for; every word must match.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - Subquery: The columns in EXPORT_COLUMNS plus ``rank``.
+    """
+    columns = [getattr(MaintenanceOrder, column) for column in EXPORT_COLUMNS]
+    criteria = maintenance_order_filters(**filters)
+    if dialect == "postgresql":
+        query = func.websearch_to_tsquery(literal_column(f"'{SEARCH_CONFIG}'::regconfig"), q)
+        document = literal_column("maintenance_orders.description_tsv")
+        rank = cast(func.ts_rank_cd(document, query), Double)
+        stmt = select(*columns, rank.label("rank")).where(document.op("@@")(query), *criteria)
+    else:
+        fts = table("maintenance_orders_fts", column("rowid"))
+        rank = -func.bm25(literal_column("maintenance_orders_fts"))
+        stmt = (
+            select(*columns, rank.label("rank"))
+            .select_from(fts.join(MaintenanceOrder, MaintenanceOrder.id == fts.c.rowid))
+            .where(literal_column("maintenance_orders_fts").op("MATCH")(fts5_query(q)), *criteria)
+        )
+    return stmt.subquery("hits")
+
+
+def search_maintenance_orders(
+    db: Session, q: str, limit: int = 10, after: Optional[Tuple[float, int]] = None, **filters
+):
+    """
+    Search maintenance orders by the words of their description, best matches first.
+
+    Pages are ordered by rank, then ID, and continue after the (rank, id) of the last row
+    of the previous page (keyset pagination).
+
+    Args:
+    - db (Session): Database session dependency.
+    - q (str): Words to search for; every word must match.
+    - limit (int): Maximum number of records to return.
+    - after (Tuple[float, int]): Rank and ID of the last row of the previous page.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
 
     Returns:
-    - List[MaintenanceOrder]: A list of maintenance orders.
+    - List[dict]: The matching orders, with the keys in EXPORT_COLUMNS plus ``rank``.
     """
-    return db.query(MaintenanceOrder).offset(skip).limit(limit).all()
+    dialect = db.get_bind().dialect.name
+    if dialect != "postgresql" and not fts5_query(q):
+        return []
+    hits = search_hits(dialect, q, **filters)
+    stmt = select(hits).order_by(hits.c.rank.desc(), hits.c.id).limit(limit)
+    if after is not None:
+        rank, last_id = after
+        stmt = stmt.where(or_(hits.c.rank < rank, and_(hits.c.rank == rank, hits.c.id > last_id)))
+    return [dict(row) for row in db.execute(stmt).mappings()]
 
 
 def create_maintenance_order(db: Session, order: MaintenanceOrderCreate):
     """
     Create a new maintenance order.
 
+    The order is written with a single INSERT ... RETURNING; the foreign key on
+    ``vehicle_id`` rejects unknown vehicles without a prior lookup. Its parts and the
+    order counters are updated in the same transaction.
+
     Args:
     - db (Session): Database session dependency.
     - order (MaintenanceOrderCreate): Details of the maintenance order to create.
 
     Returns:
-    - MaintenanceOrder: The created maintenance order.
+    - MaintenanceOrder: The created maintenance order, or None if the vehicle does not exist.
     """
-    db_order = MaintenanceOrder(**order.dict())
-    db.add(db_order)
+    values = order.dict()
+    try:
+        db_order = db.scalars(insert(MaintenanceOrder).values(**values).returning(MaintenanceOrder)).one()
+    except IntegrityError as e:
+        db.rollback()
+        if is_foreign_key_violation(e):
+            return None
+        raise
+    index_order_parts(db, order_part_rows(db_order.id, order.mechanical_parts))
+    record_order_stats(db, order_stat_deltas([values]))
+    # Detached before committing, so the returned values are not expired and reloaded
+    db.expunge(db_order)
     db.commit()
-    db.refresh(db_order)
+    publish_orders_created([db_order])
     return db_order
+
+
+def create_maintenance_orders(db: Session, orders: List[MaintenanceOrderCreate]):
+    """
+    Create many maintenance orders in a single transaction.
+
+    Unknown vehicle IDs are resolved with one set-based query and the remaining orders
+    are written with a multi-row INSERT ... RETURNING, so the number of round trips
+    does not grow with the size of the batch.
+
+    Args:
+    - db (Session): Database session dependency.
+    - orders (List[MaintenanceOrderCreate]): Details of the maintenance orders to create.
+
+    Returns:
+    - List[dict]: One result per order, in request order, with the created ``id`` or
+      the ``detail`` of why it was rejected.
+    """
+    vehicle_ids = {order.vehicle_id for order in orders}
+    existing = set(db.scalars(select(Vehicle.id).where(Vehicle.id.in_(vehicle_ids))))
+
+    results = []
+    pending = []
+    for index, order in enumerate(orders):
+        if order.vehicle_id not in existing:
+            results.append({
+                "index": index,
+                "status": "error",
+                "detail": f"Vehicle with id {order.vehicle_id} not found",
+            })
+        else:
+            result = {"index": index, "status": "created"}
+            results.append(result)
+            pending.append((result, order.dict()))
+
+    if pending:
+        ids = insert_returning_ids(db, MaintenanceOrder, [values for _, values in pending])
+        part_rows = []
+        for (result, values), order_id in zip(pending, ids):
+            result["id"] = order_id
+            part_rows.extend(order_part_rows(order_id, values["mechanical_parts"]))
+        index_order_parts(db, part_rows)
+        record_order_stats(db, order_stat_deltas([values for _, values in pending]))
+    db.commit()
+    publish_orders_created({"id": result["id"], **values} for result, values in pending)
+    return results
+
+
+def create_maintenance_order_group(db: Session, orders: List[MaintenanceOrderCreate]):
+    """
+    Create maintenance orders submitted by separate requests in one transaction (group commit).
+
+    Unknown vehicles are found with one set-based query and the remaining orders are
+    written with a multi-row INSERT ... RETURNING, as in ``create_maintenance_orders``, but
+    the full orders are returned so each request can answer as ``create_maintenance_order``.
+
+    Args:
+    - db (Session): Database session dependency.
+    - orders (List[MaintenanceOrderCreate]): Details of the maintenance orders to create.
+
+    Returns:
+    - List[MaintenanceOrder]: One entry per order, in the same order: the created
+      maintenance order, or None if its vehicle does not exist.
+    """
+    vehicle_ids = {order.vehicle_id for order in orders}
+    existing = set(db.scalars(select(Vehicle.id).where(Vehicle.id.in_(vehicle_ids))))
+    pending = [(index, order.dict()) for index, order in enumerate(orders) if order.vehicle_id in existing]
+
+    results = [None] * len(orders)
+    if pending:
+        db_orders = insert_returning(db, MaintenanceOrder, [values for _, values in pending])
+        part_rows = []
+        for (index, values), db_order in zip(pending, db_orders):
+            results[index] = db_order
+            part_rows.extend(order_part_rows(db_order.id, values["mechanical_parts"]))
+        index_order_parts(db, part_rows)
+        record_order_stats(db, order_stat_deltas([values for _, values in pending]))
+        # Detached before committing, so the returned values are not expired and reloaded
+        for db_order in db_orders:
+            db.expunge(db_order)
+    db.commit()
+    publish_orders_created(db_order for db_order in results if db_order is not None)
+    return results
+
+
+def change_maintenance_order_status(db: Session, order_ids: List[int], status: MaintenanceOrderStatus):
+    """
+    Move maintenance orders to a new status, skipping those where the transition is not allowed.
+
+    Instead of loading each order, the batch is applied with one set-based
+    UPDATE ... WHERE id IN (...) AND status = ... RETURNING id per status the target can be
+    reached from (at most two). Each statement knows the previous status of the rows it
+    changes, which keeps the status counters exact; the version of every changed order is
+    bumped, so their ETags change. The guard on the current status is re-checked on the
+    locked rows, so concurrent batches cannot apply the same transition twice.
+
+    Args:
+    - db (Session): Database session dependency.
+    - order_ids (List[int]): IDs of the maintenance orders to change; duplicates are ignored.
+    - status (MaintenanceOrderStatus): Target status.
+
+    Returns:
+    - Tuple[List[int], List[dict]]: IDs of the changed orders, in request order, and the
+      orders left unchanged, with the ``detail`` of why.
+    """
+    target = MaintenanceOrderStatus(status)
+    order_ids = list(dict.fromkeys(order_ids))
+    changed = {}
+    changes = Counter()
+    for source, targets in ALLOWED_TRANSITIONS.items():
+        if target not in targets:
+            continue
+        stmt = (
+            update(MaintenanceOrder)
+            .where(MaintenanceOrder.id.in_(order_ids), MaintenanceOrder.status == source)
+            .values(status=target, version_id=MaintenanceOrder.version_id + 1)
+            .returning(MaintenanceOrder.id)
+            .execution_options(synchronize_session=False)
+        )
+        ids = db.scalars(stmt).all()
+        changed.update(dict.fromkeys(ids, source))
+        changes[(source, target)] += len(ids)
+    record_order_stats(db, status_change_deltas(changes))
+    db.commit()
+    publish_status_changes(
+        (order_id, changed[order_id].value, target.value) for order_id in order_ids if order_id in changed
+    )
+
+    unchanged = [order_id for order_id in order_ids if order_id not in changed]
+    current = {}
+    # Archived orders are closed, so they are reported as such rather than as not found
+    for model in (MaintenanceOrder, ArchivedMaintenanceOrder):
+        missing = [order_id for order_id in unchanged if order_id not in current]
+        if missing:
+            current.update(db.execute(select(model.id, model.status).where(model.id.in_(missing))).tuples().all())
+    rejected = [
+        {
+            "id": order_id,
+            "detail": f"Cannot change status from {current[order_id].value} to {target.value}"
+            if order_id in current else ORDER_NOT_FOUND,
+        }
+        for order_id in unchanged
+    ]
+    return [order_id for order_id in order_ids if order_id in changed], rejected
@@ -0,0 +1,161 @@
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.crud.maintenance import (
+    maintenance_order_filters,
+    maintenance_order_options,
+    maintenance_order_rows_stmt,
+    order_part_rows,
+)
+from app.crud.stats import order_stat_deltas, order_stats_stmt
+from app.database import is_foreign_key_violation
+from app.events import publish_orders_created
+from app.models.maintenance import ArchivedMaintenanceOrder, MaintenanceOrder, MaintenanceOrderPart
+from app.schemas.maintenance import MaintenanceOrderCreate
+
+
+async def get_maintenance_order(db: AsyncSession, order_id: int):
+    """
+    Retrieve a maintenance order by its ID, looking in the archive when it is not in
+    ``maintenance_orders``.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - order_id (int): ID of the maintenance order to retrieve.
+
+    Returns:
+    - MaintenanceOrder | ArchivedMaintenanceOrder: The retrieved maintenance order, or None
+      if it does not exist.
+    """
+    result = await db.execute(select(MaintenanceOrder).where(MaintenanceOrder.id == order_id))
+    db_order = result.scalars().first()
+    if db_order is None:
+        return await db.get(ArchivedMaintenanceOrder, order_id)
+    return db_order
+
+
+async def get_maintenance_order_version(db: AsyncSession, order_id: int) -> Optional[int]:
+    """
+    Retrieve the row version of a maintenance order from the (id, version_id) index,
+    without loading the row, to answer conditional GETs.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - order_id (int): ID of the maintenance order.
+
+    Returns:
+    - int: The ``version_id`` of the order (archived or not), or None if it does not exist.
+    """
+    version_id = await db.scalar(select(MaintenanceOrder.version_id).where(MaintenanceOrder.id == order_id))
+    if version_id is None:
+        return await db.scalar(
+            select(ArchivedMaintenanceOrder.version_id).where(ArchivedMaintenanceOrder.id == order_id)
+        )
+    return version_id
+
+
+async def get_maintenance_orders(
+    db: AsyncSession, skip: int = 0, limit: int = 10, include_vehicle: bool = False, **filters
+):
+    """
+    Retrieve a list of maintenance orders with pagination support.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - skip (int): Number of records to skip.
+    - limit (int): Maximum number of records to return.
+    - include_vehicle (bool): Also load the vehicle of every order, with one extra query for the whole page.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - List[MaintenanceOrder]: A list of maintenance orders ordered by ID.
+    """
+    result = await db.execute(
+        select(MaintenanceOrder)
+        .options(*maintenance_order_options(include_vehicle))
+        .where(*maintenance_order_filters(**filters))
+        .order_by(MaintenanceOrder.id)
+        .offset(skip)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def get_maintenance_orders_after(
+    db: AsyncSession, after_id: int = 0, limit: int = 10, include_vehicle: bool = False, **filters
+):
+    """
+    Retrieve a page of maintenance orders using keyset pagination on the primary key.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - after_id (int): Only orders with an ID greater than this one are returned.
+    - limit (int): Maximum number of records to return.
+    - include_vehicle (bool): Also load the vehicle of every order, with one extra query for the whole page.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - List[MaintenanceOrder]: A list of maintenance orders ordered by ID.
+    """
+    result = await db.execute(
+        select(MaintenanceOrder)
+        .options(*maintenance_order_options(include_vehicle))
+        .where(MaintenanceOrder.id > after_id, *maintenance_order_filters(**filters))
+        .order_by(MaintenanceOrder.id)
+        .limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def get_maintenance_order_rows(
+    db: AsyncSession, skip: int = 0, limit: int = 10, after_id: Optional[int] = None, **filters
+):
+    """
+    Retrieve a page of maintenance orders as plain rows, for the fast serialization path.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - skip (int): Number of records to skip (offset pagination).
+    - limit (int): Maximum number of records to return.
+    - after_id (int): Start after this ID (keyset pagination); overrides ``skip``.
+    - **filters: ``status``, ``vehicle_id``, ``service_type`` and ``part``, see maintenance_order_filters.
+
+    Returns:
+    - List[Mapping]: The maintenance orders as plain rows.
+    """
+    result = await db.execute(maintenance_order_rows_stmt(skip=skip, limit=limit, after_id=after_id, **filters))
+    return result.mappings().all()
+
+
+async def create_maintenance_order(db: AsyncSession, order: MaintenanceOrderCreate):
+    """
+    Create a new maintenance order with a single INSERT ... RETURNING, then index its parts
+    and update the order counters in the same transaction.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - order (MaintenanceOrderCreate): Details of the maintenance order to create.
+
+    Returns:
+    - MaintenanceOrder: The created maintenance order, or None if the vehicle does not exist.
+    """
+    values = order.dict()
+    try:
+        result = await db.scalars(insert(MaintenanceOrder).values(**values).returning(MaintenanceOrder))
+        db_order = result.one()
+    except IntegrityError as e:
+        await db.rollback()
+        if is_foreign_key_violation(e):
+            return None
+        raise
+    part_rows = order_part_rows(db_order.id, order.mechanical_parts)
+    if part_rows:
+        await db.execute(insert(MaintenanceOrderPart), part_rows)
+    stats_stmt = order_stats_stmt(db, order_stat_deltas([values]))
+    if stats_stmt is not None:
+        await db.execute(stats_stmt)
+    await db.commit()
+    publish_orders_created([db_order])
+    return db_order
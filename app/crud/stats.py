@@ -0,0 +1,176 @@
+from collections import Counter
+
+from sqlalchemy import delete, func, insert, select, text, union_all
+from sqlalchemy.orm import Session
+
+from app.database import upsert_insert
+from app.models.maintenance import (
+    ArchivedMaintenanceOrder,
+    MaintenanceOrder,
+    MaintenanceOrderStat,
+    MaintenanceOrderStatus,
+)
+
+# Kinds of counters kept in maintenance_order_stats
+STATUS = "status"
+SERVICE_TYPE = "service_type"
+
+
+def status_key(status) -> str:
+    """
+    Return the value stored in the counters for a status (an enum member or its value).
+    """
+    return MaintenanceOrderStatus(status).value
+
+
+def order_stat_deltas(orders) -> Counter:
+    """
+    Count new maintenance orders per status and per service type.
+
+    Args:
+    - orders (List[dict]): Column values of the new orders (``status`` and ``service_type``).
+
+    Returns:
+    - Counter: Increments keyed by (kind, value).
+    """
+    deltas = Counter()
+    for order in orders:
+        deltas[(STATUS, status_key(order["status"]))] += 1
+        deltas[(SERVICE_TYPE, order["service_type"])] += 1
+    return deltas
+
+
+def status_change_deltas(changes) -> Counter:
+    """
+    Count the counter updates of orders moving from one status to another.
+
+    Args:
+    - changes (Dict[Tuple[status, status], int]): Number of orders per (old status, new status).
+
+    Returns:
+    - Counter: Increments (and decrements) keyed by (kind, value).
+    """
+    deltas = Counter()
+    for (old, new), count in changes.items():
+        deltas[(STATUS, status_key(old))] -= count
+        deltas[(STATUS, status_key(new))] += count
+    return deltas
+
+
+def order_stats_stmt(db, deltas: Counter):
+    """
+    Build the statement that applies increments to the counters.
+
+    It is a single INSERT ... ON CONFLICT DO UPDATE over every changed counter, with the
+    counters sorted so concurrent transactions lock their rows in the same order.
+
+    Args:
+    - db (Session | AsyncSession): Database session, used to pick the dialect.
+    - deltas (Counter): Increments keyed by (kind, value), as built by order_stat_deltas.
+
+    Returns:
+    - Insert: The statement, or None when there is nothing to apply or the dialect has no
+      ON CONFLICT (the counters are then only refreshed by rebuild_order_stats).
+    """
+    rows = [
+        {"kind": kind, "value": value, "count": count}
+        for (kind, value), count in sorted(deltas.items())
+        if count and value is not None
+    ]
+    stmt = upsert_insert(db, MaintenanceOrderStat)
+    if not rows or stmt is None:
+        return None
+    stmt = stmt.values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MaintenanceOrderStat.kind, MaintenanceOrderStat.value],
+        set_={"count": MaintenanceOrderStat.count + stmt.excluded.count},
+    )
+
+
+def record_order_stats(db: Session, deltas: Counter):
+    """
+    Apply increments to the counters in the current transaction; the caller commits.
+
+    Args:
+    - db (Session): Database session dependency.
+    - deltas (Counter): Increments keyed by (kind, value).
+    """
+    stmt = order_stats_stmt(db, deltas)
+    if stmt is not None:
+        db.execute(stmt)
+
+
+def build_order_stats(rows) -> dict:
+    """
+    Build the payload of MaintenanceOrderStats from the counter rows.
+
+    Args:
+    - rows (List[Tuple[str, str, int]]): (kind, value, count) rows.
+
+    Returns:
+    - dict: ``total``, ``by_status`` (every status, 0 when unused) and ``by_service_type``.
+    """
+    by_status = {status.value: 0 for status in MaintenanceOrderStatus}
+    by_service_type = {}
+    for kind, value, count in rows:
+        if kind == STATUS:
+            by_status[value] = count
+        elif kind == SERVICE_TYPE and count:
+            by_service_type[value] = count
+    return {
+        "total": sum(by_status.values()),
+        "by_status": by_status,
+        "by_service_type": dict(sorted(by_service_type.items())),
+    }
+
+
+def get_order_stats(db: Session) -> dict:
+    """
+    Read the counters of maintenance orders per status and per service type.
+
+    The cost depends on the number of statuses and service types, not on the number of orders.
+
+    Args:
+    - db (Session): Database session dependency.
+
+    Returns:
+    - dict: The payload of MaintenanceOrderStats.
+    """
+    rows = db.execute(
+        select(MaintenanceOrderStat.kind, MaintenanceOrderStat.value, MaintenanceOrderStat.count)
+    ).all()
+    return build_order_stats(rows)
+
+
+def rebuild_order_stats(db: Session) -> dict:
+    """
+    Recompute every counter from the maintenance orders, archived ones included, in one transaction.
+
+    On Postgres the counters are locked first, so orders created meanwhile wait and then
+    add themselves to the rebuilt counters instead of being lost or counted twice.
+
+    Args:
+    - db (Session): Database session dependency.
+
+    Returns:
+    - dict: The rebuilt payload of MaintenanceOrderStats.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("LOCK TABLE maintenance_order_stats IN EXCLUSIVE MODE"))
+    db.execute(delete(MaintenanceOrderStat))
+    orders = union_all(
+        *(select(model.status, model.service_type) for model in (MaintenanceOrder, ArchivedMaintenanceOrder))
+    ).subquery()
+    rows = []
+    for status, count in db.execute(select(orders.c.status, func.count()).group_by(orders.c.status)):
+        rows.append({"kind": STATUS, "value": status_key(status), "count": count})
+    for service_type, count in db.execute(
+        select(orders.c.service_type, func.count())
+        .where(orders.c.service_type.is_not(None))
+        .group_by(orders.c.service_type)
+    ):
+        rows.append({"kind": SERVICE_TYPE, "value": service_type, "count": count})
+    if rows:
+        db.execute(insert(MaintenanceOrderStat), rows)
+    db.commit()
+    return build_order_stats([(row["kind"], row["value"], row["count"]) for row in rows])
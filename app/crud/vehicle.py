@@ -1,6 +1,54 @@
-from sqlalchemy.orm import Session
+from operator import attrgetter
+from typing import List, Optional
+
+from sqlalchemy import insert, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, selectinload
+from app.cache import TTLCache
+from app.crud.maintenance import maintenance_order_filters
+from app.config import VEHICLE_CACHE_ENABLED, VEHICLE_CACHE_MAXSIZE, VEHICLE_CACHE_TTL
+from app.database import upsert_insert
+from app.models.maintenance import ArchivedMaintenanceOrder
 from app.models.vehicle import Vehicle as VehicleModel, Vehicle
-from app.schemas.vehicle import VehicleCreate
+from app.schemas.maintenance import MaintenanceOrder, VehicleMaintenanceHistory
+from app.schemas.vehicle import VehicleCreate, VehicleSnapshot
+
+# Columns written by the vehicle export, in order
+EXPORT_COLUMNS = ["id", "license_plate", "model", "year", "owner_id"]
+
+# Read-through cache for vehicle lookups, keyed by ("id", id) and ("plate", license_plate).
+# Only vehicles that exist are cached, as read-only schema snapshots detached from any session.
+vehicle_cache = TTLCache(maxsize=VEHICLE_CACHE_MAXSIZE, ttl=VEHICLE_CACHE_TTL) if VEHICLE_CACHE_ENABLED else None
+
+
+def cache_vehicle(db_vehicle):
+    """
+    Store a vehicle in the lookup cache under both of its keys.
+
+    Args:
+    - db_vehicle (VehicleModel): The vehicle loaded from the database, or None.
+
+    Returns:
+    - VehicleSnapshot: The cached snapshot, or None when no vehicle was given.
+    """
+    if db_vehicle is None:
+        return None
+    snapshot = VehicleSnapshot.model_validate(db_vehicle, from_attributes=True)
+    vehicle_cache.set(("id", snapshot.id), snapshot)
+    vehicle_cache.set(("plate", snapshot.license_plate), snapshot)
+    return snapshot
+
+
+def invalidate_vehicle(vehicle_id=None, license_plate=None):
+    """
+    Drop the cached lookups of a vehicle after it is written.
+
+    Args:
+    - vehicle_id (int): ID of the vehicle.
+    - license_plate (str): License plate of the vehicle.
+    """
+    if vehicle_cache is not None:
+        vehicle_cache.delete(("id", vehicle_id), ("plate", license_plate))
 
 
 def get_vehicle(db: Session, vehicle_id: int):
@@ -12,9 +60,73 @@ def get_vehicle(db: Session, vehicle_id: int):
     - vehicle_id (int): ID of the vehicle to retrieve.
 
     Returns:
-    - VehicleModel: The retrieved vehicle.
+    - VehicleModel: The retrieved vehicle; a read-only snapshot when the cache is enabled.
+    """
+    if vehicle_cache is None:
+        return db.query(VehicleModel).filter(VehicleModel.id == vehicle_id).first()
+    cached = vehicle_cache.get(("id", vehicle_id))
+    if cached is not None:
+        return cached
+    return cache_vehicle(db.query(VehicleModel).filter(VehicleModel.id == vehicle_id).first())
+
+
+def get_vehicle_version(db: Session, vehicle_id: int) -> Optional[int]:
     """
-    return db.query(VehicleModel).filter(VehicleModel.id == vehicle_id).first()
+    Retrieve the row version of a vehicle, to answer conditional GETs.
+
+    The version is read from the cached snapshot when there is one, otherwise from the
+    (id, version_id) index without loading the row.
+
+    Args:
+    - db (Session): Database session dependency.
+    - vehicle_id (int): ID of the vehicle.
+
+    Returns:
+    - int: The ``version_id`` of the vehicle, or None if it does not exist.
+    """
+    if vehicle_cache is not None:
+        cached = vehicle_cache.get(("id", vehicle_id))
+        if cached is not None:
+            return cached.version_id
+    return db.scalar(select(VehicleModel.version_id).where(VehicleModel.id == vehicle_id))
+
+
+def get_vehicle_with_maintenance_orders(db: Session, vehicle_id: int, **filters):
+    """
+    Retrieve a vehicle together with its maintenance history, archived orders included.
+
+    The active orders are loaded with ``selectinload`` and the archived ones with one more
+    query on the same filters, so the lookup takes three queries however many orders the
+    vehicle has. It bypasses the lookup cache, which only holds vehicles.
+
+    Args:
+    - db (Session): Database session dependency.
+    - vehicle_id (int): ID of the vehicle to retrieve.
+    - **filters: ``status`` and ``service_type`` of the orders, see maintenance_order_filters.
+
+    Returns:
+    - VehicleMaintenanceHistory: The vehicle with its orders ordered by ID, or None if it
+      does not exist.
+    """
+    orders = VehicleModel.maintenance_orders.and_(*maintenance_order_filters(**filters))
+    db_vehicle = (
+        db.query(VehicleModel)
+        .options(selectinload(orders))
+        .filter(VehicleModel.id == vehicle_id)
+        .first()
+    )
+    if db_vehicle is None:
+        return None
+    archived = db.scalars(
+        select(ArchivedMaintenanceOrder)
+        .where(*maintenance_order_filters(vehicle_id=vehicle_id, model=ArchivedMaintenanceOrder, **filters))
+        .order_by(ArchivedMaintenanceOrder.id)
+    )
+    history = VehicleMaintenanceHistory.model_validate(db_vehicle)
+    history.maintenance_orders = sorted(
+        [*history.maintenance_orders, *map(MaintenanceOrder.model_validate, archived)], key=attrgetter("id")
+    )
+    return history
 
 
 def get_vehicles(db: Session, skip: int = 0, limit: int = 10):
@@ -32,6 +144,82 @@ def get_vehicles(db: Session, skip: int = 0, limit: int = 10):
     return db.query(VehicleModel).offset(skip).limit(limit).all()
 
 
+def get_vehicles_after(db: Session, after_id: int = 0, limit: int = 10):
+    """
+    Retrieve a page of vehicles using keyset pagination on the primary key.
+
+    Unlike offset pagination, the cost of a page does not depend on how deep it is.
+
+    Args:
+    - db (Session): Database session dependency.
+    - after_id (int): Only vehicles with an ID greater than this one are returned.
+    - limit (int): Maximum number of records to return.
+
+    Returns:
+    - List[VehicleModel]: A list of vehicles ordered by ID.
+    """
+    return (
+        db.query(VehicleModel)
+        .filter(VehicleModel.id > after_id)
+        .order_by(VehicleModel.id)
+        .limit(limit)
+        .all()
+    )
+
+
+def vehicle_rows_stmt(skip: int = 0, limit: int = 10, after_id: Optional[int] = None):
+    """
+    Build the SELECT of the vehicle listing over plain columns, without ORM entities.
+
+    Args:
+    - skip (int): Number of records to skip (offset pagination).
+    - limit (int): Maximum number of records to return.
+    - after_id (int): Start after this ID (keyset pagination); overrides ``skip``.
+
+    Returns:
+    - Select: The statement, returning the columns in EXPORT_COLUMNS.
+    """
+    stmt = select(*[getattr(VehicleModel, column) for column in EXPORT_COLUMNS])
+    if after_id is not None:
+        return stmt.where(VehicleModel.id > after_id).order_by(VehicleModel.id).limit(limit)
+    return stmt.offset(skip).limit(limit)
+
+
+def get_vehicle_rows(db: Session, skip: int = 0, limit: int = 10, after_id: Optional[int] = None):
+    """
+    Retrieve a page of vehicles as plain rows, for the fast serialization path.
+
+    Args:
+    - db (Session): Database session dependency.
+    - skip (int): Number of records to skip (offset pagination).
+    - limit (int): Maximum number of records to return.
+    - after_id (int): Start after this ID (keyset pagination); overrides ``skip``.
+
+    Returns:
+    - List[Mapping]: The vehicles, with the keys in EXPORT_COLUMNS.
+    """
+    return db.execute(vehicle_rows_stmt(skip=skip, limit=limit, after_id=after_id)).mappings().all()
+
+
+def iter_vehicles(db: Session, batch_size: int = 1000):
+    """
+    Stream all vehicles ordered by ID without loading the whole table.
+
+    Rows are fetched through a server-side cursor (on Postgres) ``batch_size`` at a time
+    and are returned as plain mappings, so no ORM objects are kept in the session.
+
+    Args:
+    - db (Session): Database session; it must stay open while the rows are consumed.
+    - batch_size (int): Number of rows fetched per round trip.
+
+    Returns:
+    - Iterator[Mapping]: The vehicles, with the keys in EXPORT_COLUMNS.
+    """
+    stmt = select(*[getattr(VehicleModel, column) for column in EXPORT_COLUMNS]).order_by(VehicleModel.id)
+    result = db.execute(stmt, execution_options={"stream_results": True, "yield_per": batch_size})
+    yield from result.mappings()
+
+
 def get_vehicle_by_license_plate(db: Session, license_plate: str):
     """
     Retrieve a vehicle by its license plate.
@@ -41,24 +229,123 @@ def get_vehicle_by_license_plate(db: Session, license_plate: str):
     - license_plate (str): License plate of the vehicle to retrieve.
 
     Returns:
-    - Vehicle: The retrieved vehicle.
+    - Vehicle: The retrieved vehicle; a read-only snapshot when the cache is enabled.
+    """
+    if vehicle_cache is None:
+        return db.query(Vehicle).filter(Vehicle.license_plate == license_plate).first()
+    cached = vehicle_cache.get(("plate", license_plate))
+    if cached is not None:
+        return cached
+    return cache_vehicle(db.query(Vehicle).filter(Vehicle.license_plate == license_plate).first())
+
+
+def vehicle_insert(db, values):
     """
-    return db.query(Vehicle).filter(Vehicle.license_plate == license_plate).first()
+    Build the INSERT for new vehicles that skips those whose license plate is taken.
+
+    Dialects without ON CONFLICT get a plain INSERT and report duplicates through
+    IntegrityError instead.
+
+    Args:
+    - db (Session | AsyncSession): Database session.
+    - values (dict | List[dict]): Column values of one vehicle, or of many for a multi-row INSERT.
+    """
+    stmt = upsert_insert(db, VehicleModel)
+    if stmt is None:
+        return insert(VehicleModel).values(values)
+    return stmt.values(values).on_conflict_do_nothing(index_elements=[VehicleModel.license_plate])
 
 
 def create_vehicle(db: Session, vehicle: VehicleCreate):
     """
     Create a new vehicle.
 
+    The vehicle is written with a single INSERT ... ON CONFLICT DO NOTHING RETURNING, so
+    the unique constraint on the license plate detects duplicates without a prior lookup,
+    also under concurrent requests.
+
     Args:
     - db (Session): Database session dependency.
     - vehicle (VehicleCreate): Details of the vehicle to create.
 
     Returns:
-    - VehicleModel: The created vehicle.
+    - VehicleModel: The created vehicle, or None if the license plate is already registered.
     """
-    db_vehicle = VehicleModel(**vehicle.dict())
-    db.add(db_vehicle)
+    try:
+        db_vehicle = db.scalars(vehicle_insert(db, vehicle.dict()).returning(VehicleModel)).first()
+    except IntegrityError:
+        db_vehicle = None
+    if db_vehicle is None:
+        db.rollback()
+        return None
+    # Detached before committing, so the returned values are not expired and reloaded
+    db.expunge(db_vehicle)
     db.commit()
-    db.refresh(db_vehicle)
+    invalidate_vehicle(db_vehicle.id, db_vehicle.license_plate)
     return db_vehicle
+
+
+def create_vehicles(db: Session, vehicles: List[VehicleCreate]):
+    """
+    Create many vehicles in a single transaction.
+
+    Plates already registered are resolved with one set-based query and the remaining
+    vehicles are written with a multi-row INSERT ... ON CONFLICT DO NOTHING RETURNING, so
+    the number of round trips does not grow with the size of the batch. A plate
+    registered by a concurrent request after the query is skipped by the INSERT and
+    reported like the others.
+
+    Args:
+    - db (Session): Database session dependency.
+    - vehicles (List[VehicleCreate]): Details of the vehicles to create.
+
+    Returns:
+    - List[dict]: One result per vehicle, in request order, with the created ``id`` or
+      the ``detail`` of why it was rejected.
+    """
+    plates = {vehicle.license_plate for vehicle in vehicles}
+    registered = set(
+        db.scalars(select(VehicleModel.license_plate).where(VehicleModel.license_plate.in_(plates)))
+    )
+
+    results = []
+    pending = []
+    seen = set()
+    for index, vehicle in enumerate(vehicles):
+        if vehicle.license_plate in registered:
+            results.append({"index": index, "status": "error", "detail": "Vehicle already registered"})
+        elif vehicle.license_plate in seen:
+            results.append({"index": index, "status": "error", "detail": "Duplicate license plate in request"})
+        else:
+            seen.add(vehicle.license_plate)
+            result = {"index": index, "status": "created"}
+            results.append(result)
+            pending.append((result, vehicle.dict()))
+
+    created = {}
+    if pending:
+        rows = [values for _, values in pending]
+        try:
+            stmt = vehicle_insert(db, rows).returning(VehicleModel.license_plate, VehicleModel.id)
+            created = dict(db.execute(stmt).tuples().all())
+        except IntegrityError:
+            # Dialects without ON CONFLICT fail the whole INSERT on a plate registered
+            # concurrently, so the vehicles are written one by one, each in a savepoint
+            db.rollback()
+            for values in rows:
+                try:
+                    with db.begin_nested():
+                        created[values["license_plate"]] = db.scalar(
+                            insert(VehicleModel).values(**values).returning(VehicleModel.id)
+                        )
+                except IntegrityError:
+                    pass
+        for result, values in pending:
+            if values["license_plate"] in created:
+                result["id"] = created[values["license_plate"]]
+            else:
+                result.update(status="error", detail="Vehicle already registered")
+    db.commit()
+    for plate, vehicle_id in created.items():
+        invalidate_vehicle(vehicle_id, plate)
+    return results
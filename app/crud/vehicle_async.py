@@ -0,0 +1,141 @@
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.crud.vehicle import cache_vehicle, invalidate_vehicle, vehicle_cache, vehicle_insert, vehicle_rows_stmt
+from app.models.vehicle import Vehicle as VehicleModel
+from app.schemas.vehicle import VehicleCreate
+
+
+async def get_vehicle(db: AsyncSession, vehicle_id: int):
+    """
+    Retrieve a vehicle by its ID.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - vehicle_id (int): ID of the vehicle to retrieve.
+
+    Returns:
+    - VehicleModel: The retrieved vehicle; a read-only snapshot when the cache is enabled.
+    """
+    if vehicle_cache is not None:
+        cached = vehicle_cache.get(("id", vehicle_id))
+        if cached is not None:
+            return cached
+    result = await db.execute(select(VehicleModel).where(VehicleModel.id == vehicle_id))
+    db_vehicle = result.scalars().first()
+    return db_vehicle if vehicle_cache is None else cache_vehicle(db_vehicle)
+
+
+async def get_vehicle_version(db: AsyncSession, vehicle_id: int) -> Optional[int]:
+    """
+    Retrieve the row version of a vehicle, to answer conditional GETs.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - vehicle_id (int): ID of the vehicle.
+
+    Returns:
+    - int: The ``version_id`` of the vehicle, or None if it does not exist.
+    """
+    if vehicle_cache is not None:
+        cached = vehicle_cache.get(("id", vehicle_id))
+        if cached is not None:
+            return cached.version_id
+    return await db.scalar(select(VehicleModel.version_id).where(VehicleModel.id == vehicle_id))
+
+
+async def get_vehicles(db: AsyncSession, skip: int = 0, limit: int = 10):
+    """
+    Retrieve a list of vehicles with pagination support.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - skip (int): Number of records to skip.
+    - limit (int): Maximum number of records to return.
+
+    Returns:
+    - List[VehicleModel]: A list of vehicles.
+    """
+    result = await db.execute(select(VehicleModel).offset(skip).limit(limit))
+    return result.scalars().all()
+
+
+async def get_vehicles_after(db: AsyncSession, after_id: int = 0, limit: int = 10):
+    """
+    Retrieve a page of vehicles using keyset pagination on the primary key.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - after_id (int): Only vehicles with an ID greater than this one are returned.
+    - limit (int): Maximum number of records to return.
+
+    Returns:
+    - List[VehicleModel]: A list of vehicles ordered by ID.
+    """
+    result = await db.execute(
+        select(VehicleModel).where(VehicleModel.id > after_id).order_by(VehicleModel.id).limit(limit)
+    )
+    return result.scalars().all()
+
+
+async def get_vehicle_rows(db: AsyncSession, skip: int = 0, limit: int = 10, after_id: Optional[int] = None):
+    """
+    Retrieve a page of vehicles as plain rows, for the fast serialization path.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - skip (int): Number of records to skip (offset pagination).
+    - limit (int): Maximum number of records to return.
+    - after_id (int): Start after this ID (keyset pagination); overrides ``skip``.
+
+    Returns:
+    - List[Mapping]: The vehicles as plain rows.
+    """
+    result = await db.execute(vehicle_rows_stmt(skip=skip, limit=limit, after_id=after_id))
+    return result.mappings().all()
+
+
+async def get_vehicle_by_license_plate(db: AsyncSession, license_plate: str):
+    """
+    Retrieve a vehicle by its license plate.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - license_plate (str): License plate of the vehicle to retrieve.
+
+    Returns:
+    - VehicleModel: The retrieved vehicle; a read-only snapshot when the cache is enabled.
+    """
+    if vehicle_cache is not None:
+        cached = vehicle_cache.get(("plate", license_plate))
+        if cached is not None:
+            return cached
+    result = await db.execute(select(VehicleModel).where(VehicleModel.license_plate == license_plate))
+    db_vehicle = result.scalars().first()
+    return db_vehicle if vehicle_cache is None else cache_vehicle(db_vehicle)
+
+
+async def create_vehicle(db: AsyncSession, vehicle: VehicleCreate):
+    """
+    Create a new vehicle with a single INSERT ... ON CONFLICT DO NOTHING RETURNING.
+
+    Args:
+    - db (AsyncSession): Async database session dependency.
+    - vehicle (VehicleCreate): Details of the vehicle to create.
+
+    Returns:
+    - VehicleModel: The created vehicle, or None if the license plate is already registered.
+    """
+    try:
+        result = await db.scalars(vehicle_insert(db, vehicle.dict()).returning(VehicleModel))
+        db_vehicle = result.first()
+    except IntegrityError:
+        db_vehicle = None
+    if db_vehicle is None:
+        await db.rollback()
+        return None
+    await db.commit()
+    invalidate_vehicle(db_vehicle.id, db_vehicle.license_plate)
+    return db_vehicle
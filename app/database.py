@@ -1,10 +1,346 @@
-from sqlalchemy import create_engine
+import sqlite3
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 
-from app.config import DATABASE_URL
+from app.config import (
+    DATABASE_URL,
+    DATABASE_ASYNC,
+    ASYNC_DATABASE_URL,
+    DATABASE_REPLICA_URLS,
+    ASYNC_DATABASE_REPLICA_URLS,
+    REPLICA_EJECT_SECONDS,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_POOL_USE_LIFO,
+    DB_STATEMENT_TIMEOUT_MS,
+    DB_STATEMENT_TIMEOUTS,
+    SLOW_QUERY_THRESHOLD_MS,
+    SLOW_QUERY_EXPLAIN,
+    SLOW_QUERY_LOG_PARAMETERS,
+)
+from app.metrics import current_route, instrument_queries
+from app.pool import InstrumentedAsyncQueuePool, InstrumentedQueuePool, instrument_engine
+from app.replicas import ReplicaPool
+from app.slow_queries import instrument_slow_queries
+
+# SQLite virtual machine instructions between two checks of a statement's deadline
+SQLITE_PROGRESS_STEPS = 1000
+
+# Async driver used for each backend when DATABASE_ASYNC is enabled
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url):
+    """
+    Translate a sync database URL into its async driver equivalent.
+
+    Args:
+    - url (str | URL): Database URL using a sync driver (psycopg2, pysqlite).
+
+    Returns:
+    - URL: The same URL using asyncpg (Postgres) or aiosqlite (SQLite).
+    """
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend '{backend}'")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+
+def pool_options(url, use_async: bool = False) -> dict:
+    """
+    Build the connection pool arguments of create_engine from the configuration.
+
+    SQLite keeps SQLAlchemy's default pool when it cannot be sized: in-memory databases
+    share a single connection, and aiosqlite opens a connection (and a worker thread) per
+    checkout, which must not outlive the event loop that created it.
+
+    Args:
+    - url (str | URL): Database URL of the engine.
+    - use_async (bool): Whether the engine is created with create_async_engine.
+
+    Returns:
+    - dict: Keyword arguments for create_engine / create_async_engine.
+    """
+    url = make_url(url)
+    if url.get_backend_name() == "sqlite" and (use_async or url.database in (None, "", ":memory:")):
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if use_async else InstrumentedQueuePool,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_use_lifo": DB_POOL_USE_LIFO,
+    }
+
+
+def enable_sqlite_foreign_keys(sync_engine):
+    """
+    Make SQLite enforce foreign keys (off by default) on every new connection, so the
+    constraints declared in the models behave as they do on Postgres.
+    """
+    if sync_engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(sync_engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+class StatementTimeouts:
+    """
+    Limit how long each SQL statement run during a request may take, so one runaway query
+    cannot keep a pooled connection busy indefinitely.
+
+    Postgres gets ``SET LOCAL statement_timeout`` at the start of each transaction; SQLite
+    statements are interrupted from a progress handler (pysqlite only, aiosqlite runs them
+    in its own thread). Statements run outside requests (CLI, migrations, startup) are not
+    limited.
+
+    Attributes:
+    - default_ms (int): Timeout of the routes without their own, 0 for none.
+    - by_route (dict): Timeouts by "METHOD /route/template", 0 for none.
+    """
+
+    def __init__(self, default_ms: int = 0, by_route: Optional[dict] = None):
+        self.default_ms = default_ms
+        self.by_route = by_route or {}
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.default_ms or any(self.by_route.values()))
+
+    def timeout_ms(self) -> Optional[int]:
+        """
+        Return the timeout of the request being served, or None when it has none.
+        """
+        route = current_route()
+        if route is None:
+            return None
+        return self.by_route.get(route, self.default_ms) or None
+
+    def begin(self, conn):
+        timeout_ms = self.timeout_ms()
+        if timeout_ms:
+            # A raw cursor opens the DBAPI transaction, so the setting lasts until it ends
+            cursor = conn.connection.dbapi_connection.cursor()
+            cursor.execute(f"SET LOCAL statement_timeout = {int(timeout_ms)}")
+            cursor.close()
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        driver_connection = conn.connection.driver_connection
+        if not isinstance(driver_connection, sqlite3.Connection):
+            return
+        timeout_ms = self.timeout_ms()
+        if timeout_ms:
+            deadline = time.perf_counter() + timeout_ms / 1000
+            driver_connection.set_progress_handler(lambda: time.perf_counter() > deadline, SQLITE_PROGRESS_STEPS)
+            conn.info["statement_deadline"] = deadline
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if conn.info.pop("statement_deadline", None) is not None:
+            conn.connection.driver_connection.set_progress_handler(None, 0)
+
+    def handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None:
+            self.after_cursor_execute(connection, None, None, None, None, False)
+
+    def attach(self, sync_engine):
+        if sync_engine.dialect.name == "postgresql":
+            event.listen(sync_engine, "begin", self.begin)
+        elif sync_engine.dialect.name == "sqlite":
+            event.listen(sync_engine, "before_cursor_execute", self.before_cursor_execute)
+            event.listen(sync_engine, "after_cursor_execute", self.after_cursor_execute)
+            event.listen(sync_engine, "handle_error", self.handle_error)
+
+
+def instrument_statements(sync_engine):
+    """
+    Attach the per-request SQL metrics, the slow query log and the statement timeouts, as
+    configured, to an engine.
+    """
+    instrument_queries(sync_engine)
+    if SLOW_QUERY_THRESHOLD_MS > 0:
+        instrument_slow_queries(
+            sync_engine,
+            SLOW_QUERY_THRESHOLD_MS,
+            explain=SLOW_QUERY_EXPLAIN,
+            log_parameters=SLOW_QUERY_LOG_PARAMETERS,
+        )
+    if statement_timeouts.enabled:
+        statement_timeouts.attach(sync_engine)
+
+
+statement_timeouts = StatementTimeouts(DB_STATEMENT_TIMEOUT_MS, DB_STATEMENT_TIMEOUTS)
 
-engine = create_engine(DATABASE_URL)
+engine = create_engine(DATABASE_URL, **pool_options(DATABASE_URL))
+enable_sqlite_foreign_keys(engine)
+instrument_engine(engine, "primary")
+instrument_statements(engine)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Read replicas (DATABASE_REPLICA_URLS), used by the GET handlers through read_session()
+replica_pool = ReplicaPool(
+    [create_engine(url, **pool_options(url)) for url in DATABASE_REPLICA_URLS], REPLICA_EJECT_SECONDS
+)
+for number, replica_engine in enumerate(replica_pool.engines, start=1):
+    enable_sqlite_foreign_keys(replica_engine)
+    instrument_engine(replica_engine, f"replica_{number}")
+    instrument_statements(replica_engine)
+    replica_pool.watch(replica_engine, replica_engine)
+
+
+def read_session(use_primary: bool = False):
+    """
+    Open a session for a request that only reads.
+
+    Args:
+    - use_primary (bool): Read from the primary, for a client that has just written.
+
+    Returns:
+    - Session: A session bound to the next healthy replica, or to the primary when there
+      are no replicas, none is healthy or ``use_primary`` is set.
+    """
+    replica = None if use_primary else replica_pool.choose()
+    return SessionLocal(bind=replica) if replica is not None else SessionLocal()
+
+
+# The async engine is only built when requested, so asyncpg/aiosqlite stay optional
+async_engine = None
+AsyncSessionLocal = None
+async_replica_pool = ReplicaPool([])
+if DATABASE_ASYNC:
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async_url = ASYNC_DATABASE_URL or to_async_url(DATABASE_URL)
+    async_engine = create_async_engine(async_url, **pool_options(async_url, use_async=True))
+    enable_sqlite_foreign_keys(async_engine.sync_engine)
+    instrument_engine(async_engine.sync_engine, "async")
+    instrument_statements(async_engine.sync_engine)
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+    async_replica_urls = ASYNC_DATABASE_REPLICA_URLS or [to_async_url(url) for url in DATABASE_REPLICA_URLS]
+    async_replica_pool = ReplicaPool(
+        [create_async_engine(url, **pool_options(url, use_async=True)) for url in async_replica_urls],
+        REPLICA_EJECT_SECONDS,
+    )
+    for number, replica_engine in enumerate(async_replica_pool.engines, start=1):
+        enable_sqlite_foreign_keys(replica_engine.sync_engine)
+        instrument_engine(replica_engine.sync_engine, f"async_replica_{number}")
+        instrument_statements(replica_engine.sync_engine)
+        async_replica_pool.watch(replica_engine, replica_engine.sync_engine)
+
+
+def async_read_session(use_primary: bool = False):
+    """
+    Open an async session for a request that only reads; see read_session.
+    """
+    replica = None if use_primary else async_replica_pool.choose()
+    return AsyncSessionLocal(bind=replica) if replica is not None else AsyncSessionLocal()
+
+
 Base = declarative_base()
+
+
+def utcnow() -> datetime:
+    """
+    Return the current time in UTC, the time zone of every timestamp column.
+    """
+    return datetime.now(timezone.utc)
+
+
+def insert_returning_ids(db, model, rows):
+    """
+    Insert many rows with a multi-row INSERT ... RETURNING and return their IDs.
+
+    Args:
+    - db (Session): Database session.
+    - model: Mapped class to insert into; it must have an autoincrement ``id``.
+    - rows (List[dict]): Column values of each row.
+
+    Returns:
+    - List[int]: The IDs of the new rows, in the same order as ``rows``.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return db.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+    # SQLAlchemy falls back to one statement per row when asked to sort on SQLite; rowids
+    # are assigned in VALUES order within one statement, so sorting them is enough
+    return sorted(db.scalars(insert(model).returning(model.id), rows).all())
+
+
+def insert_returning(db, model, rows):
+    """
+    Insert many rows with a multi-row INSERT ... RETURNING and return them as objects.
+
+    Args:
+    - db (Session): Database session.
+    - model: Mapped class to insert into; it must have an autoincrement ``id``.
+    - rows (List[dict]): Column values of each row.
+
+    Returns:
+    - List: The new objects, with their server defaults, in the same order as ``rows``.
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        return db.scalars(insert(model).returning(model, sort_by_parameter_order=True), rows).all()
+    # Same as insert_returning_ids: rowids follow the VALUES order on SQLite
+    return sorted(db.scalars(insert(model).returning(model), rows).all(), key=lambda obj: obj.id)
+
+
+def upsert_insert(db, model):
+    """
+    Build an INSERT for ``model`` that supports ``on_conflict_do_nothing`` and
+    ``on_conflict_do_update`` on the session's dialect.
+
+    Args:
+    - db (Session | AsyncSession): Database session.
+    - model: Mapped class to insert into.
+
+    Returns:
+    - Insert: The dialect-specific INSERT, or None when the dialect has no ON CONFLICT.
+    """
+    # Imported here so only the dialect in use is loaded
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert(model)
+
+
+def is_foreign_key_violation(error) -> bool:
+    """
+    Tell whether an IntegrityError was raised by a foreign key constraint.
+    """
+    orig = getattr(error, "orig", error)
+    if getattr(orig, "pgcode", None) == "23503" or getattr(orig, "sqlstate", None) == "23503":
+        return True
+    return "FOREIGN KEY constraint failed" in str(orig)
+
+
+def is_statement_timeout(error) -> bool:
+    """
+    Tell whether a database error was raised by a statement timeout (see StatementTimeouts).
+    """
+    orig = getattr(error, "orig", error)
+    if getattr(orig, "pgcode", None) == "57014" or getattr(orig, "sqlstate", None) == "57014":
+        return True
+    return isinstance(orig, sqlite3.OperationalError) and str(orig) == "interrupted"
@@ -0,0 +1,119 @@
+import hashlib
+from typing import Optional
+
+from starlette.datastructures import Headers
+from starlette.responses import Response
+
+
+def resource_etag(version_id: int) -> str:
+    """
+    Build the strong ETag of a single resource from its row version.
+
+    Args:
+    - version_id (int): ``version_id`` of the vehicle or maintenance order.
+
+    Returns:
+    - str: The quoted entity tag.
+    """
+    return f'"v{version_id}"'
+
+
+def weak_etag(body: bytes) -> str:
+    """
+    Build a weak ETag from the bytes of a response body.
+    """
+    return f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Tell whether an If-None-Match header matches an ETag, using the weak comparison
+    that RFC 9110 prescribes for it.
+
+    Args:
+    - if_none_match (str): Value of the If-None-Match header, or None when absent.
+    - etag (str): Current ETag of the resource.
+
+    Returns:
+    - bool: True when the client's copy is current and a 304 can be sent.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
+
+def not_modified(etag: str) -> Response:
+    """
+    Build the 304 Not Modified response for a resource whose ETag matched.
+    """
+    return Response(status_code=304, headers={"ETag": etag})
+
+
+def version_not_modified(if_none_match: Optional[str], version_id: Optional[int]) -> Optional[Response]:
+    """
+    Answer a conditional GET of a single resource from its row version alone.
+
+    Args:
+    - if_none_match (str): Value of the If-None-Match header.
+    - version_id (int): Current ``version_id`` of the resource, None when it does not exist.
+
+    Returns:
+    - Response: 304 Not Modified when the client's copy is current, otherwise None.
+    """
+    if version_id is not None and etag_matches(if_none_match, resource_etag(version_id)):
+        return not_modified(resource_etag(version_id))
+    return None
+
+
+class WeakETagMiddleware:
+    """
+    Pure ASGI middleware adding a weak ETag, computed from the body, to the successful GET
+    responses that have none (the listings), and answering ``If-None-Match`` with 304.
+
+    The listing is still queried and serialized, but an unchanged page is not sent again.
+    Streamed responses (without Content-Length, like the exports) are passed through.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+        chunks = []
+
+        async def send_with_etag(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message["headers"])
+                if message["status"] == 200 and "etag" not in headers and "content-length" in headers:
+                    start = message
+                    return
+            elif start is not None and message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+                if message.get("more_body", False):
+                    return
+                await send_buffered(start, b"".join(chunks))
+                return
+            await send(message)
+
+        async def send_buffered(start, body):
+            etag = weak_etag(body)
+            if etag_matches(Headers(scope=scope).get("if-none-match"), etag):
+                headers = [
+                    (name, value) for name, value in start["headers"]
+                    if name.lower() not in (b"content-length", b"content-type")
+                ]
+                await send({**start, "status": 304, "headers": [*headers, (b"etag", etag.encode())]})
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send({**start, "headers": [*start["headers"], (b"etag", etag.encode())]})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_with_etag)
@@ -0,0 +1,386 @@
+import asyncio
+import logging
+import queue
+import secrets
+import select
+import threading
+from collections import deque
+from typing import Iterable, List, NamedTuple, Optional, Tuple
+
+import orjson
+from sqlalchemy import text
+
+from app.config import ORDER_EVENTS_HISTORY, ORDER_EVENTS_QUEUE_SIZE
+from app.schemas.maintenance import MaintenanceOrder
+
+logger = logging.getLogger(__name__)
+
+# Largest NOTIFY payload accepted by Postgres is 8000 bytes; a bit is left for the framing
+NOTIFY_MAX_PAYLOAD = 7900
+# Event telling a subscriber that events may have been missed and the orders must be listed again
+RESET_EVENT = "reset"
+
+
+class Event(NamedTuple):
+    id: str
+    seq: int
+    type: str
+    data: dict
+
+
+class SlowConsumer(Exception):
+    """
+    Raised by ``Subscription.receive`` once a subscriber that fell behind has been dropped
+    and has received the events queued before that.
+    """
+
+
+class Subscription:
+    """
+    Bounded queue of the events delivered to one client, filled from any thread.
+
+    When the queue is full the subscriber is dropped instead of slowing down the
+    publishers or growing without bound: it still receives the events already queued and
+    then ``SlowConsumer``, so it can reconnect and resume from the last event it got.
+
+    Attributes:
+    - pending (deque): Events to send before the live ones (the replay, or a reset).
+    - dropped (bool): Whether the subscriber was dropped for falling behind.
+    """
+
+    def __init__(self, broker: "EventBroker", maxsize: int, pending: Iterable[Event] = ()):
+        self.broker = broker
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize)
+        self.pending = deque(pending)
+        self.dropped = False
+
+    def push(self, events: List[Event]):
+        # Called by the publishers, on any thread, with the broker lock held
+        self.loop.call_soon_threadsafe(self.put, events)
+
+    def put(self, events: List[Event]):
+        for event in events:
+            if self.dropped:
+                return
+            try:
+                self.queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped = True
+                self.broker.unsubscribe(self, slow=True)
+
+    async def receive(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """
+        Wait for the next event.
+
+        Args:
+        - timeout (float): Seconds to wait, None to wait until an event arrives.
+
+        Returns:
+        - Event: The next event, or None if none arrived within ``timeout``.
+        """
+        if self.pending:
+            return self.pending.popleft()
+        if self.dropped and self.queue.empty():
+            raise SlowConsumer()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class EventBroker:
+    """
+    In-process publish/subscribe fanout of the maintenance order changes to the streams
+    of this worker.
+
+    Every event gets an ID made of a token of this broker and a sequence number, and the
+    last ``history`` events are kept, so a client reconnecting with the ID of the last
+    event it got receives the ones it missed instead of listing every order again. When
+    that is not possible (the ID is older than the history or comes from another worker
+    or a restart), the client gets a ``reset`` event instead.
+
+    With a ``transport`` (Postgres LISTEN/NOTIFY), published events go through the
+    database and every worker delivers them to its own subscribers.
+
+    Args:
+    - history (int): Events kept for resuming.
+    - queue_size (int): Events queued per subscriber before it is dropped as too slow.
+    """
+
+    def __init__(self, history: int = 1000, queue_size: int = 100):
+        self.epoch = secrets.token_hex(4)
+        self.queue_size = queue_size
+        self.transport = None
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._history = deque(maxlen=history)
+        self._subscribers = set()
+        self.published = 0
+        self.dropped_subscribers = 0
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    def publish(self, events: List[Tuple[str, dict]]):
+        """
+        Publish ``(type, data)`` events, through the transport when there is one.
+        """
+        if not events:
+            return
+        if self.transport is not None:
+            self.transport.send(events)
+        else:
+            self.deliver(events)
+
+    def deliver(self, events: List[Tuple[str, dict]]):
+        """
+        Number the events, keep them for resuming and queue them for every subscriber.
+        """
+        with self._lock:
+            numbered = []
+            for event_type, data in events:
+                self._seq += 1
+                numbered.append(Event(self.event_id(self._seq), self._seq, event_type, data))
+            self._history.extend(numbered)
+            self.published += len(numbered)
+            for subscription in list(self._subscribers):
+                try:
+                    subscription.push(numbered)
+                except RuntimeError:
+                    # The event loop of the subscriber is closed
+                    self._subscribers.discard(subscription)
+
+    def subscribe(self, last_event_id: Optional[str] = None) -> Subscription:
+        """
+        Subscribe the current event loop to the events published from now on.
+
+        Args:
+        - last_event_id (str): ID of the last event the client received, to resume after it.
+
+        Returns:
+        - Subscription: The events missed since ``last_event_id`` (or a reset), then the new ones.
+        """
+        with self._lock:
+            subscription = Subscription(self, self.queue_size, self.missed_events(last_event_id))
+            self._subscribers.add(subscription)
+        return subscription
+
+    def missed_events(self, last_event_id: Optional[str]) -> List[Event]:
+        # Called with the lock held, so no event is published between the replay and the subscription
+        if last_event_id is None:
+            return []
+        epoch, _, seq = last_event_id.rpartition("-")
+        oldest = self._history[0].seq if self._history else self._seq + 1
+        try:
+            seq = int(seq)
+        except ValueError:
+            seq = None
+        if epoch != self.epoch or seq is None or not oldest - 1 <= seq <= self._seq:
+            return [Event(self.event_id(self._seq), self._seq, RESET_EVENT, {})]
+        return [event for event in self._history if event.seq > seq]
+
+    def unsubscribe(self, subscription: Subscription, slow: bool = False):
+        with self._lock:
+            if subscription in self._subscribers:
+                self._subscribers.discard(subscription)
+                if slow:
+                    self.dropped_subscribers += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "transport": "postgres_notify" if self.transport is not None else "in_process",
+                "subscribers": len(self._subscribers),
+                "published": self.published,
+                "dropped_subscribers": self.dropped_subscribers,
+                "history": len(self._history),
+                "last_event_id": self.event_id(self._seq),
+            }
+
+
+def notify_payloads(events: List[Tuple[str, dict]], max_size: int = NOTIFY_MAX_PAYLOAD) -> List[str]:
+    """
+    Pack events into as few NOTIFY payloads as fit in ``max_size`` bytes each.
+
+    An event too large on its own is sent as its order ID with ``reload``, and the
+    receiving workers read the order from the database.
+    """
+    payloads = []
+    items = []
+    size = 2
+    for event_type, data in events:
+        item = orjson.dumps({"type": event_type, "data": data})
+        if len(item) + 2 > max_size:
+            item = orjson.dumps({"type": event_type, "data": {"id": data["id"]}, "reload": True})
+        if items and size + len(item) + 1 > max_size:
+            payloads.append(b"[" + b",".join(items) + b"]")
+            items, size = [], 2
+        items.append(item)
+        size += len(item) + 1
+    if items:
+        payloads.append(b"[" + b",".join(items) + b"]")
+    return [payload.decode() for payload in payloads]
+
+
+class PostgresNotifyTransport:
+    """
+    Cross-worker transport of the events over Postgres LISTEN/NOTIFY.
+
+    Events are sent by a background thread, so publishing never waits for the database,
+    and a second thread holds a connection listening on ``channel`` and delivers what
+    every worker sent to the broker of this one. Both use a connection of their own,
+    detached from the pool. If the listening connection is lost, the subscribers get a
+    ``reset`` event once it is open again, as the events sent meanwhile are lost.
+
+    Args:
+    - engine (Engine): Sync engine of the Postgres database (psycopg2).
+    - broker (EventBroker): Broker the received events are delivered to.
+    - session_factory: Callable returning a new sync database session, to reload events
+      too large for a NOTIFY payload.
+    - channel (str): NOTIFY channel.
+    """
+
+    def __init__(self, engine, broker: EventBroker, session_factory, channel: str = "maintenance_order_events"):
+        if engine.dialect.name != "postgresql":
+            raise ValueError("ORDER_EVENTS_NOTIFY requires a Postgres database")
+        self.engine = engine
+        self.broker = broker
+        self.session_factory = session_factory
+        self.channel = channel
+        self._outbox = queue.SimpleQueue()
+        self._stopped = threading.Event()
+        self._threads = []
+
+    def start(self):
+        for target in (self._send_loop, self._listen_loop):
+            thread = threading.Thread(target=target, name=f"order-events-{target.__name__.strip('_')}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        self.broker.transport = self
+
+    def send(self, events: List[Tuple[str, dict]]):
+        self._outbox.put(list(events))
+
+    def close(self):
+        """
+        Send the events still queued and stop both threads.
+        """
+        self.broker.transport = None
+        self._stopped.set()
+        self._outbox.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def connect(self):
+        connection = self.engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        # Held for the life of the worker, so it does not count against the pool
+        connection.detach()
+        return connection
+
+    def _send_loop(self):
+        connection = None
+        while True:
+            events = self._outbox.get()
+            if events is None:
+                break
+            try:
+                if connection is None:
+                    connection = self.connect()
+                for payload in notify_payloads(events):
+                    connection.execute(
+                        text("SELECT pg_notify(:channel, :payload)"), {"channel": self.channel, "payload": payload}
+                    )
+            except Exception:
+                logger.exception("Sending maintenance order events failed, delivering them to this worker only")
+                self.broker.deliver(events)
+                if connection is not None:
+                    connection.close()
+                connection = None
+        if connection is not None:
+            connection.close()
+
+    def _listen_loop(self):
+        reconnected = False
+        while not self._stopped.is_set():
+            try:
+                with self.connect() as connection:
+                    connection.exec_driver_sql(f'LISTEN "{self.channel}"')
+                    if reconnected:
+                        self.broker.deliver([(RESET_EVENT, {})])
+                    driver_connection = connection.connection.driver_connection
+                    while not self._stopped.is_set():
+                        if not select.select([driver_connection], [], [], 1.0)[0]:
+                            continue
+                        driver_connection.poll()
+                        while driver_connection.notifies:
+                            self.broker.deliver(self.decode(driver_connection.notifies.pop(0).payload))
+            except Exception:
+                logger.exception("Listening to maintenance order events failed, reconnecting")
+                reconnected = True
+                self._stopped.wait(1)
+
+    def decode(self, payload: str) -> List[Tuple[str, dict]]:
+        events = []
+        for item in orjson.loads(payload):
+            data = item["data"]
+            if item.get("reload"):
+                from app.crud.maintenance import get_maintenance_order
+
+                with self.session_factory() as db:
+                    db_order = get_maintenance_order(db, data["id"])
+                    if db_order is None:
+                        continue
+                    data = order_data(db_order)
+            events.append((item["type"], data))
+        return events
+
+
+def order_data(order) -> dict:
+    return MaintenanceOrder.model_validate(order).model_dump(mode="json")
+
+
+def sse_message(event: Event) -> str:
+    return f"id: {event.id}\nevent: {event.type}\ndata: {orjson.dumps(event.data).decode()}\n\n"
+
+
+async def sse_stream(subscription: Subscription, keepalive_seconds: float, retry_ms: int = 3000):
+    """
+    Encode the events of a subscription as Server-Sent Events until the client leaves or
+    is dropped for falling behind, sending a comment every ``keepalive_seconds`` while
+    idle so proxies keep the connection open.
+    """
+    try:
+        yield f"retry: {retry_ms}\n\n"
+        while True:
+            event = await subscription.receive(keepalive_seconds)
+            yield sse_message(event) if event is not None else ": keep-alive\n\n"
+    except SlowConsumer:
+        # The client reconnects with Last-Event-ID and gets the events it missed
+        return
+    finally:
+        subscription.close()
+
+
+# Changes of the maintenance orders: "created", "status_changed" and "reset"
+order_events = EventBroker(history=ORDER_EVENTS_HISTORY, queue_size=ORDER_EVENTS_QUEUE_SIZE)
+
+
+def publish_orders_created(orders: Iterable):
+    """
+    Publish a ``created`` event per order, with the order as returned by the API.
+    """
+    order_events.publish([("created", order_data(order)) for order in orders])
+
+
+def publish_status_changes(changes: Iterable[Tuple[int, str, str]]):
+    """
+    Publish a ``status_changed`` event per ``(order ID, previous status, status)``.
+    """
+    order_events.publish([
+        ("status_changed", {"id": order_id, "previous_status": previous, "status": status})
+        for order_id, previous, status in changes
+    ])
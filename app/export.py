@@ -0,0 +1,87 @@
+import csv
+import io
+import json
+from enum import Enum
+from typing import Iterable, Iterator, List, Mapping
+
+import orjson
+
+# Rows are buffered and written out in chunks of this size
+CHUNK_ROWS = 500
+
+
+class ExportFormat(str, Enum):
+    ndjson = "ndjson"
+    csv = "csv"
+
+
+MEDIA_TYPES = {
+    ExportFormat.ndjson: "application/x-ndjson",
+    ExportFormat.csv: "text/csv",
+}
+
+
+def _csv_value(value):
+    if value is None:
+        return ""
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return value
+
+
+def iter_ndjson(rows: Iterable[Mapping]) -> Iterator[bytes]:
+    """
+    Encode rows as newline-delimited JSON, yielding one chunk every CHUNK_ROWS rows.
+
+    Args:
+    - rows (Iterable[Mapping]): Rows to encode, consumed lazily.
+
+    Returns:
+    - Iterator[bytes]: Encoded chunks.
+    """
+    chunk = []
+    for row in rows:
+        chunk.append(orjson.dumps(dict(row)))
+        if len(chunk) >= CHUNK_ROWS:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+def iter_csv(rows: Iterable[Mapping], columns: List[str]) -> Iterator[bytes]:
+    """
+    Encode rows as CSV with a header line, yielding one chunk every CHUNK_ROWS rows.
+
+    Lists (such as ``mechanical_parts``) are written as JSON arrays.
+
+    Args:
+    - rows (Iterable[Mapping]): Rows to encode, consumed lazily.
+    - columns (List[str]): Columns to write, in order.
+
+    Returns:
+    - Iterator[bytes]: Encoded chunks.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    count = 0
+    for row in rows:
+        writer.writerow([_csv_value(row[column]) for column in columns])
+        count += 1
+        if count % CHUNK_ROWS == 0:
+            yield buffer.getvalue().encode()
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode()
+
+
+def encode_rows(rows: Iterable[Mapping], columns: List[str], export_format: ExportFormat) -> Iterator[bytes]:
+    """
+    Encode rows in the requested export format.
+    """
+    if export_format == ExportFormat.csv:
+        return iter_csv(rows, columns)
+    return iter_ndjson(rows)
@@ -0,0 +1,210 @@
+import hashlib
+import logging
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+import anyio
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse, Response
+
+from app.cache import TTLCache
+from app.crud.idempotency import (
+    claim_idempotency_key,
+    get_idempotency_key,
+    release_idempotency_key,
+    save_idempotent_response,
+)
+
+logger = logging.getLogger(__name__)
+
+# Longest Idempotency-Key accepted (a UUID takes 36 characters)
+MAX_KEY_LENGTH = 255
+# Response headers stored with the body and sent again on replays
+REPLAYED_HEADERS = ("content-type", "etag")
+
+
+class StoredResponse(NamedTuple):
+    fingerprint: str
+    status_code: int
+    headers: list
+    body: bytes
+
+
+def request_fingerprint(scope, body: bytes) -> str:
+    """
+    Hash the method, path, query string and body of a request, to tell a retry of the
+    request from a different request reusing its Idempotency-Key.
+    """
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope.get("query_string", b""), body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+async def read_body(receive) -> bytes:
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+class IdempotencyMiddleware:
+    """
+    Pure ASGI middleware making create requests sent with an ``Idempotency-Key`` header safe
+    to retry.
+
+    The first request with a key reserves it in the ``idempotency_keys`` table (one
+    INSERT ... ON CONFLICT, so only one of several concurrent duplicates runs, on any
+    worker) and its response is stored. Retries get the stored response, with
+    ``Idempotent-Replayed: true``, from an in-process LRU cache or from the table, without
+    running the route. A duplicate arriving while the first request still runs gets 409;
+    a key reused for a different request gets 422. Responses with a 5xx status are not
+    stored, so the request can be retried. A key left in progress (its worker crashed or
+    could not store the response) is run again after ``lease`` seconds.
+
+    Args:
+    - app: The ASGI application.
+    - routes (Iterable[str]): Requests covered, as "METHOD /path".
+    - session_factory: Callable returning a new sync database session.
+    - ttl (float): Seconds a key and its response are kept.
+    - lease (float): Seconds a key may stay in progress before another request takes it over.
+    - cache_maxsize (int): Responses kept in the in-process cache.
+    """
+
+    def __init__(
+        self, app, routes, session_factory, ttl: float = 86400, lease: float = 60, cache_maxsize: int = 10000
+    ):
+        self.app = app
+        self.routes = set(routes)
+        self.session_factory = session_factory
+        self.ttl = ttl
+        self.lease = lease
+        self.cache = TTLCache(maxsize=cache_maxsize, ttl=ttl)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        route = f"{scope['method']} {scope['path']}"
+        key = Headers(scope=scope).get("idempotency-key")
+        if key is None or route not in self.routes:
+            await self.app(scope, receive, send)
+            return
+        if not 1 <= len(key) <= MAX_KEY_LENGTH:
+            response = JSONResponse(
+                status_code=400,
+                content={"detail": f"Idempotency-Key must have between 1 and {MAX_KEY_LENGTH} characters"},
+            )
+            await response(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        fingerprint = request_fingerprint(scope, body)
+        stored = self.cache.get(key)
+        if stored is None:
+            claimed_at = await run_in_threadpool(self.claim, key, route, fingerprint)
+            if claimed_at is not None:
+                await self.run_request(scope, receive, send, key, claimed_at, fingerprint, body)
+                return
+            stored = await run_in_threadpool(self.load, key)
+        await self.reply(scope, receive, send, stored, fingerprint)
+
+    def claim(self, key: str, route: str, fingerprint: str) -> Optional[datetime]:
+        with self.session_factory() as db:
+            return claim_idempotency_key(db, key, route, fingerprint, self.ttl, self.lease)
+
+    def load(self, key: str) -> Optional[StoredResponse]:
+        """
+        Read the stored response of a key from the table, or None while its request runs.
+        """
+        with self.session_factory() as db:
+            row = get_idempotency_key(db, key)
+            if row is None or row.status_code is None:
+                return None
+            stored = StoredResponse(row.fingerprint, row.status_code, row.response_headers, row.response_body)
+        self.cache.set(key, stored)
+        return stored
+
+    def save(self, key: str, claimed_at: datetime, stored: StoredResponse):
+        with self.session_factory() as db:
+            saved = save_idempotent_response(db, key, claimed_at, stored.status_code, stored.headers, stored.body)
+        if saved:
+            self.cache.set(key, stored)
+        else:
+            logger.warning("Idempotency-Key %s was taken over after its lease; the response is not stored", key)
+
+    def release(self, key: str, claimed_at: datetime):
+        with self.session_factory() as db:
+            release_idempotency_key(db, key, claimed_at)
+
+    async def run_request(
+        self, scope, receive, send, key: str, claimed_at: datetime, fingerprint: str, body: bytes
+    ):
+        body_sent = False
+        start = None
+        chunks = []
+
+        async def receive_body():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def send_and_record(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive_body, send_and_record)
+        except BaseException:
+            # Also on cancellation (client gone, shutdown), so a retry does not wait for the lease
+            with anyio.CancelScope(shield=True):
+                await run_in_threadpool(self.release, key, claimed_at)
+            raise
+        if start is None or start["status"] >= 500:
+            await run_in_threadpool(self.release, key, claimed_at)
+            return
+        headers = Headers(raw=start["headers"])
+        stored = StoredResponse(
+            fingerprint,
+            start["status"],
+            [[name, headers[name]] for name in REPLAYED_HEADERS if name in headers],
+            b"".join(chunks),
+        )
+        try:
+            await run_in_threadpool(self.save, key, claimed_at, stored)
+        except Exception:
+            # The response was already sent; retries get 409 until the lease runs out
+            logger.exception("Storing the response of Idempotency-Key %s failed", key)
+
+    async def reply(self, scope, receive, send, stored: Optional[StoredResponse], fingerprint: str):
+        if stored is None:
+            response = JSONResponse(
+                status_code=409,
+                content={"detail": "A request with this Idempotency-Key is still in progress"},
+                headers={"Retry-After": "1"},
+            )
+        elif stored.fingerprint != fingerprint:
+            response = JSONResponse(
+                status_code=422,
+                content={"detail": "Idempotency-Key was already used for a different request"},
+            )
+        else:
+            response = Response(
+                content=stored.body,
+                status_code=stored.status_code,
+                headers={**dict(stored.headers), "Idempotent-Replayed": "true"},
+            )
+        await response(scope, receive, send)
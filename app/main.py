@@ -1,23 +1,138 @@
-from fastapi import FastAPI, HTTPException
-from sqlalchemy.orm import Session
-from starlette.responses import JSONResponse
-
-from app.database import engine, SessionLocal, Base
-from app.models.maintenance import MaintenanceOrder, MaintenanceOrderStatus
-from app.models.vehicle import Vehicle
-from app.schemas.maintenance import MaintenanceOrderCreate
-from app.schemas.vehicle import VehicleCreate
-from app.routers import vehicle, maintenance
-from sqlalchemy import exc
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import APIRouter, FastAPI, Request
+from sqlalchemy.exc import DBAPIError
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse, PlainTextResponse
+
+from app import database
+from app.archive import archive_periodically
+from app.compression import CompressionMiddleware
+from app.config import (
+    ARCHIVE_AFTER_DAYS,
+    ARCHIVE_BATCH_SIZE,
+    ARCHIVE_INTERVAL_SECONDS,
+    COMPRESSION_BROTLI_LEVEL,
+    COMPRESSION_ENABLED,
+    COMPRESSION_GZIP_LEVEL,
+    COMPRESSION_MINIMUM_SIZE,
+    COMPRESSION_ZSTD_LEVEL,
+    DATABASE_ASYNC,
+    DB_CREATE_ALL,
+    DB_SEED_ON_STARTUP,
+    IDEMPOTENCY_CACHE_MAXSIZE,
+    IDEMPOTENCY_ENABLED,
+    IDEMPOTENCY_LEASE_SECONDS,
+    IDEMPOTENCY_TTL,
+    ORDER_EVENTS_CHANNEL,
+    ORDER_EVENTS_NOTIFY,
+    READ_YOUR_WRITES_SECONDS,
+    METRICS_ENABLED,
+    SERVER_TIMING_ENABLED,
+)
+from app.database import SessionLocal, is_statement_timeout
+from app.etags import WeakETagMiddleware
+from app.events import PostgresNotifyTransport, order_events
+from app.idempotency import IdempotencyMiddleware
+from app.metrics import REQUEST_METRICS, MetricsMiddleware, render_metrics
+from app.pool import POOL_METRICS
+from app.replicas import ReadYourWritesMiddleware
+from app.routers import vehicle, maintenance, monitoring
+
+
+def prepare_database():
+    """
+    Create the missing tables and load the initial data, as configured.
+
+    Deployments should manage the schema with Alembic and seed it once with
+    ``python -m app.cli seed``, leaving DB_CREATE_ALL and DB_SEED_ON_STARTUP disabled.
+    """
+    if DB_CREATE_ALL:
+        database.Base.metadata.create_all(bind=database.engine)
+    if DB_SEED_ON_STARTUP:
+        from app.seed import create_initial_data
+
+        with SessionLocal() as db:
+            create_initial_data(db)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Runs once per worker when it starts serving, not when the module is imported
+    await run_in_threadpool(prepare_database)
+    archiver = None
+    if ARCHIVE_INTERVAL_SECONDS > 0:
+        archiver = asyncio.create_task(
+            archive_periodically(SessionLocal, ARCHIVE_INTERVAL_SECONDS, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH_SIZE)
+        )
+    notify_transport = None
+    if ORDER_EVENTS_NOTIFY:
+        # Order events published by any worker reach the streams of every worker
+        notify_transport = PostgresNotifyTransport(database.engine, order_events, SessionLocal, ORDER_EVENTS_CHANNEL)
+        notify_transport.start()
+    yield
+    if archiver is not None:
+        archiver.cancel()
+    if maintenance.order_coalescer is not None:
+        # Writes the creates still queued before the engines are disposed
+        await run_in_threadpool(maintenance.order_coalescer.close)
+    if notify_transport is not None:
+        # Sends the events of those creates too
+        await run_in_threadpool(notify_transport.close)
+    if database.async_engine is not None:
+        await database.async_engine.dispose()
+    for replica_engine in database.async_replica_pool.engines:
+        await replica_engine.dispose()
+    database.engine.dispose()
+    for replica_engine in database.replica_pool.engines:
+        replica_engine.dispose()
+
+
+# Create requests that accept an Idempotency-Key header
+IDEMPOTENT_ROUTES = ("POST /vehicles/", "POST /maintenance-orders/")
 
 app = FastAPI(
     title="Maintenance Order API",
     description="API for managing maintenance orders",
     version="0.1.0",
+    lifespan=lifespan,
+)
+# Listings and other GET responses without their own ETag get a weak one over the body
+app.add_middleware(WeakETagMiddleware)
+if IDEMPOTENCY_ENABLED:
+    # Inside the compression, so the stored responses are the uncompressed bodies
+    app.add_middleware(
+        IdempotencyMiddleware,
+        routes=IDEMPOTENT_ROUTES,
+        session_factory=SessionLocal,
+        ttl=IDEMPOTENCY_TTL,
+        lease=IDEMPOTENCY_LEASE_SECONDS,
+        cache_maxsize=IDEMPOTENCY_CACHE_MAXSIZE,
+    )
+if database.replica_pool or database.async_replica_pool:
+    # After a write, the client's reads go to the primary until the replicas have caught up
+    app.add_middleware(ReadYourWritesMiddleware, window_seconds=READ_YOUR_WRITES_SECONDS)
+if COMPRESSION_ENABLED:
+    # Outside the ETag middleware, so the weak ETag of a page does not depend on the encoding
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MINIMUM_SIZE,
+        levels={"gzip": COMPRESSION_GZIP_LEVEL, "br": COMPRESSION_BROTLI_LEVEL, "zstd": COMPRESSION_ZSTD_LEVEL},
+    )
+app.add_middleware(
+    MetricsMiddleware,
+    metrics=REQUEST_METRICS if METRICS_ENABLED else None,
+    server_timing=SERVER_TIMING_ENABLED,
 )
 
-# Create the database tables
-Base.metadata.create_all(bind=engine)
+
+@app.exception_handler(DBAPIError)
+async def database_error_handler(request: Request, error: DBAPIError):
+    # Statements cut short by DB_STATEMENT_TIMEOUT_MS / DB_STATEMENT_TIMEOUTS
+    if is_statement_timeout(error):
+        return JSONResponse(status_code=503, content={"detail": "Database query timed out"})
+    raise error
 
 
 # Dependency to get a database session
@@ -29,124 +144,61 @@ def get_db():
         db.close()
 
 
-# Function to create initial data
-def create_initial_data(db: Session):
-    try:
-        # Create initial vehicles if none exist
-        if db.query(Vehicle).count() == 0:
-            vehicle_data_1 = VehicleCreate(
-                license_plate="ABC123",
-                model="Toyota Corolla",
-                year=2022,
-                owner_id=1
-            )
-            db_vehicle_1 = Vehicle(**vehicle_data_1.dict())
-            db.add(db_vehicle_1)
-
-            vehicle_data_2 = VehicleCreate(
-                license_plate="XYZ789",
-                model="Honda Civic",
-                year=2021,
-                owner_id=2
-            )
-            db_vehicle_2 = Vehicle(**vehicle_data_2.dict())
-            db.add(db_vehicle_2)
-
-            vehicle_data_3 = VehicleCreate(
-                license_plate="DEF456",
-                model="Ford F-150",
-                year=2019,
-                owner_id=3
-            )
-            db_vehicle_3 = Vehicle(**vehicle_data_3.dict())
-            db.add(db_vehicle_3)
-
-            vehicle_data_4 = VehicleCreate(
-                license_plate="GHI789",
-                model="BMW X5",
-                year=2020,
-                owner_id=4
-            )
-            db_vehicle_4 = Vehicle(**vehicle_data_4.dict())
-            db.add(db_vehicle_4)
-
-            vehicle_data_5 = VehicleCreate(
-                license_plate="JKL012",
-                model="Tesla Model S",
-                year=2023,
-                owner_id=5
-            )
-            db_vehicle_5 = Vehicle(**vehicle_data_5.dict())
-            db.add(db_vehicle_5)
-
-            db.commit()
-
-        # Create initial maintenance orders if none exist
-        if db.query(MaintenanceOrder).count() == 0:
-            order_data_1 = MaintenanceOrderCreate(
-                description="Regular maintenance for Toyota Corolla",
-                vehicle_id=1,
-                service_type="Oil Change",
-                status=MaintenanceOrderStatus.pending,
-                mechanical_parts=["Engine oil filter", "Air filter"]
-            )
-            db_order_1 = MaintenanceOrder(**order_data_1.dict())
-            db.add(db_order_1)
-
-            order_data_2 = MaintenanceOrderCreate(
-                description="Checkup for Honda Civic",
-                vehicle_id=2,
-                service_type="Inspection",
-                status=MaintenanceOrderStatus.completed,
-                mechanical_parts=["Brake pads check", "Fluid levels check"]
-            )
-            db_order_2 = MaintenanceOrder(**order_data_2.dict())
-            db.add(db_order_2)
-
-            order_data_3 = MaintenanceOrderCreate(
-                description="Oil change and filter replacement for Ford F-150",
-                vehicle_id=3,
-                service_type="Oil Change",
-                status=MaintenanceOrderStatus.in_progress,
-                mechanical_parts=["Oil filter", "Fuel filter"]
-            )
-            db_order_3 = MaintenanceOrder(**order_data_3.dict())
-            db.add(db_order_3)
-
-            order_data_4 = MaintenanceOrderCreate(
-                description="Tire replacement for BMW X5",
-                vehicle_id=4,
-                service_type="Tire Replacement",
-                status=MaintenanceOrderStatus.pending,
-                mechanical_parts=["Four new tires"]
-            )
-            db_order_4 = MaintenanceOrder(**order_data_4.dict())
-            db.add(db_order_4)
-
-            order_data_5 = MaintenanceOrderCreate(
-                description="Brake check and service for Tesla Model S",
-                vehicle_id=5,
-                service_type="Brake Service",
-                status=MaintenanceOrderStatus.completed,
-                mechanical_parts=["Brake pads replacement", "Brake fluid flush"]
-            )
-            db_order_5 = MaintenanceOrder(**order_data_5.dict())
-            db.add(db_order_5)
-
-            db.commit()
-
-    except exc.IntegrityError as e:
-        db.rollback()
-        print(f"Error creating initial data: {e}")
-        raise HTTPException(status_code=500, detail="Error creating initial data")
-
-# Run this function when the application starts
-create_initial_data(SessionLocal())
-
 @app.get("/", response_class=JSONResponse, tags=["Welcome"], summary="Welcome to the Vehicle Maintenance Orders API")
 async def read_root():
     return {"message": "Welcome to the Vehicle Maintenance Orders API. Please check the documentation at http://127.0.0.1:8000/docs"}
 
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["monitoring"], summary="Prometheus metrics")
+def read_metrics():
+    """
+    Expose the request, SQL and connection pool metrics of this worker in the Prometheus text format.
+
+    - **http_request_duration_seconds**: histogram - Latency by method and route template
+    - **http_requests_total**: counter - Responses by method, route and status code
+    - **http_requests_in_flight**: gauge - Requests being served
+    - **http_request_db_queries**, **http_request_db_duration_seconds**: histogram - SQL statements and time per request
+    - **db_pool_***: gauge - Connection pool state and counters per engine
+    """
+    return PlainTextResponse(render_metrics(POOL_METRICS), media_type="text/plain; version=0.0.4")
+
+
+def with_async_handlers(router: APIRouter, async_router: APIRouter) -> APIRouter:
+    """
+    Replace the routes of a sync router with their async counterparts.
+
+    Routes are matched on path and HTTP methods, and the original route order is kept
+    so static paths still take precedence over path parameters. Routes without an async
+    implementation keep running on the threadpool with a sync session. Async handlers
+    without a docstring are documented by the sync handler they replace.
+
+    Args:
+    - router (APIRouter): Router with the sync handlers.
+    - async_router (APIRouter): Router with the async handlers.
+
+    Returns:
+    - APIRouter: A router combining both.
+    """
+    def route_key(route):
+        return route.path, frozenset(getattr(route, "methods", None) or ())
+
+    overrides = {route_key(route): route for route in async_router.routes}
+    for route in router.routes:
+        override = overrides.get(route_key(route))
+        if override is not None and not getattr(override, "description", None):
+            override.description = route.description
+    merged = APIRouter()
+    merged.routes = [overrides.get(route_key(route), route) for route in router.routes]
+    return merged
+
+
 # Include routers
-app.include_router(vehicle.router)
-app.include_router(maintenance.router)
+if DATABASE_ASYNC:
+    from app.routers import vehicle_async, maintenance_async
+
+    app.include_router(with_async_handlers(vehicle.router, vehicle_async.router))
+    app.include_router(with_async_handlers(maintenance.router, maintenance_async.router))
+else:
+    app.include_router(vehicle.router)
+    app.include_router(maintenance.router)
+app.include_router(monitoring.router)
@@ -0,0 +1,299 @@
+import threading
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+# Upper bounds (seconds) of the latency histogram buckets, as in the Prometheus clients
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the SQL statements per request histogram buckets
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+# Route label of the requests that matched no route, so unknown paths do not create new series
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class RequestDbStats:
+    """
+    SQL statements run on behalf of one request.
+
+    Attributes:
+    - scope (dict): ASGI scope of the request; routing adds the matched route to it.
+    - queries (int): Statements executed.
+    - seconds (float): Time spent executing them.
+    """
+
+    __slots__ = ("scope", "queries", "seconds")
+
+    def __init__(self, scope: Optional[dict] = None):
+        self.scope = scope
+        self.queries = 0
+        self.seconds = 0.0
+
+    def route(self) -> Optional[str]:
+        """
+        Return the method and route template of the request (e.g. "GET /vehicles/{vehicle_id}").
+        """
+        if self.scope is None:
+            return None
+        return f"{self.scope['method']} {getattr(self.scope.get('route'), 'path', UNMATCHED_ROUTE)}"
+
+
+# Stats of the request being served; threadpool calls and async sessions run in a copy of
+# the request context, so they all see (and add to) the same object
+request_db_stats: ContextVar[Optional[RequestDbStats]] = ContextVar("request_db_stats", default=None)
+
+
+def current_route() -> Optional[str]:
+    """
+    Return the method and route template of the request being served, or None outside requests.
+    """
+    stats = request_db_stats.get()
+    return stats.route() if stats is not None else None
+
+
+class Histogram:
+    """
+    Cumulative histogram by label values, rendered in the Prometheus text format.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple, buckets: tuple):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._series = {}
+
+    def observe(self, label_values: tuple, value: float):
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * len(self.buckets), 0.0, 0]
+            counts = series[0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._series.items())
+        for label_values, (counts, total, count) in series:
+            labels = format_labels(self.labels, label_values)
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels},le="+Inf"}} {count}')
+            lines.append(f"{self.name}_sum{{{labels}}} {total:.6f}")
+            lines.append(f"{self.name}_count{{{labels}}} {count}")
+        return lines
+
+
+class Counter:
+    """
+    Monotonic counter by label values, rendered in the Prometheus text format.
+    """
+
+    def __init__(self, name: str, help: str, labels: tuple):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._lock = threading.Lock()
+        self._values = {}
+
+    def inc(self, label_values: tuple, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def get(self, label_values: tuple) -> float:
+        with self._lock:
+            return self._values.get(label_values, 0)
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            values = sorted(self._values.items())
+        for label_values, value in values:
+            lines.append(f"{self.name}{{{format_labels(self.labels, label_values)}}} {value:g}")
+        return lines
+
+
+def escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_labels(names: tuple, values: tuple) -> str:
+    return ",".join(f'{name}="{escape_label(value)}"' for name, value in zip(names, values))
+
+
+class RequestMetrics:
+    """
+    Latency, status and SQL metrics of the HTTP requests served by this worker.
+
+    Attributes:
+    - in_flight (int): Requests being served right now.
+    - requests (Counter): Responses by method, route and status code.
+    - latency (Histogram): Request duration in seconds by method and route.
+    - db_queries (Histogram): SQL statements per request by method and route.
+    - db_latency (Histogram): Time spent in SQL statements per request by method and route.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = Counter(
+            "http_requests_total", "HTTP responses by method, route and status code.",
+            ("method", "route", "status"),
+        )
+        self.latency = Histogram(
+            "http_request_duration_seconds", "HTTP request duration in seconds.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+        self.db_queries = Histogram(
+            "http_request_db_queries", "SQL statements executed per HTTP request.",
+            ("method", "route"), QUERY_COUNT_BUCKETS,
+        )
+        self.db_latency = Histogram(
+            "http_request_db_duration_seconds", "Time spent executing SQL statements per HTTP request.",
+            ("method", "route"), LATENCY_BUCKETS,
+        )
+
+    def started(self):
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, method: str, route: str, status: int, seconds: float, db: RequestDbStats):
+        with self._lock:
+            self.in_flight -= 1
+        self.requests.inc((method, route, str(status)))
+        self.latency.observe((method, route), seconds)
+        self.db_queries.observe((method, route), db.queries)
+        self.db_latency.observe((method, route), db.seconds)
+
+    def render(self) -> list:
+        with self._lock:
+            in_flight = self.in_flight
+        lines = [
+            "# HELP http_requests_in_flight HTTP requests being served.",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+        ]
+        for metric in (self.requests, self.latency, self.db_queries, self.db_latency):
+            lines.extend(metric.render())
+        return lines
+
+
+REQUEST_METRICS = RequestMetrics()
+
+
+def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started_at = conn.info["query_started_at"].pop()
+    stats = request_db_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.seconds += time.perf_counter() - started_at
+
+
+def handle_error(exception_context):
+    # Failed statements never reach after_cursor_execute; drop their start time
+    connection = exception_context.connection
+    if connection is not None and connection.info.get("query_started_at"):
+        after_cursor_execute(connection, None, None, None, None, False)
+
+
+def instrument_queries(engine):
+    """
+    Count the SQL statements of an engine, and the time spent on them, in the stats of
+    the request that runs them.
+
+    Args:
+    - engine (Engine): Sync engine (use ``AsyncEngine.sync_engine`` for async engines).
+    """
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", after_cursor_execute)
+    event.listen(engine, "handle_error", handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware recording the latency, status code and SQL statements of every
+    HTTP request, and optionally reporting them in a ``Server-Timing`` response header.
+
+    Requests are labelled with the path template of the matched route (e.g.
+    ``/vehicles/{vehicle_id}``), so the number of series does not grow with the IDs.
+    With ``metrics=None`` nothing is recorded, but the request stays available to the
+    engine listeners through ``request_db_stats`` (slow query log, statement timeouts).
+    """
+
+    def __init__(self, app, metrics: Optional[RequestMetrics] = REQUEST_METRICS, server_timing: bool = True):
+        self.app = app
+        self.metrics = metrics
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestDbStats(scope)
+        token = request_db_stats.set(stats)
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_timing(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    app_ms = (time.perf_counter() - started) * 1000
+                    value = f'db;dur={stats.seconds * 1000:.2f};desc="{stats.queries} queries", app;dur={app_ms:.2f}'
+                    message = {**message, "headers": [*message.get("headers", []), (b"server-timing", value.encode())]}
+            await send(message)
+
+        if self.metrics is not None:
+            self.metrics.started()
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            if self.metrics is not None:
+                self.metrics.finished(
+                    scope["method"],
+                    getattr(scope.get("route"), "path", UNMATCHED_ROUTE),
+                    status,
+                    time.perf_counter() - started,
+                    stats,
+                )
+            request_db_stats.reset(token)
+
+
+def render_metrics(pool_metrics: dict) -> str:
+    """
+    Render the request metrics and the connection pool counters in the Prometheus text format.
+
+    Args:
+    - pool_metrics (dict): PoolMetrics by engine name (``app.pool.POOL_METRICS``).
+
+    Returns:
+    - str: The exposition text, ending with a newline.
+    """
+    lines = REQUEST_METRICS.render()
+    snapshots = {name: metrics.snapshot() for name, metrics in pool_metrics.items()}
+    keys = sorted({
+        key for snapshot in snapshots.values() for key, value in snapshot.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool)
+    })
+    for key in keys:
+        lines.append(f"# TYPE db_pool_{key} gauge")
+        for name, snapshot in sorted(snapshots.items()):
+            if key in snapshot:
+                lines.append(f'db_pool_{key}{{engine="{escape_label(name)}"}} {snapshot[key]:g}')
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,31 @@
+from sqlalchemy import JSON, Column, DateTime, Integer, LargeBinary, String
+from app.database import Base, utcnow
+
+
+class IdempotencyKey(Base):
+    """
+    IdempotencyKey model holds the response of a create request sent with an Idempotency-Key
+    header, so retries of that request get the same response without creating anything.
+
+    The row is inserted before the request runs, which lets only one of several concurrent
+    duplicates run; until its response is stored ``status_code`` is NULL.
+
+    Attributes:
+    - key (str): Value of the Idempotency-Key header (primary key).
+    - route (str): Method and path of the request, for example "POST /vehicles/".
+    - fingerprint (str): SHA-256 of the method, path, query string and body of the request.
+    - status_code (int): Status code of the stored response, None while it is in progress.
+    - response_headers (List[List[str]]): Content-Type and ETag of the stored response.
+    - response_body (bytes): Body of the stored response.
+    - created_at (datetime): When the key was claimed; keys expire IDEMPOTENCY_TTL seconds later.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String, primary_key=True)
+    route = Column(String, nullable=False)
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer)
+    response_headers = Column(JSON)
+    response_body = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, index=True)
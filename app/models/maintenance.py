@@ -1,6 +1,6 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Enum, JSON
+from sqlalchemy import DDL, Column, DateTime, Integer, String, ForeignKey, Enum, Index, JSON, event, func, text
 from sqlalchemy.orm import relationship
-from app.database import Base
+from app.database import Base, utcnow
 from enum import Enum as PyEnum
 
 
@@ -12,6 +12,32 @@ class MaintenanceOrderStatus(str, PyEnum):
     rejected = "rejected"
 
 
+# Statuses an order may move to from each status; completed, cancelled and rejected are final
+ALLOWED_TRANSITIONS = {
+    MaintenanceOrderStatus.pending: (
+        MaintenanceOrderStatus.in_progress,
+        MaintenanceOrderStatus.cancelled,
+        MaintenanceOrderStatus.rejected,
+    ),
+    MaintenanceOrderStatus.in_progress: (
+        MaintenanceOrderStatus.completed,
+        MaintenanceOrderStatus.cancelled,
+        MaintenanceOrderStatus.rejected,
+    ),
+    MaintenanceOrderStatus.completed: (),
+    MaintenanceOrderStatus.cancelled: (),
+    MaintenanceOrderStatus.rejected: (),
+}
+
+# Statuses of the orders still waiting on the workshop (the dispatch board)
+OPEN_STATUSES = (MaintenanceOrderStatus.pending, MaintenanceOrderStatus.in_progress)
+OPEN_STATUSES_CLAUSE = text(
+    "status IN (%s)" % ", ".join(f"'{status.name}'" for status in OPEN_STATUSES)
+)
+# Final statuses; orders closed long ago are moved to maintenance_orders_archive
+CLOSED_STATUSES = tuple(status for status, targets in ALLOWED_TRANSITIONS.items() if not targets)
+
+
 class MaintenanceOrder(Base):
     """
     MaintenanceOrder model represents a maintenance order for a vehicle.
@@ -23,9 +49,32 @@ class MaintenanceOrder(Base):
     - description (str): Description of the maintenance order.
     - status (str): Current status of the maintenance order.
     - mechanical_parts (JSON): JSON field to store mechanical parts involved in the maintenance order.
+    - version_id (int): Row version, incremented on every update; it is the order's ETag.
+    - created_at (datetime): When the order was created.
+    - updated_at (datetime): When the order was last changed; closed orders are archived
+      some time after it.
+    - vehicle (Vehicle): The vehicle of the order.
     """
 
     __tablename__ = "maintenance_orders"
+    # Every filter index ends in id, so filtered listings are served in ID order straight
+    # from the index, and keyset pages cost the same however large the table grows
+    __table_args__ = (
+        Index("ix_maintenance_orders_vehicle_id_id", "vehicle_id", "id"),
+        Index("ix_maintenance_orders_status_id", "status", "id"),
+        Index("ix_maintenance_orders_service_type_id", "service_type", "id"),
+        Index(
+            "ix_maintenance_orders_open_vehicle_id_id",
+            "vehicle_id",
+            "id",
+            postgresql_where=OPEN_STATUSES_CLAUSE,
+            sqlite_where=OPEN_STATUSES_CLAUSE,
+        ),
+        # Covers (id, version_id), so conditional GETs read the version from the index alone
+        Index("ix_maintenance_orders_id_version_id", "id", "version_id"),
+        # Finds the closed orders old enough to be archived
+        Index("ix_maintenance_orders_status_updated_at", "status", "updated_at"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     vehicle_id = Column(Integer, ForeignKey("vehicles.id"))
@@ -33,5 +82,121 @@ class MaintenanceOrder(Base):
     description = Column(String)
     status = Column(Enum(MaintenanceOrderStatus), nullable=False)  # Using Enum for choices
     mechanical_parts = Column(JSON)
+    version_id = Column(Integer, nullable=False, server_default=text("1"))
+    created_at = Column(DateTime(timezone=True), nullable=False, default=utcnow, server_default=func.now())
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, default=utcnow, onupdate=utcnow, server_default=func.now()
+    )
+
+    vehicle = relationship("Vehicle", back_populates="maintenance_orders")
+
+    __mapper_args__ = {"version_id_col": version_id}
+
+
+class ArchivedMaintenanceOrder(Base):
+    """
+    ArchivedMaintenanceOrder model holds the closed maintenance orders moved out of
+    ``maintenance_orders`` by ``python -m app.cli archive``, with the same columns.
+
+    Archived orders keep their ID and are still returned by ``GET /maintenance-orders/{id}``
+    and the vehicle history, and counted by the statistics, but are left out of listings,
+    search and exports.
+
+    Attributes:
+    - id (int): ID the order had in maintenance_orders.
+    - archived_at (datetime): When the order was archived.
+    - The other columns are those of MaintenanceOrder.
+    """
+
+    __tablename__ = "maintenance_orders_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id"), index=True)
+    service_type = Column(String)
+    description = Column(String)
+    status = Column(Enum(MaintenanceOrderStatus), nullable=False)
+    mechanical_parts = Column(JSON)
+    version_id = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    archived_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+
+
+# Full-text search over the descriptions. The search structures are not mapped columns, so
+# they are created with the table: a generated tsvector column with a GIN index on Postgres,
+# and an external-content FTS5 table kept in sync by triggers on SQLite.
+SEARCH_CONFIG = "english"
+POSTGRES_SEARCH_DDL = [
+    "ALTER TABLE maintenance_orders ADD COLUMN description_tsv tsvector "
+    f"GENERATED ALWAYS AS (to_tsvector('{SEARCH_CONFIG}', coalesce(description, ''))) STORED",
+    "CREATE INDEX ix_maintenance_orders_description_tsv ON maintenance_orders USING GIN (description_tsv)",
+]
+SQLITE_SEARCH_DDL = [
+    "CREATE VIRTUAL TABLE maintenance_orders_fts USING fts5("
+    "description, content='maintenance_orders', content_rowid='id', tokenize='porter unicode61')",
+    "CREATE TRIGGER maintenance_orders_fts_insert AFTER INSERT ON maintenance_orders BEGIN "
+    "INSERT INTO maintenance_orders_fts (rowid, description) VALUES (new.id, new.description); END",
+    "CREATE TRIGGER maintenance_orders_fts_delete AFTER DELETE ON maintenance_orders BEGIN "
+    "INSERT INTO maintenance_orders_fts (maintenance_orders_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); END",
+    "CREATE TRIGGER maintenance_orders_fts_update AFTER UPDATE OF description ON maintenance_orders BEGIN "
+    "INSERT INTO maintenance_orders_fts (maintenance_orders_fts, rowid, description) "
+    "VALUES ('delete', old.id, old.description); "
+    "INSERT INTO maintenance_orders_fts (rowid, description) VALUES (new.id, new.description); END",
+]
+
+for statement in POSTGRES_SEARCH_DDL:
+    event.listen(MaintenanceOrder.__table__, "after_create", DDL(statement).execute_if(dialect="postgresql"))
+for statement in SQLITE_SEARCH_DDL:
+    event.listen(MaintenanceOrder.__table__, "after_create", DDL(statement).execute_if(dialect="sqlite"))
+event.listen(
+    MaintenanceOrder.__table__,
+    "before_drop",
+    DDL("DROP TABLE IF EXISTS maintenance_orders_fts").execute_if(dialect="sqlite"),
+)
+
+
+# Parts are compared byte-wise (the "C" collation on Postgres, SQLite's default), so a
+# prefix is a plain range scan over the (part, order_id) index
+PART_TYPE = String().with_variant(String(collation="C"), "postgresql")
+
+
+class MaintenanceOrderPart(Base):
+    """
+    MaintenanceOrderPart model indexes the mechanical parts of the maintenance orders.
+
+    It holds one row per distinct part of an order, normalized to lower case, and is
+    written in the same transaction as the order.
+
+    Attributes:
+    - order_id (int): Foreign key ID referencing the maintenance order.
+    - part (str): Normalized name of the mechanical part.
+    """
+
+    __tablename__ = "maintenance_order_parts"
+    __table_args__ = (
+        Index("ix_maintenance_order_parts_part_order_id", "part", "order_id"),
+    )
+
+    order_id = Column(Integer, ForeignKey("maintenance_orders.id", ondelete="CASCADE"), primary_key=True)
+    part = Column(PART_TYPE, primary_key=True)
+
+
+class MaintenanceOrderStat(Base):
+    """
+    MaintenanceOrderStat model holds the number of maintenance orders per status and per service type.
+
+    The counters are updated in the same transaction as the orders they count and can be
+    rebuilt from the orders with ``python -m app.cli rebuild-stats``.
+
+    Attributes:
+    - kind (str): What is counted: "status" or "service_type".
+    - value (str): The status or service type.
+    - count (int): Number of maintenance orders with that value.
+    """
+
+    __tablename__ = "maintenance_order_stats"
 
-    vehicle = relationship("Vehicle")
+    kind = Column(String, primary_key=True)
+    value = Column(String, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
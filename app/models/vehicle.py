@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String
+from sqlalchemy import Column, Index, Integer, String, text
+from sqlalchemy.orm import relationship
 from app.database import Base
 
 
@@ -13,9 +14,13 @@ class Vehicle(Base):
     - model (str): Model name of the vehicle.
     - year (int): Year of manufacture of the vehicle.
     - owner_id (int): ID of the owner of the vehicle.
+    - version_id (int): Row version, incremented on every update; it is the vehicle's ETag.
+    - maintenance_orders (List[MaintenanceOrder]): Maintenance orders of the vehicle, ordered by ID.
     """
 
     __tablename__ = "vehicles"
+    # Covers (id, version_id), so conditional GETs read the version from the index alone
+    __table_args__ = (Index("ix_vehicles_id_version_id", "id", "version_id"),)
 
     id = Column(Integer, primary_key=True, index=True)
     license_plate = Column(String, unique=True, index=True)
@@ -23,3 +28,11 @@ class Vehicle(Base):
     model = Column(String)
     year = Column(Integer)
     owner_id = Column(Integer)
+    version_id = Column(Integer, nullable=False, server_default=text("1"))
+
+    # Lazy by default: load it with selectinload() when reading many vehicles or orders
+    maintenance_orders = relationship(
+        "MaintenanceOrder", back_populates="vehicle", order_by="MaintenanceOrder.id"
+    )
+
+    __mapper_args__ = {"version_id_col": version_id}
@@ -0,0 +1,159 @@
+import threading
+import time
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Metrics of every instrumented engine, by name ("primary", "async", ...)
+POOL_METRICS = {}
+
+
+class PoolMetrics:
+    """
+    Counters and timings of a connection pool, fed by SQLAlchemy pool events and by
+    the instrumented pool classes below.
+
+    Attributes:
+    - checkouts, checkins (int): Connections handed out to and returned by sessions.
+    - connects, invalidations (int): DBAPI connections opened and invalidated.
+    - checkout_timeouts (int): Checkouts that gave up after ``pool_timeout`` seconds.
+    - wait_seconds_total, wait_seconds_max (float): Time spent waiting for a connection.
+    - hold_seconds_total, hold_seconds_max (float): Time connections stayed checked out.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.checkins = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.checkout_timeouts = 0
+        self.waits = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.hold_seconds_total = 0.0
+        self.hold_seconds_max = 0.0
+
+    def record_wait(self, seconds: float, timed_out: bool = False):
+        with self._lock:
+            self.waits += 1
+            self.wait_seconds_total += seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, seconds)
+            if timed_out:
+                self.checkout_timeouts += 1
+
+    def on_connect(self, dbapi_connection, connection_record):
+        with self._lock:
+            self.connects += 1
+
+    def on_checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info["checked_out_at"] = time.perf_counter()
+        with self._lock:
+            self.checkouts += 1
+
+    def on_checkin(self, dbapi_connection, connection_record):
+        checked_out_at = connection_record.info.pop("checked_out_at", None)
+        with self._lock:
+            self.checkins += 1
+            if checked_out_at is not None:
+                held = time.perf_counter() - checked_out_at
+                self.hold_seconds_total += held
+                self.hold_seconds_max = max(self.hold_seconds_max, held)
+
+    def on_invalidate(self, dbapi_connection, connection_record, exception):
+        with self._lock:
+            self.invalidations += 1
+
+    def snapshot(self) -> dict:
+        """
+        Return the counters together with the current state of the pool.
+        """
+        with self._lock:
+            stats = {
+                "checkouts": self.checkouts,
+                "checkins": self.checkins,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_count": self.waits,
+                "checkout_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "checkout_wait_seconds_max": round(self.wait_seconds_max, 6),
+                "checkout_wait_seconds_avg": round(self.wait_seconds_total / self.waits, 6) if self.waits else 0.0,
+                "hold_seconds_total": round(self.hold_seconds_total, 6),
+                "hold_seconds_max": round(self.hold_seconds_max, 6),
+            }
+        pool = self.pool
+        stats["pool_class"] = type(pool).__name__ if pool is not None else None
+        if isinstance(pool, QueuePool):
+            stats.update({
+                "pool_size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "timeout": pool.timeout(),
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+            })
+        return stats
+
+
+class InstrumentedPoolMixin:
+    """
+    Time how long each checkout waits for a connection and count the checkouts that
+    time out, which pool events cannot observe.
+    """
+
+    metrics = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - start, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record_wait(time.perf_counter() - start)
+        return connection
+
+    def recreate(self):
+        # Engine.dispose() replaces the pool with a fresh copy; keep reporting to the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        if self.metrics is not None:
+            self.metrics.pool = pool
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine, name: str) -> PoolMetrics:
+    """
+    Attach pool metrics to an engine and register them under ``name``.
+
+    Args:
+    - engine (Engine): Sync engine (use ``AsyncEngine.sync_engine`` for async engines).
+    - name (str): Name under which the metrics are reported.
+
+    Returns:
+    - PoolMetrics: The metrics of the engine's pool.
+    """
+    metrics = PoolMetrics(name)
+    metrics.pool = engine.pool
+    if isinstance(engine.pool, InstrumentedPoolMixin):
+        engine.pool.metrics = metrics
+    event.listen(engine, "connect", metrics.on_connect)
+    event.listen(engine, "checkout", metrics.on_checkout)
+    event.listen(engine, "checkin", metrics.on_checkin)
+    event.listen(engine, "invalidate", metrics.on_invalidate)
+    POOL_METRICS[name] = metrics
+    return metrics
@@ -0,0 +1,140 @@
+import itertools
+import threading
+import time
+from typing import List, Optional
+
+from sqlalchemy import event
+from starlette.datastructures import MutableHeaders
+
+# Cookie holding, as a Unix timestamp, until when a client's reads go to the primary
+READ_PRIMARY_COOKIE = "read_primary_until"
+# Methods after which a client must see its own write
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+
+class ReplicaPool:
+    """
+    Thread-safe round robin over the read replica engines, skipping the unhealthy ones.
+
+    A replica is ejected when a connection to it cannot be opened or is lost, and is tried
+    again after ``eject_seconds``; when every replica is ejected, reads go to the primary.
+
+    Attributes:
+    - engines (List[Engine]): Engines of the replicas (sync engines, or AsyncEngines).
+    - eject_seconds (float): Seconds an unhealthy replica is left out of the rotation.
+    - ejections (int): Times a replica was ejected, exposed for monitoring.
+    """
+
+    def __init__(self, engines: List, eject_seconds: float = 30, clock=time.monotonic):
+        self.engines = list(engines)
+        self.eject_seconds = eject_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._rotation = itertools.cycle(range(len(self.engines)))
+        self._ejected_until = {}
+        self.ejections = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.engines)
+
+    def choose(self):
+        """
+        Return the next healthy replica engine, or None when there is none.
+        """
+        with self._lock:
+            now = self._clock()
+            for _ in range(len(self.engines)):
+                index = next(self._rotation)
+                if self._ejected_until.get(index, 0) <= now:
+                    return self.engines[index]
+            return None
+
+    def eject(self, engine):
+        """
+        Leave a replica out of the rotation for ``eject_seconds``.
+        """
+        with self._lock:
+            index = self.engines.index(engine)
+            if self._ejected_until.get(index, 0) <= self._clock():
+                self.ejections += 1
+            self._ejected_until[index] = self._clock() + self.eject_seconds
+
+    def watch(self, engine, sync_engine):
+        """
+        Eject ``engine`` whenever ``sync_engine`` (the engine itself, or the sync engine of an
+        AsyncEngine) fails to connect or loses a connection.
+        """
+        @event.listens_for(sync_engine, "handle_error")
+        def eject_on_connection_error(exception_context):
+            if exception_context.is_disconnect or exception_context.connection is None:
+                self.eject(engine)
+
+    def status(self) -> List[dict]:
+        """
+        Return the URL, without password, and the health of each replica.
+        """
+        with self._lock:
+            now = self._clock()
+            return [
+                {
+                    "url": engine.url.render_as_string(hide_password=True),
+                    "healthy": self._ejected_until.get(index, 0) <= now,
+                    "ejected_for_seconds": round(max(self._ejected_until.get(index, 0) - now, 0), 1),
+                }
+                for index, engine in enumerate(self.engines)
+            ]
+
+
+def reads_from_primary(cookies: dict, now: Optional[float] = None) -> bool:
+    """
+    Tell whether a client wrote recently, so its reads must go to the primary to see the write.
+
+    Args:
+    - cookies (dict): Cookies of the request.
+    - now (float): Current Unix time, for tests.
+
+    Returns:
+    - bool: True while the client's read-your-writes window is open.
+    """
+    try:
+        until = float(cookies.get(READ_PRIMARY_COOKIE, 0))
+    except ValueError:
+        return False
+    return until > (time.time() if now is None else now)
+
+
+class ReadYourWritesMiddleware:
+    """
+    Pure ASGI middleware opening a read-your-writes window after each successful write.
+
+    Responses to POST, PUT, PATCH and DELETE below 400 set a cookie asking for the
+    client's reads to go to the primary for ``window_seconds``, longer than the
+    replication lag, so a client always sees the orders and vehicles it just wrote.
+
+    Args:
+    - app: The ASGI application.
+    - window_seconds (float): Seconds the client's reads stay on the primary.
+    """
+
+    def __init__(self, app, window_seconds: float = 5):
+        self.app = app
+        self.window_seconds = window_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in WRITE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(raw=list(message["headers"]))
+                until = time.time() + self.window_seconds
+                headers.append(
+                    "Set-Cookie",
+                    f"{READ_PRIMARY_COOKIE}={until:.3f}; Max-Age={int(self.window_seconds) + 1}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+                message = {**message, "headers": headers.raw}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
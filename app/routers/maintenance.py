@@ -1,15 +1,69 @@
-from fastapi import APIRouter, HTTPException, Depends
+import asyncio
+from functools import partial
+
+import anyio
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response, WebSocket
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
-from typing import List
+from starlette.concurrency import run_in_threadpool
+from typing import List, Literal, Optional, Union
 
+from app.coalescer import WriteCoalescer
+from app.config import (
+    ORDER_EVENTS_KEEPALIVE_SECONDS,
+    WRITE_COALESCING_ENABLED,
+    WRITE_COALESCING_MAX_BATCH,
+    WRITE_COALESCING_MAX_WAIT_MS
+)
 from app.crud.maintenance import (
     get_maintenance_order,
+    get_maintenance_order_version,
     get_maintenance_orders,
-    create_maintenance_order as db_create_maintenance_order
+    get_maintenance_orders_after,
+    get_maintenance_order_rows,
+    iter_maintenance_orders,
+    EXPORT_COLUMNS,
+    ORDER_NOT_FOUND,
+    change_maintenance_order_status as db_change_maintenance_order_status,
+    create_maintenance_order as db_create_maintenance_order,
+    create_maintenance_order_group as db_create_maintenance_order_group,
+    create_maintenance_orders as db_create_maintenance_orders,
+    search_maintenance_orders as db_search_maintenance_orders
+)
+from app.crud.stats import get_order_stats
+from app.database import SessionLocal, read_session
+from app.etags import resource_etag, version_not_modified
+from app.events import SlowConsumer, order_events, sse_stream
+from app.export import MEDIA_TYPES, ExportFormat, encode_rows
+from app.models.maintenance import MaintenanceOrderStatus
+from app.replicas import reads_from_primary
+from app.schemas.bulk import MAX_BULK_ITEMS, BulkResult, build_bulk_result
+from app.schemas.maintenance import (
+    MaintenanceOrder,
+    MaintenanceOrderCreate,
+    MaintenanceOrderSearchResult,
+    MaintenanceOrderStats,
+    MaintenanceOrderStatusBatch,
+    MaintenanceOrderStatusBatchResult,
+    MaintenanceOrderStatusUpdate,
+    PartMatch
+)
+from app.schemas.pagination import (
+    MAX_PAGE_SIZE,
+    Page,
+    build_page,
+    build_ranked_page,
+    decode_rank_cursor,
+    resolve_after_id
+)
+from app.serialization import (
+    MAINTENANCE_ORDER_ROWS,
+    MAINTENANCE_ORDERS_WITH_VEHICLE,
+    Listing,
+    fast_serialization_enabled,
+    objects_response,
+    rows_response
 )
-from app.crud.vehicle import get_vehicle
-from app.database import SessionLocal
-from app.schemas.maintenance import MaintenanceOrder, MaintenanceOrderCreate
 
 router = APIRouter(
     prefix="/maintenance-orders",
@@ -25,8 +79,95 @@ def get_db():
     finally:
         db.close()
 
+# Dependency of the GET handlers: a read replica, unless the client has just written
+def get_read_db(request: Request):
+    db = read_session(use_primary=reads_from_primary(request.cookies))
+    try:
+        yield db
+    finally:
+        db.close()
+
+def write_order_group(orders):
+    # Runs on the coalescer's writer thread, so each batch owns its session
+    with SessionLocal() as db:
+        return db_create_maintenance_order_group(db=db, orders=orders)
+
+def write_order(order):
+    with SessionLocal() as db:
+        return db_create_maintenance_order(db=db, order=order)
+
+# Group commit of concurrent single-order creates, when WRITE_COALESCING_ENABLED
+order_coalescer = WriteCoalescer(
+    write_order_group,
+    write_order,
+    max_batch=WRITE_COALESCING_MAX_BATCH,
+    max_wait_ms=WRITE_COALESCING_MAX_WAIT_MS,
+) if WRITE_COALESCING_ENABLED else None
+
+# Shared with app.routers.maintenance_async, which only runs the CRUD calls differently
+def order_filters(status, vehicle_id, service_type, part, part_match) -> dict:
+    return {
+        "status": status,
+        "vehicle_id": vehicle_id,
+        "service_type": service_type,
+        "part": part,
+        "part_match": part_match,
+    }
+
+def listing_start(cursor: Optional[str], after_id: Optional[int], limit: int) -> Optional[int]:
+    """
+    Resolve where a keyset page of orders starts, rejecting invalid cursors with 400 and
+    page sizes out of range with 422.
+
+    Returns:
+    - int: ID to start after, or None for a listing paginated with ``skip``.
+    """
+    try:
+        start = resolve_after_id(cursor, after_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if start is not None:
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise HTTPException(status_code=422, detail=f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    return start
+
+def order_listing(skip: int, limit: int, start: Optional[int], include: Optional[str], filters: dict) -> Listing:
+    """
+    Choose the query of a listing of orders: embedded vehicles, the fast serialization
+    path or ORM objects, as a keyset page when ``start`` is given.
+    """
+    if include == "vehicle":
+        if start is not None:
+            return Listing("orders_after", dict(after_id=start, limit=limit + 1, include_vehicle=True, **filters),
+                           partial(objects_response, MAINTENANCE_ORDERS_WITH_VEHICLE, limit=limit))
+        return Listing("orders", dict(skip=skip, limit=limit, include_vehicle=True, **filters),
+                       partial(objects_response, MAINTENANCE_ORDERS_WITH_VEHICLE))
+    if fast_serialization_enabled("maintenance_orders"):
+        return Listing("rows", dict(skip=skip, limit=limit if start is None else limit + 1, after_id=start, **filters),
+                       partial(rows_response, MAINTENANCE_ORDER_ROWS, limit=None if start is None else limit))
+    if start is not None:
+        return Listing("orders_after", dict(after_id=start, limit=limit + 1, **filters), partial(build_page, limit=limit))
+    return Listing("orders", dict(skip=skip, limit=limit, **filters), list)
+
+def created_order(db_order, order: MaintenanceOrderCreate):
+    if db_order is None:
+        raise HTTPException(status_code=404, detail=f"Vehicle with id {order.vehicle_id} not found")
+    return db_order
+
+def found_order(db_order, response: Response):
+    if db_order is None:
+        raise HTTPException(status_code=404, detail="Order not found")
+    response.headers["ETag"] = resource_etag(db_order.version_id)
+    return db_order
+
+ORDER_LISTING_QUERIES = {
+    "orders": get_maintenance_orders,
+    "orders_after": get_maintenance_orders_after,
+    "rows": get_maintenance_order_rows,
+}
+
 @router.post("/", response_model=MaintenanceOrder, summary="Create Maintenance Order")
-def create_maintenance_order(
+async def create_maintenance_order(
     order: MaintenanceOrderCreate,
     db: Session = Depends(get_db)
 ):
@@ -39,46 +180,254 @@ def create_maintenance_order(
     - **status** (str): Status of the maintenance order. Allowed values: "pending", "in_progress", "completed", "cancelled", "rejected"
     - **mechanical_parts** (List[str]): Mechanical parts of the maintenance
 
+    With WRITE_COALESCING_ENABLED, concurrent creates are written together in one
+    transaction and each request gets its own order back.
     """
-    # Check if the vehicle_id exists
-    vehicle = get_vehicle(db, order.vehicle_id)
-    if not vehicle:
-        raise HTTPException(status_code=404, detail=f"Vehicle with id {order.vehicle_id} not found")
+    if order_coalescer is not None:
+        # Awaited without holding a threadpool thread, so batches are not capped by its size
+        db_order = await asyncio.wrap_future(order_coalescer.submit(order))
+    else:
+        # The foreign key on vehicle_id rejects orders for vehicles that do not exist
+        db_order = await run_in_threadpool(db_create_maintenance_order, db=db, order=order)
+    return created_order(db_order, order)
 
-    # Create the maintenance order only if the vehicle_id exists
-    db_order = db_create_maintenance_order(db=db, order=order)
-    return db_order
+@router.post("/bulk", response_model=BulkResult, summary="Create Maintenance Orders in Bulk")
+def create_maintenance_orders(
+    orders: List[MaintenanceOrderCreate],
+    db: Session = Depends(get_db)
+):
+    """
+    Create many maintenance orders in a single transaction.
+
+    - **body**: List of maintenance orders with the same fields as `POST /maintenance-orders/` (1 to 1000 items)
+
+    Orders referencing a vehicle that does not exist are reported as errors while the rest are created.
+    """
+    if not 1 <= len(orders) <= MAX_BULK_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Between 1 and {MAX_BULK_ITEMS} orders are required")
+    return build_bulk_result(db_create_maintenance_orders(db=db, orders=orders))
+
+@router.post("/status:batch", response_model=MaintenanceOrderStatusBatchResult, summary="Change the Status of Maintenance Orders in Bulk")
+def update_maintenance_orders_status(
+    batch: MaintenanceOrderStatusBatch,
+    db: Session = Depends(get_db)
+):
+    """
+    Move many maintenance orders to the same status in a single transaction.
+
+    - **ids**: List[int] - IDs of the maintenance orders to change (1 to 1000 items)
+    - **status**: str - Target status
+
+    Allowed transitions: "pending" to "in_progress", "cancelled" or "rejected"; "in_progress" to
+    "completed", "cancelled" or "rejected". Orders that do not exist or whose current status does
+    not allow the change are listed in `rejected` while the rest are updated.
+    """
+    updated, rejected = db_change_maintenance_order_status(db, order_ids=batch.ids, status=batch.status)
+    return {"updated": updated, "rejected": rejected}
+
+def export_rows(
+    export_format: ExportFormat,
+    status: Optional[List[MaintenanceOrderStatus]],
+    vehicle_id: Optional[int],
+    use_primary: bool = False
+):
+    # The response outlives the request dependencies, so the stream owns its session
+    with read_session(use_primary) as db:
+        rows = iter_maintenance_orders(db, status=status, vehicle_id=vehicle_id)
+        yield from encode_rows(rows, EXPORT_COLUMNS, export_format)
+
+@router.get("/export", response_class=StreamingResponse, summary="Export Maintenance Orders")
+def export_maintenance_orders(
+    request: Request,
+    format: ExportFormat = Query(ExportFormat.ndjson),
+    status: Optional[List[MaintenanceOrderStatus]] = Query(None),
+    vehicle_id: Optional[int] = None
+):
+    """
+    Stream every maintenance order, ordered by ID, with constant memory use.
+
+    - **format**: "ndjson" (one JSON object per line, default) or "csv".
+    - **status**: Only export orders with this status; repeat it to match several.
+    - **vehicle_id**: Only export orders of this vehicle.
+    """
+    return StreamingResponse(
+        export_rows(format, status, vehicle_id, reads_from_primary(request.cookies)),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="maintenance-orders.{format.value}"'},
+    )
+
+@router.get("/stream", response_class=StreamingResponse, summary="Stream Maintenance Order Changes")
+async def stream_maintenance_order_events(
+    last_event_id: Optional[str] = Query(None),
+    last_event_id_header: Optional[str] = Header(None, alias="Last-Event-ID")
+):
+    """
+    Push the creations and status changes of maintenance orders as Server-Sent Events,
+    instead of polling the listing.
+
+    - **last_event_id**: ID of the last event received, to resume after it; browsers send it
+      as the `Last-Event-ID` header when they reconnect.
+
+    Each event has an `id`, a type (`event`) and JSON `data`:
+    - **created**: The new maintenance order, as returned by `GET /maintenance-orders/{order_id}`.
+    - **status_changed**: `id`, `previous_status` and `status` of the order.
+    - **reset**: Events were missed and cannot be replayed; list the orders again.
+
+    A client that falls behind by more than ORDER_EVENTS_QUEUE_SIZE events is disconnected
+    and resumes with the ID of the last event it got.
+    """
+    subscription = order_events.subscribe(last_event_id_header or last_event_id)
+    return StreamingResponse(
+        sse_stream(subscription, ORDER_EVENTS_KEEPALIVE_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@router.websocket("/stream")
+async def stream_maintenance_order_events_websocket(websocket: WebSocket, last_event_id: Optional[str] = None):
+    """
+    WebSocket equivalent of `GET /maintenance-orders/stream`: each event is sent as a JSON
+    message with `id`, `event` and `data`. A client that falls behind is closed with
+    code 1013 and reconnects with `?last_event_id=`.
+    """
+    subscription = order_events.subscribe(last_event_id)
+    try:
+        await websocket.accept()
+        async with anyio.create_task_group() as task_group:
+            async def cancel_on_disconnect():
+                while (await websocket.receive())["type"] != "websocket.disconnect":
+                    pass
+                task_group.cancel_scope.cancel()
+
+            task_group.start_soon(cancel_on_disconnect)
+            try:
+                while True:
+                    event = await subscription.receive()
+                    await websocket.send_json({"id": event.id, "event": event.type, "data": event.data})
+            except SlowConsumer:
+                await websocket.close(code=1013)
+            task_group.cancel_scope.cancel()
+    finally:
+        subscription.close()
+
+@router.get("/stats", response_model=MaintenanceOrderStats, summary="Maintenance Order Statistics")
+def read_maintenance_order_stats(db: Session = Depends(get_read_db)):
+    """
+    Count the maintenance orders per status and per service type.
+
+    The counts are read from counters updated together with the orders, so the cost does not
+    grow with the number of orders.
+    """
+    return get_order_stats(db)
+
+@router.get("/search", response_model=Page[MaintenanceOrderSearchResult], summary="Search Maintenance Orders")
+def search_maintenance_orders(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(10, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[List[MaintenanceOrderStatus]] = Query(None),
+    vehicle_id: Optional[int] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Search maintenance orders by the words of their description, best matches first.
+
+    - **q**: Words to search for (e.g. "oil leak"); every word must appear, in any form ("leaks" matches "leak").
+    - **limit**: Maximum number of orders per page (1 to 100).
+    - **cursor**: Opaque cursor returned as `next_cursor` by the previous page.
+    - **status**: Only search orders with this status; repeat it to match several.
+    - **vehicle_id**: Only search orders of this vehicle.
+
+    Returns a page with `items` (each with its `rank`) and `next_cursor`. The search is served
+    by a full-text index: a tsvector column with a GIN index on Postgres, FTS5 on SQLite.
+    """
+    try:
+        after = decode_rank_cursor(cursor) if cursor is not None else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    rows = db_search_maintenance_orders(
+        db, q, limit=limit + 1, after=after, status=status, vehicle_id=vehicle_id
+    )
+    return build_ranked_page(rows, limit)
+
+@router.patch("/{order_id}/status", response_model=MaintenanceOrder, summary="Change the Status of a Maintenance Order", responses={
+    404: {"description": "Order not found"},
+    409: {"description": "Transition not allowed from the current status"},
+})
+def update_maintenance_order_status(
+    order_id: int,
+    change: MaintenanceOrderStatusUpdate,
+    response: Response,
+    db: Session = Depends(get_db)
+):
+    """
+    Change the status of a maintenance order.
+
+    - **order_id**: The ID of the maintenance order to change.
+    - **status**: str - Target status; see `POST /maintenance-orders/status:batch` for the allowed transitions.
+
+    Returns the updated maintenance order, with its new version as `ETag`.
+    """
+    _, rejected = db_change_maintenance_order_status(db, order_ids=[order_id], status=change.status)
+    if rejected:
+        detail = rejected[0]["detail"]
+        raise HTTPException(status_code=404 if detail == ORDER_NOT_FOUND else 409, detail=detail)
+    return found_order(get_maintenance_order(db, order_id=order_id), response)
 
 @router.get("/{order_id}", response_model=MaintenanceOrder, summary="Get Maintenance Order")
 def read_maintenance_order(
     order_id: int,
-    db: Session = Depends(get_db)
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
 ):
     """
     Get a specific maintenance order by its ID.
 
     - **order_id**: The ID of the maintenance order to retrieve.
+    - **If-None-Match**: ETag of a previous response; when it is still current the answer is
+      `304 Not Modified`, checked from the order's version without loading it.
 
-    Returns the maintenance order.
+    Returns the maintenance order, with its version as a strong `ETag`.
     """
-    db_order = get_maintenance_order(db, order_id=order_id)
-    if db_order is None:
-        raise HTTPException(status_code=404, detail="Order not found")
-    return db_order
+    if if_none_match is not None:
+        cached = version_not_modified(if_none_match, get_maintenance_order_version(db, order_id=order_id))
+        if cached is not None:
+            return cached
+    return found_order(get_maintenance_order(db, order_id=order_id), response)
 
-@router.get("/", response_model=List[MaintenanceOrder], summary="List Maintenance Orders")
+@router.get("/", response_model=Union[List[MaintenanceOrder], Page[MaintenanceOrder]], summary="List Maintenance Orders")
 def read_maintenance_orders(
     skip: int = 0,
     limit: int = 10,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    status: Optional[List[MaintenanceOrderStatus]] = Query(None),
+    vehicle_id: Optional[int] = None,
+    service_type: Optional[str] = None,
+    part: Optional[str] = Query(None, min_length=1, max_length=50),
+    part_match: PartMatch = PartMatch.exact,
+    include: Optional[Literal["vehicle"]] = None,
+    db: Session = Depends(get_read_db)
 ):
     """
     List all maintenance orders with pagination support.
 
     - **skip**: Number of records to skip.
     - **limit**: Maximum number of records to return.
+    - **cursor**: Opaque cursor returned as `next_cursor` by the previous page.
+    - **after_id**: Start the page after this order ID (use 0 for the first page).
+    - **status**: Only list orders with this status; repeat it to match several (e.g. `?status=pending&status=in_progress`).
+    - **vehicle_id**: Only list orders of this vehicle.
+    - **service_type**: Only list orders with this service type.
+    - **part**: Only list orders that use this mechanical part (case-insensitive).
+    - **part_match**: "exact" (default) to match the whole part name or "prefix" to match its beginning.
+    - **include**: "vehicle" to embed the vehicle of every order (loaded with one extra query per page).
 
-    Returns a list of maintenance orders.
+    Returns a list of maintenance orders ordered by ID. When `cursor` or `after_id` is given, orders are
+    paginated by ID (at most 100 per page) and a page with `items` and `next_cursor` is returned;
+    the cursor does not carry the filters, so pass the same filters with every page.
     """
-    orders = get_maintenance_orders(db, skip=skip, limit=limit)
-    return orders
+    start = listing_start(cursor, after_id, limit)
+    listing = order_listing(skip, limit, start, include, order_filters(status, vehicle_id, service_type, part, part_match))
+    return listing.respond(ORDER_LISTING_QUERIES[listing.query](db, **listing.kwargs))
@@ -0,0 +1,96 @@
+import asyncio
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional, Union
+
+from app import database
+from app.etags import version_not_modified
+from app.crud.maintenance_async import (
+    get_maintenance_order,
+    get_maintenance_order_version,
+    get_maintenance_orders,
+    get_maintenance_orders_after,
+    get_maintenance_order_rows,
+    create_maintenance_order as db_create_maintenance_order
+)
+from app.models.maintenance import MaintenanceOrderStatus
+from app.replicas import reads_from_primary
+from app.routers.maintenance import (
+    created_order,
+    found_order,
+    listing_start,
+    order_coalescer,
+    order_filters,
+    order_listing
+)
+from app.schemas.maintenance import MaintenanceOrder, MaintenanceOrderCreate, PartMatch
+from app.schemas.pagination import Page
+
+# Async counterparts of the handlers in app.routers.maintenance, enabled with DATABASE_ASYNC.
+# They share its helpers and documentation and only run the CRUD calls differently.
+router = APIRouter(
+    prefix="/maintenance-orders",
+    tags=["maintenance_orders"],
+    responses={404: {"description": "Not found"}},
+)
+
+# Dependency
+async def get_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+# Dependency of the GET handlers: a read replica, unless the client has just written
+async def get_read_db(request: Request):
+    async with database.async_read_session(use_primary=reads_from_primary(request.cookies)) as db:
+        yield db
+
+ORDER_LISTING_QUERIES = {
+    "orders": get_maintenance_orders,
+    "orders_after": get_maintenance_orders_after,
+    "rows": get_maintenance_order_rows,
+}
+
+@router.post("/", response_model=MaintenanceOrder, summary="Create Maintenance Order")
+async def create_maintenance_order(
+    order: MaintenanceOrderCreate,
+    db: AsyncSession = Depends(get_db)
+):
+    if order_coalescer is not None:
+        # Awaited without holding a thread while the batch is written
+        db_order = await asyncio.wrap_future(order_coalescer.submit(order))
+    else:
+        # The foreign key on vehicle_id rejects orders for vehicles that do not exist
+        db_order = await db_create_maintenance_order(db=db, order=order)
+    return created_order(db_order, order)
+
+@router.get("/{order_id}", response_model=MaintenanceOrder, summary="Get Maintenance Order")
+async def read_maintenance_order(
+    order_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if if_none_match is not None:
+        cached = version_not_modified(if_none_match, await get_maintenance_order_version(db, order_id=order_id))
+        if cached is not None:
+            return cached
+    return found_order(await get_maintenance_order(db, order_id=order_id), response)
+
+@router.get("/", response_model=Union[List[MaintenanceOrder], Page[MaintenanceOrder]], summary="List Maintenance Orders")
+async def read_maintenance_orders(
+    skip: int = 0,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    status: Optional[List[MaintenanceOrderStatus]] = Query(None),
+    vehicle_id: Optional[int] = None,
+    service_type: Optional[str] = None,
+    part: Optional[str] = Query(None, min_length=1, max_length=50),
+    part_match: PartMatch = PartMatch.exact,
+    include: Optional[Literal["vehicle"]] = None,
+    db: AsyncSession = Depends(get_read_db)
+):
+    start = listing_start(cursor, after_id, limit)
+    listing = order_listing(skip, limit, start, include, order_filters(status, vehicle_id, service_type, part, part_match))
+    return listing.respond(await ORDER_LISTING_QUERIES[listing.query](db, **listing.kwargs))
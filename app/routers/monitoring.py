@@ -0,0 +1,104 @@
+from fastapi import APIRouter
+
+from app import database
+from app.crud.vehicle import vehicle_cache
+from app.events import order_events
+from app.pool import POOL_METRICS
+from app.routers.maintenance import order_coalescer
+from app.slow_queries import SLOW_QUERIES
+
+router = APIRouter(
+    prefix="/monitoring",
+    tags=["monitoring"],
+)
+
+@router.get("/cache", summary="Vehicle lookup cache statistics", responses={
+    200: {"description": "Cache size and hit/miss/eviction counters"},
+})
+def read_cache_stats():
+    """
+    Retrieve the counters of the in-process vehicle lookup cache of this worker.
+
+    - **enabled**: bool - Whether the cache is enabled (VEHICLE_CACHE_ENABLED)
+    - **hits**, **misses**, **evictions**, **expirations**: int - Counters since the worker started
+    """
+    if vehicle_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **vehicle_cache.stats()}
+
+@router.get("/pool", summary="Database connection pool statistics", responses={
+    200: {"description": "Pool state and checkout counters per engine"},
+})
+def read_pool_stats():
+    """
+    Retrieve the state of the database connection pools of this worker.
+
+    - **checked_out**, **checked_in**, **overflow**: int - Current state of the pool
+    - **checkout_timeouts**: int - Checkouts that failed after waiting DB_POOL_TIMEOUT seconds
+    - **checkout_wait_seconds_avg**, **checkout_wait_seconds_max**: float - Time waited for a connection
+    - **hold_seconds_max**: float - Longest time a connection stayed checked out
+    """
+    return {name: metrics.snapshot() for name, metrics in POOL_METRICS.items()}
+
+@router.get("/replicas", summary="Read replica health", responses={
+    200: {"description": "Health of each read replica"},
+})
+def read_replica_status():
+    """
+    Retrieve the read replicas of this worker and whether they are in the rotation of the GET handlers.
+
+    - **url**: str - URL of the replica, without the password
+    - **healthy**: bool - False while the replica is ejected after a connection error
+    - **ejected_for_seconds**: float - Time left until the replica is tried again
+    """
+    return {
+        "replicas": database.replica_pool.status(),
+        "async_replicas": database.async_replica_pool.status(),
+        "ejections": database.replica_pool.ejections + database.async_replica_pool.ejections,
+    }
+
+@router.get("/slow-queries", summary="Recent slow SQL statements", responses={
+    200: {"description": "Most recent statements above SLOW_QUERY_THRESHOLD_MS, newest first"},
+})
+def read_slow_queries():
+    """
+    Retrieve the most recent slow SQL statements of this worker (empty unless SLOW_QUERY_THRESHOLD_MS is set).
+
+    - **duration_ms**: float - Time the statement took
+    - **route**: str - Method and route of the request that ran it, null outside requests
+    - **statement**, **parameters**: str - The SQL and its parameters
+    - **plan**: List[str] - Query plan, when SLOW_QUERY_EXPLAIN is enabled
+    """
+    return list(reversed(SLOW_QUERIES))
+
+@router.get("/write-coalescing", summary="Group commit statistics", responses={
+    200: {"description": "Batches and orders written by the create coalescer"},
+})
+def read_write_coalescing_stats():
+    """
+    Retrieve the counters of the group commit of `POST /maintenance-orders/` in this worker.
+
+    - **enabled**: bool - Whether concurrent creates are coalesced (WRITE_COALESCING_ENABLED)
+    - **batches**, **items**: int - Transactions committed and orders written by them
+    - **avg_batch_size**: float - Orders per transaction
+    - **fallbacks**: int - Batches that failed as a whole and were retried order by order
+    """
+    if order_coalescer is None:
+        return {"enabled": False}
+    return {"enabled": True, **order_coalescer.stats()}
+
+@router.get("/order-events", summary="Maintenance order event stream statistics", responses={
+    200: {"description": "Subscribers and counters of the order event broker"},
+})
+def read_order_event_stats():
+    """
+    Retrieve the state of the maintenance order events (`GET /maintenance-orders/stream`) in this worker.
+
+    - **transport**: str - "in_process", or "postgres_notify" with ORDER_EVENTS_NOTIFY
+    - **subscribers**: int - Open SSE and WebSocket streams
+    - **published**: int - Events delivered since the worker started
+    - **dropped_subscribers**: int - Streams closed for falling ORDER_EVENTS_QUEUE_SIZE events behind
+    - **history**: int - Events kept for resuming with Last-Event-ID
+    - **last_event_id**: str - ID of the last event
+    """
+    return order_events.stats()
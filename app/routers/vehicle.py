@@ -1,8 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends, Query
+from functools import partial
+from fastapi import APIRouter, HTTPException, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from typing import List, Optional, Union
 from sqlalchemy.orm import Session
-from app.database import SessionLocal
+from app.database import SessionLocal, read_session
+from app.etags import resource_etag, version_not_modified
+from app.export import MEDIA_TYPES, ExportFormat, encode_rows
+from app.models.maintenance import MaintenanceOrderStatus
+from app.replicas import reads_from_primary
+from app.schemas.bulk import MAX_BULK_ITEMS, BulkResult, build_bulk_result
+from app.schemas.maintenance import VehicleMaintenanceHistory
+from app.schemas.pagination import Page, build_page, resolve_after_id
 from app.schemas.vehicle import VehicleCreate, Vehicle
-from app.crud.vehicle import get_vehicle, get_vehicles, get_vehicle_by_license_plate, create_vehicle as db_create_vehicle
+from app.serialization import VEHICLE_ROWS, Listing, fast_serialization_enabled, rows_response
+from app.crud.vehicle import (
+    get_vehicle,
+    get_vehicle_version,
+    get_vehicle_with_maintenance_orders,
+    get_vehicles,
+    get_vehicles_after,
+    get_vehicle_rows,
+    iter_vehicles,
+    EXPORT_COLUMNS,
+    create_vehicle as db_create_vehicle,
+    create_vehicles as db_create_vehicles
+)
 
 router = APIRouter(
     prefix="/vehicles",
@@ -18,6 +40,50 @@ def get_db():
     finally:
         db.close()
 
+# Dependency of the GET handlers: a read replica, unless the client has just written
+def get_read_db(request: Request):
+    db = read_session(use_primary=reads_from_primary(request.cookies))
+    try:
+        yield db
+    finally:
+        db.close()
+
+# Shared with app.routers.vehicle_async, which only runs the CRUD calls differently
+def listing_start(cursor: Optional[str], after_id: Optional[int]) -> Optional[int]:
+    try:
+        return resolve_after_id(cursor, after_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def vehicle_listing(skip: int, limit: int, start: Optional[int]) -> Listing:
+    """
+    Choose the query of a listing of vehicles: the fast serialization path or ORM
+    objects, as a keyset page when ``start`` is given.
+    """
+    if fast_serialization_enabled("vehicles"):
+        return Listing("rows", dict(skip=skip, limit=limit if start is None else limit + 1, after_id=start),
+                       partial(rows_response, VEHICLE_ROWS, limit=None if start is None else limit))
+    if start is not None:
+        return Listing("vehicles_after", dict(after_id=start, limit=limit + 1), partial(build_page, limit=limit))
+    return Listing("vehicles", dict(skip=skip, limit=limit), list)
+
+def created_vehicle(db_vehicle):
+    if db_vehicle is None:
+        raise HTTPException(status_code=400, detail="Vehicle already registered")
+    return db_vehicle
+
+def found_vehicle(db_vehicle, response: Response):
+    if db_vehicle is None:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    response.headers["ETag"] = resource_etag(db_vehicle.version_id)
+    return db_vehicle
+
+VEHICLE_LISTING_QUERIES = {
+    "vehicles": get_vehicles,
+    "vehicles_after": get_vehicles_after,
+    "rows": get_vehicle_rows,
+}
+
 @router.post("/", response_model=Vehicle, summary="Create a new vehicle", responses={
     201: {"description": "Vehicle created successfully"},
     400: {"description": "Vehicle already registered"},
@@ -32,36 +98,115 @@ def create_vehicle(vehicle: VehicleCreate, db: Session = Depends(get_db)):
     - **year**: int - Year of manufacture (required)
     - **owner_id**: int - ID of the owner (required)
     """
-    db_vehicle = get_vehicle_by_license_plate(db, license_plate=vehicle.license_plate)
-    if db_vehicle:
-        raise HTTPException(status_code=400, detail="Vehicle already registered")
-    return db_create_vehicle(db=db, vehicle=vehicle)
+    return created_vehicle(db_create_vehicle(db=db, vehicle=vehicle))
+
+@router.post("/bulk", response_model=BulkResult, summary="Create vehicles in bulk", responses={
+    200: {"description": "Per-vehicle results of the batch"},
+    422: {"description": "Validation error"},
+})
+def create_vehicles(vehicles: List[VehicleCreate], db: Session = Depends(get_db)):
+    """
+    Create many vehicles in a single transaction.
+
+    - **body**: List of vehicles with the same fields as `POST /vehicles/` (1 to 1000 items)
+
+    Vehicles whose license plate is already registered, or repeated within the batch,
+    are reported as errors while the rest are created.
+    """
+    if not 1 <= len(vehicles) <= MAX_BULK_ITEMS:
+        raise HTTPException(status_code=422, detail=f"Between 1 and {MAX_BULK_ITEMS} vehicles are required")
+    return build_bulk_result(db_create_vehicles(db=db, vehicles=vehicles))
+
+def export_rows(export_format: ExportFormat, use_primary: bool = False):
+    # The response outlives the request dependencies, so the stream owns its session
+    with read_session(use_primary) as db:
+        yield from encode_rows(iter_vehicles(db), EXPORT_COLUMNS, export_format)
+
+@router.get("/export", summary="Export all vehicles", response_class=StreamingResponse, responses={
+    200: {"description": "Vehicles streamed as NDJSON or CSV"},
+    422: {"description": "Validation error"},
+})
+def export_vehicles(request: Request, format: ExportFormat = Query(ExportFormat.ndjson)):
+    """
+    Stream every vehicle, ordered by ID, with constant memory use.
+
+    - **format**: str - "ndjson" (one JSON object per line, default) or "csv"
+    """
+    return StreamingResponse(
+        export_rows(format, reads_from_primary(request.cookies)),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="vehicles.{format.value}"'},
+    )
 
 @router.get("/{vehicle_id}", response_model=Vehicle, summary="Get a vehicle by ID", responses={
     200: {"description": "Vehicle found"},
+    304: {"description": "Vehicle not modified"},
     404: {"description": "Vehicle not found"},
 })
-def read_vehicle(vehicle_id: int, db: Session = Depends(get_db)):
+def read_vehicle(
+    vehicle_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: Session = Depends(get_read_db)
+):
     """
     Retrieve a vehicle by its ID.
 
     - **vehicle_id**: int - ID of the vehicle to retrieve (required)
+    - **If-None-Match**: header - ETag of a previous response; when it is still current the
+      answer is `304 Not Modified`, checked from the vehicle's version without loading it
+    """
+    if if_none_match is not None:
+        cached = version_not_modified(if_none_match, get_vehicle_version(db, vehicle_id=vehicle_id))
+        if cached is not None:
+            return cached
+    return found_vehicle(get_vehicle(db, vehicle_id=vehicle_id), response)
+
+@router.get("/{vehicle_id}/maintenance-orders", response_model=VehicleMaintenanceHistory, summary="Get the maintenance history of a vehicle", responses={
+    200: {"description": "Vehicle with its maintenance orders"},
+    404: {"description": "Vehicle not found"},
+})
+def read_vehicle_maintenance_orders(
+    vehicle_id: int,
+    status: Optional[List[MaintenanceOrderStatus]] = Query(None),
+    service_type: Optional[str] = None,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Retrieve a vehicle with its maintenance orders, ordered by ID, in three queries.
+    Closed orders moved to the archive are part of the history too.
+
+    - **vehicle_id**: int - ID of the vehicle to retrieve (required)
+    - **status**: Only include orders with this status; repeat it to match several.
+    - **service_type**: Only include orders with this service type.
     """
-    db_vehicle = get_vehicle(db, vehicle_id=vehicle_id)
+    db_vehicle = get_vehicle_with_maintenance_orders(db, vehicle_id=vehicle_id, status=status, service_type=service_type)
     if db_vehicle is None:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     return db_vehicle
 
-@router.get("/", response_model=list[Vehicle], summary="List vehicles", responses={
+@router.get("/", response_model=Union[list[Vehicle], Page[Vehicle]], summary="List vehicles", responses={
     200: {"description": "List of vehicles retrieved successfully"},
+    400: {"description": "Invalid cursor"},
     422: {"description": "Validation error"},
 })
-def read_vehicles(skip: int = Query(0, ge=0), limit: int = Query(10, ge=1, le=100), db: Session = Depends(get_db)):
+def read_vehicles(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    db: Session = Depends(get_read_db)
+):
     """
     Retrieve a list of vehicles.
 
     - **skip**: int - Number of vehicles to skip (default is 0, must be non-negative)
     - **limit**: int - Maximum number of vehicles to return (default is 10, min is 1, max is 100)
+    - **cursor**: str - Opaque cursor returned as `next_cursor` by the previous page
+    - **after_id**: int - Start the page after this vehicle ID (use 0 for the first page)
+
+    When `cursor` or `after_id` is given, vehicles are paginated by ID and the response
+    is a page with `items` and `next_cursor`; otherwise the list is paginated with `skip`.
     """
-    vehicles = get_vehicles(db, skip=skip, limit=limit)
-    return vehicles
+    listing = vehicle_listing(skip, limit, listing_start(cursor, after_id))
+    return listing.respond(VEHICLE_LISTING_QUERIES[listing.query](db, **listing.kwargs))
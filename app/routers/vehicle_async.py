@@ -0,0 +1,74 @@
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from typing import Optional, Union
+from sqlalchemy.ext.asyncio import AsyncSession
+from app import database
+from app.etags import version_not_modified
+from app.replicas import reads_from_primary
+from app.routers.vehicle import created_vehicle, found_vehicle, listing_start, vehicle_listing
+from app.schemas.pagination import Page
+from app.schemas.vehicle import VehicleCreate, Vehicle
+from app.crud.vehicle_async import get_vehicle, get_vehicle_version, get_vehicles, get_vehicles_after, get_vehicle_rows, create_vehicle as db_create_vehicle
+
+# Async counterparts of the handlers in app.routers.vehicle, enabled with DATABASE_ASYNC.
+# They share its helpers and documentation and only run the CRUD calls differently.
+router = APIRouter(
+    prefix="/vehicles",
+    tags=["vehicles"],
+    responses={404: {"description": "Not found"}},
+)
+
+# Dependency
+async def get_db():
+    async with database.AsyncSessionLocal() as db:
+        yield db
+
+# Dependency of the GET handlers: a read replica, unless the client has just written
+async def get_read_db(request: Request):
+    async with database.async_read_session(use_primary=reads_from_primary(request.cookies)) as db:
+        yield db
+
+VEHICLE_LISTING_QUERIES = {
+    "vehicles": get_vehicles,
+    "vehicles_after": get_vehicles_after,
+    "rows": get_vehicle_rows,
+}
+
+@router.post("/", response_model=Vehicle, summary="Create a new vehicle", responses={
+    201: {"description": "Vehicle created successfully"},
+    400: {"description": "Vehicle already registered"},
+    422: {"description": "Validation error"},
+})
+async def create_vehicle(vehicle: VehicleCreate, db: AsyncSession = Depends(get_db)):
+    return created_vehicle(await db_create_vehicle(db=db, vehicle=vehicle))
+
+@router.get("/{vehicle_id}", response_model=Vehicle, summary="Get a vehicle by ID", responses={
+    200: {"description": "Vehicle found"},
+    304: {"description": "Vehicle not modified"},
+    404: {"description": "Vehicle not found"},
+})
+async def read_vehicle(
+    vehicle_id: int,
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    db: AsyncSession = Depends(get_read_db)
+):
+    if if_none_match is not None:
+        cached = version_not_modified(if_none_match, await get_vehicle_version(db, vehicle_id=vehicle_id))
+        if cached is not None:
+            return cached
+    return found_vehicle(await get_vehicle(db, vehicle_id=vehicle_id), response)
+
+@router.get("/", response_model=Union[list[Vehicle], Page[Vehicle]], summary="List vehicles", responses={
+    200: {"description": "List of vehicles retrieved successfully"},
+    400: {"description": "Invalid cursor"},
+    422: {"description": "Validation error"},
+})
+async def read_vehicles(
+    skip: int = Query(0, ge=0),
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = None,
+    after_id: Optional[int] = Query(None, ge=0),
+    db: AsyncSession = Depends(get_read_db)
+):
+    listing = vehicle_listing(skip, limit, listing_start(cursor, after_id))
+    return listing.respond(await VEHICLE_LISTING_QUERIES[listing.query](db, **listing.kwargs))
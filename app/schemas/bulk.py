@@ -0,0 +1,51 @@
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+
+# Maximum number of items accepted by the bulk create endpoints
+MAX_BULK_ITEMS = 1000
+
+
+class BulkItemResult(BaseModel):
+    """
+    Outcome of a single item of a bulk create request.
+
+    Attributes:
+    - index (int): Position of the item in the request body.
+    - status (str): "created" or "error".
+    - id (int): ID of the created record, when created.
+    - detail (str): Reason why the item was not created, when rejected.
+    """
+
+    index: int = Field(..., example=0)
+    status: Literal["created", "error"] = Field(..., example="created")
+    id: Optional[int] = Field(None, example=1)
+    detail: Optional[str] = Field(None, example=None)
+
+
+class BulkResult(BaseModel):
+    """
+    Report returned by the bulk create endpoints.
+
+    Attributes:
+    - created (int): Number of records created.
+    - errors (int): Number of items rejected.
+    - items (List[BulkItemResult]): Per-item results, in request order.
+    """
+
+    created: int
+    errors: int
+    items: List[BulkItemResult]
+
+
+def build_bulk_result(results: List[dict]) -> dict:
+    """
+    Build the payload of a BulkResult from the per-item results of a bulk create.
+
+    Args:
+    - results (List[dict]): Per-item results returned by the CRUD layer.
+
+    Returns:
+    - dict: The counters and the per-item results.
+    """
+    created = sum(1 for result in results if result["status"] == "created")
+    return {"created": created, "errors": len(results) - created, "items": results}
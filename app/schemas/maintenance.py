@@ -1,7 +1,21 @@
-from pydantic import BaseModel, Field, constr
-from typing import Optional, List
+from enum import Enum
+
+from pydantic import BaseModel, ConfigDict, Field, constr
+from typing import Dict, Optional, List
+from typing_extensions import TypedDict
 
 from app.models.maintenance import MaintenanceOrderStatus
+from app.schemas.bulk import MAX_BULK_ITEMS
+from app.schemas.vehicle import Vehicle
+
+
+class PartMatch(str, Enum):
+    """
+    How the ``part`` filter of the maintenance order listing is matched.
+    """
+
+    exact = "exact"
+    prefix = "prefix"
 
 
 class MaintenanceOrderBase(BaseModel):
@@ -25,8 +39,7 @@ class MaintenanceOrderBase(BaseModel):
         description="List of mechanical parts involved in the maintenance."
     )
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
 
 
 class MaintenanceOrderCreate(MaintenanceOrderBase):
@@ -48,10 +61,118 @@ class MaintenanceOrder(MaintenanceOrderBase):
     - id (int): ID of the maintenance order.
 
     Config:
-    - orm_mode (bool): Enable ORM mode for this schema.
+    - from_attributes (bool): Enable ORM mode for this schema.
     """
 
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class MaintenanceOrderWithVehicle(MaintenanceOrder):
+    """
+    Maintenance order schema with its vehicle, returned by listings with ``include=vehicle``.
+
+    Additional Attributes:
+    - vehicle (Vehicle): The vehicle of the maintenance order.
+    """
+
+    vehicle: Vehicle
+
+
+class MaintenanceOrderSearchResult(MaintenanceOrder):
+    """
+    Maintenance order schema returned by the full-text search.
+
+    Additional Attributes:
+    - rank (float): Relevance of the order for the search; higher is better.
+    """
+
+    rank: float
+
+
+class VehicleMaintenanceHistory(Vehicle):
+    """
+    Vehicle schema with its maintenance orders.
+
+    Additional Attributes:
+    - maintenance_orders (List[MaintenanceOrder]): Maintenance orders of the vehicle, ordered by ID.
+    """
+
+    maintenance_orders: List[MaintenanceOrder]
+
+
+class MaintenanceOrderStats(BaseModel):
+    """
+    Number of maintenance orders per status and per service type.
+
+    Attributes:
+    - total (int): Number of maintenance orders.
+    - by_status (Dict[str, int]): Orders per status; every status is listed, with 0 when unused.
+    - by_service_type (Dict[str, int]): Orders per service type.
+    """
+
+    total: int = Field(..., example=5)
+    by_status: Dict[str, int] = Field(..., example={"pending": 2, "in_progress": 1, "completed": 2, "cancelled": 0, "rejected": 0})
+    by_service_type: Dict[str, int] = Field(..., example={"Oil Change": 2, "Inspection": 1})
+
+
+class MaintenanceOrderStatusUpdate(BaseModel):
+    """
+    New status of a maintenance order.
+
+    Attributes:
+    - status (str): Target status; it must be reachable from the current one (see ALLOWED_TRANSITIONS).
+    """
+
+    status: MaintenanceOrderStatus = Field(..., example=MaintenanceOrderStatus.in_progress)
+
+
+class MaintenanceOrderStatusBatch(MaintenanceOrderStatusUpdate):
+    """
+    Status change applied to many maintenance orders at once.
+
+    Additional Attributes:
+    - ids (List[int]): IDs of the maintenance orders to change.
+    """
+
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BULK_ITEMS, example=[1, 2, 3])
+
+
+class RejectedStatusChange(BaseModel):
+    """
+    Maintenance order of a status batch that was left unchanged.
+
+    Attributes:
+    - id (int): ID of the maintenance order.
+    - detail (str): Why it was not changed (not found, or transition not allowed).
+    """
+
+    id: int = Field(..., example=3)
+    detail: str = Field(..., example="Cannot change status from completed to cancelled")
+
+
+class MaintenanceOrderStatusBatchResult(BaseModel):
+    """
+    Report of a status batch.
+
+    Attributes:
+    - updated (List[int]): IDs of the maintenance orders whose status changed.
+    - rejected (List[RejectedStatusChange]): Orders left unchanged, with the reason.
+    """
+
+    updated: List[int] = Field(..., example=[1, 2])
+    rejected: List[RejectedStatusChange]
+
+
+class MaintenanceOrderRow(TypedDict):
+    """
+    Maintenance order as a plain row, used by the fast serialization path of the listings.
+    """
+
+    id: int
+    vehicle_id: int
+    service_type: str
+    description: str
+    status: MaintenanceOrderStatus
+    mechanical_parts: List[str]
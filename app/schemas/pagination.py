@@ -0,0 +1,162 @@
+import base64
+import binascii
+import json
+from typing import Generic, List, Optional, Tuple, TypeVar
+
+from pydantic import BaseModel, Field
+
+T = TypeVar("T")
+
+# Upper bound for the page size of cursor (keyset) paginated listings
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(last_id: int) -> str:
+    """
+    Build an opaque cursor pointing after the given primary key.
+
+    Args:
+    - last_id (int): ID of the last row of the current page.
+
+    Returns:
+    - str: URL-safe cursor to request the next page.
+    """
+    payload = json.dumps({"id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Extract the primary key stored in a cursor built by encode_cursor.
+
+    Args:
+    - cursor (str): Opaque cursor received from the client.
+
+    Returns:
+    - int: ID after which the next page starts.
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        last_id = json.loads(base64.urlsafe_b64decode(padded.encode()))["id"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    # JSON booleans are ints in Python, so {"id": true} would pass as after_id=1
+    if type(last_id) is not int or last_id < 0:
+        raise ValueError("Invalid cursor")
+    return last_id
+
+
+def resolve_after_id(cursor: Optional[str], after_id: Optional[int]) -> Optional[int]:
+    """
+    Resolve the starting point of a keyset page from the query parameters.
+
+    Args:
+    - cursor (str): Opaque cursor returned as ``next_cursor`` by a previous page.
+    - after_id (int): Explicit ID after which the page starts.
+
+    Returns:
+    - int: ID after which the page starts, or None when offset pagination is requested.
+
+    Raises:
+    - ValueError: If both parameters are given or the cursor is malformed.
+    """
+    if cursor is not None and after_id is not None:
+        raise ValueError("Use either cursor or after_id, not both")
+    if cursor is not None:
+        return decode_cursor(cursor)
+    return after_id
+
+
+def build_page(rows, limit: int) -> dict:
+    """
+    Build the payload of a Page from the rows of a keyset query.
+
+    Args:
+    - rows (list): Up to ``limit + 1`` rows (objects or dicts) ordered by ID; the extra
+      row only signals that a next page exists.
+    - limit (int): Requested page size.
+
+    Returns:
+    - dict: The page items and the cursor for the next page.
+    """
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        last = items[-1]
+        next_cursor = encode_cursor(last["id"] if isinstance(last, dict) else last.id)
+    return {"items": items, "next_cursor": next_cursor}
+
+
+def encode_rank_cursor(rank: float, last_id: int) -> str:
+    """
+    Build an opaque cursor pointing after a row of a listing ordered by rank, then ID.
+
+    Args:
+    - rank (float): Rank of the last row of the current page.
+    - last_id (int): ID of the last row of the current page.
+
+    Returns:
+    - str: URL-safe cursor to request the next page.
+    """
+    payload = json.dumps({"rank": rank, "id": last_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_rank_cursor(cursor: str) -> Tuple[float, int]:
+    """
+    Extract the rank and primary key stored in a cursor built by encode_rank_cursor.
+
+    Args:
+    - cursor (str): Opaque cursor received from the client.
+
+    Returns:
+    - Tuple[float, int]: Rank and ID after which the next page starts.
+
+    Raises:
+    - ValueError: If the cursor is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        rank, last_id = payload["rank"], payload["id"]
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError, KeyError) as e:
+        raise ValueError("Invalid cursor") from e
+    if type(rank) not in (int, float) or type(last_id) is not int or last_id < 0:
+        raise ValueError("Invalid cursor")
+    return float(rank), last_id
+
+
+def build_ranked_page(rows, limit: int) -> dict:
+    """
+    Build the payload of a Page from the rows of a query ordered by rank, then ID.
+
+    Args:
+    - rows (list): Up to ``limit + 1`` dicts with ``rank`` and ``id``; the extra row only
+      signals that a next page exists.
+    - limit (int): Requested page size.
+
+    Returns:
+    - dict: The page items and the cursor for the next page.
+    """
+    items = list(rows[:limit])
+    next_cursor = None
+    if len(rows) > limit:
+        next_cursor = encode_rank_cursor(items[-1]["rank"], items[-1]["id"])
+    return {"items": items, "next_cursor": next_cursor}
+
+
+class Page(BaseModel, Generic[T]):
+    """
+    Page of results returned by cursor paginated listings.
+
+    Attributes:
+    - items (List[T]): Rows of the current page, ordered by ID.
+    - next_cursor (str): Cursor for the next page, or null on the last page.
+    """
+
+    items: List[T]
+    next_cursor: Optional[str] = Field(None, example="eyJpZCI6MTB9")
+
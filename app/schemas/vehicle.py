@@ -1,4 +1,5 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, ConfigDict, Field
+from typing_extensions import TypedDict
 
 
 class VehicleBase(BaseModel):
@@ -37,10 +38,32 @@ class Vehicle(VehicleBase):
     - id (int): ID of the vehicle.
 
     Config:
-    - orm_mode (bool): Enable ORM mode for this schema.
+    - from_attributes (bool): Enable ORM mode for this schema.
     """
 
     id: int
 
-    class Config:
-        orm_mode = True
+    model_config = ConfigDict(from_attributes=True)
+
+
+class VehicleSnapshot(Vehicle):
+    """
+    Vehicle with its row version, as kept by the lookup cache.
+
+    Additional Attributes:
+    - version_id (int): Row version of the vehicle, used for its ETag; never serialized.
+    """
+
+    version_id: int = Field(..., exclude=True)
+
+
+class VehicleRow(TypedDict):
+    """
+    Vehicle as a plain row, used by the fast serialization path of the listings.
+    """
+
+    id: int
+    license_plate: str
+    model: str
+    year: int
+    owner_id: int
@@ -0,0 +1,83 @@
+from typing import Callable, List, NamedTuple, Optional
+
+import orjson
+from fastapi.responses import Response
+from pydantic import TypeAdapter
+
+from app.config import FAST_SERIALIZATION_ENDPOINTS
+from app.schemas.maintenance import MaintenanceOrderRow, MaintenanceOrderWithVehicle
+from app.schemas.pagination import build_page
+from app.schemas.vehicle import VehicleRow
+
+# Built once at import time, so the validators are not rebuilt on every request
+VEHICLE_ROWS = TypeAdapter(List[VehicleRow])
+MAINTENANCE_ORDER_ROWS = TypeAdapter(List[MaintenanceOrderRow])
+MAINTENANCE_ORDERS_WITH_VEHICLE = TypeAdapter(List[MaintenanceOrderWithVehicle])
+
+
+class Listing(NamedTuple):
+    """
+    Query chosen for a listing and how its result becomes the response, so the sync and
+    async handlers only differ in how they run the query.
+
+    Attributes:
+    - query (str): Key of the CRUD function in the router's listing queries.
+    - kwargs (dict): Arguments of the CRUD function besides the session.
+    - respond (Callable): Builds the response from what the CRUD function returned.
+    """
+    query: str
+    kwargs: dict
+    respond: Callable
+
+
+def fast_serialization_enabled(endpoint: str) -> bool:
+    """
+    Tell whether a listing uses the fast serialization path (FAST_SERIALIZATION_ENDPOINTS).
+
+    Args:
+    - endpoint (str): "vehicles" or "maintenance_orders".
+    """
+    return endpoint in FAST_SERIALIZATION_ENDPOINTS
+
+
+def rows_response(adapter: TypeAdapter, rows, limit: Optional[int] = None) -> Response:
+    """
+    Serialize plain SQL rows without building ORM objects or pydantic models.
+
+    The rows are checked against the row TypedDict with a precompiled TypeAdapter, which
+    yields plain dicts, and encoded with orjson.
+
+    Args:
+    - adapter (TypeAdapter): VEHICLE_ROWS or MAINTENANCE_ORDER_ROWS.
+    - rows (List[Mapping]): Rows returned by the CRUD layer.
+    - limit (int): Page size of a keyset listing; the rows then hold one extra row and a
+      page with ``items`` and ``next_cursor`` is returned instead of a list.
+
+    Returns:
+    - Response: The JSON response.
+    """
+    items = adapter.validate_python(rows)
+    content = build_page(items, limit) if limit is not None else items
+    return Response(content=orjson.dumps(content), media_type="application/json")
+
+
+def objects_response(adapter: TypeAdapter, objects, limit: Optional[int] = None) -> Response:
+    """
+    Serialize ORM objects with an explicit schema instead of the route's response_model.
+
+    Used for expansions such as ``include=vehicle``: validating against a response_model
+    union would try every member and lazy load relationships the query did not ask for.
+
+    Args:
+    - adapter (TypeAdapter): MAINTENANCE_ORDERS_WITH_VEHICLE.
+    - objects (list): ORM objects with the related rows already loaded.
+    - limit (int): Page size of a keyset listing; the objects then hold one extra object and a
+      page with ``items`` and ``next_cursor`` is returned instead of a list.
+
+    Returns:
+    - Response: The JSON response.
+    """
+    page = build_page(objects, limit) if limit is not None else {"items": objects}
+    items = adapter.dump_python(adapter.validate_python(page["items"], from_attributes=True), mode="json")
+    content = {**page, "items": items} if limit is not None else items
+    return Response(content=orjson.dumps(content), media_type="application/json")
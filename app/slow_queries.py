@@ -0,0 +1,141 @@
+import logging
+import time
+from collections import deque
+
+from sqlalchemy import event
+
+from app.metrics import current_route
+
+logger = logging.getLogger(__name__)
+
+# Most recent slow queries of this worker, newest last (see GET /monitoring/slow-queries)
+SLOW_QUERIES = deque(maxlen=100)
+# Longest repr of the parameters kept in a slow query entry
+MAX_PARAMETERS_LENGTH = 1000
+
+
+def explain_statement(conn, statement: str, parameters) -> list:
+    """
+    Return the plan of a SELECT as text lines: ``EXPLAIN (ANALYZE, BUFFERS)`` on Postgres,
+    ``EXPLAIN QUERY PLAN`` on SQLite.
+
+    The EXPLAIN runs on a raw DBAPI cursor of the same connection, so it sees the same
+    transaction and is not reported to the engine listeners. On Postgres it runs inside a
+    savepoint, so a failure (e.g. a statement timeout) does not abort the request's transaction.
+
+    Args:
+    - conn (Connection): Connection that ran the statement.
+    - statement (str): The statement, as sent to the DBAPI.
+    - parameters: Its DBAPI parameters.
+
+    Returns:
+    - List[str]: The plan lines, or an empty list for other statements and dialects.
+    """
+    if not statement.lstrip().upper().startswith("SELECT"):
+        return []
+    dialect = conn.dialect.name
+    cursor = conn.connection.dbapi_connection.cursor()
+    try:
+        if dialect == "postgresql":
+            cursor.execute("SAVEPOINT slow_query_explain")
+            try:
+                cursor.execute("EXPLAIN (ANALYZE, BUFFERS) " + statement, parameters)
+                plan = [row[0] for row in cursor.fetchall()]
+            except Exception:
+                cursor.execute("ROLLBACK TO SAVEPOINT slow_query_explain")
+                raise
+            cursor.execute("RELEASE SAVEPOINT slow_query_explain")
+            return plan
+        if dialect == "sqlite":
+            cursor.execute("EXPLAIN QUERY PLAN " + statement, parameters)
+            return [row[-1] for row in cursor.fetchall()]
+        return []
+    finally:
+        cursor.close()
+
+
+def format_parameters(parameters, executemany: bool) -> str:
+    if executemany:
+        return f"<{len(parameters)} parameter sets>"
+    text = repr(parameters)
+    if len(text) > MAX_PARAMETERS_LENGTH:
+        return text[:MAX_PARAMETERS_LENGTH] + "..."
+    return text
+
+
+class SlowQueryLog:
+    """
+    Engine listener logging the statements that take longer than a threshold, with their
+    parameters, duration and the route of the request that ran them.
+
+    Entries go to the ``app.slow_queries`` logger (level WARNING) and to ``SLOW_QUERIES``.
+
+    Attributes:
+    - threshold (float): Minimum duration, in seconds, of the statements to log.
+    - explain (bool): Whether to capture the plan of slow SELECTs; on Postgres this runs
+      the statement a second time.
+    - log_parameters (bool): Whether to include the statement parameters.
+    """
+
+    def __init__(self, threshold: float, explain: bool = False, log_parameters: bool = True):
+        self.threshold = threshold
+        self.explain = explain
+        self.log_parameters = log_parameters
+
+    def before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_started_at", []).append(time.perf_counter())
+
+    def after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["slow_query_started_at"].pop()
+        if duration >= self.threshold:
+            self.record(conn, statement, parameters, executemany, duration)
+
+    def handle_error(self, exception_context):
+        connection = exception_context.connection
+        if connection is not None and connection.info.get("slow_query_started_at"):
+            connection.info["slow_query_started_at"].pop()
+
+    def record(self, conn, statement: str, parameters, executemany: bool, duration: float) -> dict:
+        entry = {
+            "duration_ms": round(duration * 1000, 2),
+            "route": current_route(),
+            "statement": statement,
+            "parameters": format_parameters(parameters, executemany) if self.log_parameters else None,
+            "plan": None,
+        }
+        if self.explain and not executemany:
+            try:
+                entry["plan"] = explain_statement(conn, statement, parameters)
+            except Exception as error:
+                entry["plan"] = [f"EXPLAIN failed: {error}"]
+        SLOW_QUERIES.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms) in %s: %s; parameters: %s%s",
+            entry["duration_ms"],
+            entry["route"] or "<no request>",
+            statement,
+            entry["parameters"],
+            "".join("\n    " + line for line in entry["plan"] or ()),
+            extra={"slow_query": entry},
+        )
+        return entry
+
+
+def instrument_slow_queries(engine, threshold_ms: float, explain: bool = False, log_parameters: bool = True) -> SlowQueryLog:
+    """
+    Log the statements of an engine that take at least ``threshold_ms`` milliseconds.
+
+    Args:
+    - engine (Engine): Sync engine (use ``AsyncEngine.sync_engine`` for async engines).
+    - threshold_ms (float): Minimum duration of the statements to log.
+    - explain (bool): Whether to capture the plan of slow SELECTs.
+    - log_parameters (bool): Whether to include the statement parameters.
+
+    Returns:
+    - SlowQueryLog: The listener attached to the engine.
+    """
+    log = SlowQueryLog(threshold_ms / 1000, explain=explain, log_parameters=log_parameters)
+    event.listen(engine, "before_cursor_execute", log.before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", log.after_cursor_execute)
+    event.listen(engine, "handle_error", log.handle_error)
+    return log
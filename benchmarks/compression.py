@@ -0,0 +1,99 @@
+"""
+Measure the CPU cost and the bytes saved by response compression on real API payloads.
+
+Payloads (100-row listing pages and the NDJSON export of the orders) are fetched from the
+app uncompressed, then compressed with every available encoding (gzip, plus br and zstd
+when installed) at several levels. The end-to-end latency of a listing page is also
+measured with and without compression. The fleet is generated as in benchmarks/load.py.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/compression.py --orders 10000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load import generate_fleet  # noqa: E402
+
+# Levels measured per encoding; the middle one is the default of the middleware
+LEVELS = {"gzip": [1, 6, 9], "br": [1, 4, 11], "zstd": [1, 3, 9]}
+PAYLOADS = {
+    "GET /vehicles/ (100 rows)": "/vehicles/?after_id=0&limit=100",
+    "GET /maintenance-orders/ (100 rows)": "/maintenance-orders/?after_id=0&limit=100",
+    "GET /maintenance-orders/?include=vehicle (100 rows)": "/maintenance-orders/?after_id=0&limit=100&include=vehicle",
+    "GET /maintenance-orders/export": "/maintenance-orders/export",
+}
+
+
+def median_ms(function, rounds):
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        function()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def compress(encoder_class, level, body):
+    encoder = encoder_class(level)
+    return encoder.compress(body) + encoder.finish()
+
+
+def measure_payload(body, rounds):
+    from app.compression import ENCODERS
+
+    results = {"bytes": len(body), "encodings": {}}
+    # Large payloads are compressed fewer times, so each case takes about the same time
+    rounds = max(3, rounds * 100_000 // max(len(body), 1)) if len(body) > 100_000 else rounds
+    for encoding, encoder_class in ENCODERS.items():
+        for level in LEVELS[encoding]:
+            compressed = compress(encoder_class, level, body)
+            elapsed_ms = median_ms(lambda: compress(encoder_class, level, body), rounds)
+            results["encodings"][f"{encoding}-{level}"] = {
+                "bytes": len(compressed),
+                "saved_pct": round((1 - len(compressed) / len(body)) * 100, 1),
+                "compress_ms": round(elapsed_ms, 3),
+                "mb_per_s": round(len(body) / 1e6 / (elapsed_ms / 1000), 1),
+            }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=1000, help="Vehicles of a newly generated fleet")
+    parser.add_argument("--orders", type=int, default=10000, help="Maintenance orders of a newly generated fleet")
+    parser.add_argument("--rounds", type=int, default=200, help="Compressions and requests measured per case")
+    args = parser.parse_args()
+
+    dataset = generate_fleet(args.vehicles, args.orders, seed=42)
+
+    from fastapi.testclient import TestClient
+
+    from app.compression import ENCODERS, choose_encoding
+    from app.main import app
+
+    identity = {"Accept-Encoding": "identity"}
+    negotiated = {"Accept-Encoding": ", ".join(ENCODERS)}
+    report = {"dataset": dataset, "available_encodings": list(ENCODERS), "payloads": {}, "end_to_end": {}}
+    with TestClient(app) as client:
+        for name, url in PAYLOADS.items():
+            response = client.get(url, headers=identity)
+            assert response.status_code == 200
+            report["payloads"][name] = measure_payload(response.content, args.rounds)
+
+        url = PAYLOADS["GET /maintenance-orders/ (100 rows)"]
+        for label, headers in (("identity", identity), (choose_encoding(negotiated["Accept-Encoding"]), negotiated)):
+            report["end_to_end"][label] = {
+                "median_ms": round(median_ms(lambda: client.get(url, headers=headers), args.rounds), 3),
+                "response_bytes": int(client.get(url, headers=headers).headers["content-length"]),
+            }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,293 @@
+"""
+Load-test the API: generate a synthetic fleet and drive every route with concurrent requests.
+
+The fleet (vehicles, maintenance orders and their parts) is generated with Faker from a fixed
+seed into an empty database, so runs with the same options see the same data. Requests go
+through httpx.AsyncClient straight to the ASGI app, without a server or network, and the
+report gives throughput and p50/p95/p99 latency per route as JSON.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/load.py --vehicles 1000 --orders 10000
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/load.py --output after.json --compare before.json
+
+Large fleets (e.g. --vehicles 100000 --orders 1000000) take a while to generate; later runs
+against the same database reuse it. Use a local Postgres the same way through DATABASE_URL.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import uuid
+from collections import Counter
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SERVICE_TYPES = [
+    "Oil Change", "Brake Service", "Inspection", "Tire Replacement", "Battery Replacement",
+    "Engine Repair", "Transmission Service", "Wheel Alignment",
+]
+PARTS = [
+    "Engine oil filter", "Air filter", "Spark plugs", "Brake pads", "Brake discs", "Brake fluid",
+    "Fuel filter", "Timing belt", "Battery", "Wiper blades", "Coolant", "Transmission fluid",
+    "Tires", "Shock absorbers", "Alternator", "Starter motor", "Clutch kit", "Cabin filter",
+]
+DESCRIPTION_WORDS = [
+    "oil", "leak", "brake", "noise", "vibration", "engine", "check", "replace", "worn", "pads",
+    "filter", "coolant", "overheating", "battery", "tire", "pressure", "alignment", "steering",
+    "transmission", "slipping", "inspection", "routine", "service", "warning", "light",
+    "starter", "clutch", "squeal", "rattle", "customer", "reports", "after", "highway",
+]
+STATUS_WEIGHTS = {"completed": 60, "pending": 15, "in_progress": 10, "cancelled": 10, "rejected": 5}
+CHUNK_ROWS = 10000
+
+
+def generate_fleet(vehicles, orders, seed):
+    """
+    Fill an empty database with a reproducible fleet; a database with vehicles is reused as is.
+
+    Returns:
+    - dict: Dialect and ID ranges of the vehicles and orders.
+    """
+    from faker import Faker
+    from sqlalchemy import func, insert, select
+
+    from app.crud.maintenance import index_order_parts, order_part_rows
+    from app.crud.stats import rebuild_order_stats
+    from app.database import Base, SessionLocal, engine
+    from app.models.maintenance import MaintenanceOrder
+    from app.models.vehicle import Vehicle
+
+    Base.metadata.create_all(bind=engine)
+    fake = Faker()
+    Faker.seed(seed)
+    rng = random.Random(seed)
+
+    with SessionLocal() as db:
+        if db.scalar(select(func.count()).select_from(Vehicle)) == 0:
+            started = time.perf_counter()
+            models = [fake.word().capitalize() + " " + fake.bothify("?##").upper() for _ in range(200)]
+            descriptions = [fake.sentence(nb_words=10, ext_word_list=DESCRIPTION_WORDS) for _ in range(5000)]
+            for first in range(0, vehicles, CHUNK_ROWS):
+                db.execute(insert(Vehicle), [
+                    {
+                        "license_plate": f"B{number:08d}",
+                        "model": rng.choice(models),
+                        "year": rng.randint(1995, 2024),
+                        "owner_id": rng.randint(1, max(vehicles // 3, 1)),
+                    }
+                    for number in range(first, min(first + CHUNK_ROWS, vehicles))
+                ])
+            first_vehicle, last_vehicle = db.execute(select(func.min(Vehicle.id), func.max(Vehicle.id))).one()
+            statuses, weights = zip(*STATUS_WEIGHTS.items())
+            for first in range(0, orders, CHUNK_ROWS):
+                db.execute(insert(MaintenanceOrder), [
+                    {
+                        "vehicle_id": rng.randint(first_vehicle, last_vehicle),
+                        "service_type": rng.choice(SERVICE_TYPES),
+                        "description": rng.choice(descriptions),
+                        "status": rng.choices(statuses, weights)[0],
+                        "mechanical_parts": rng.sample(PARTS, rng.randint(1, 4)),
+                    }
+                    for _ in range(first, min(first + CHUNK_ROWS, orders))
+                ])
+            db.commit()
+            last_id = 0
+            while True:
+                batch = db.execute(
+                    select(MaintenanceOrder.id, MaintenanceOrder.mechanical_parts)
+                    .where(MaintenanceOrder.id > last_id)
+                    .order_by(MaintenanceOrder.id)
+                    .limit(CHUNK_ROWS)
+                ).all()
+                if not batch:
+                    break
+                index_order_parts(db, [row for order_id, parts in batch for row in order_part_rows(order_id, parts)])
+                last_id = batch[-1][0]
+            db.commit()
+            rebuild_order_stats(db)
+            print(f"Generated {vehicles} vehicles and {orders} orders in {time.perf_counter() - started:.1f} s",
+                  file=sys.stderr)
+
+        vehicle_ids = db.execute(select(func.min(Vehicle.id), func.max(Vehicle.id), func.count(Vehicle.id))).one()
+        order_ids = db.execute(
+            select(func.min(MaintenanceOrder.id), func.max(MaintenanceOrder.id), func.count(MaintenanceOrder.id))
+        ).one()
+    return {
+        "dialect": engine.dialect.name,
+        "vehicles": vehicle_ids[2],
+        "orders": order_ids[2],
+        "vehicle_ids": [vehicle_ids[0], vehicle_ids[1]],
+        "order_ids": [order_ids[0], order_ids[1]],
+    }
+
+
+def new_order(rng, dataset):
+    return {
+        "vehicle_id": rng.randint(*dataset["vehicle_ids"]),
+        "service_type": rng.choice(SERVICE_TYPES),
+        "description": " ".join(rng.choices(DESCRIPTION_WORDS, k=8)),
+        "status": "pending",
+        "mechanical_parts": rng.sample(PARTS, 2),
+    }
+
+
+# Route name -> builder of (method, url, json body) from a random generator and the dataset
+ROUTES = {
+    "GET /vehicles/{id}": lambda rng, d: ("GET", f"/vehicles/{rng.randint(*d['vehicle_ids'])}", None),
+    "GET /vehicles/ (keyset)": lambda rng, d: (
+        "GET", f"/vehicles/?after_id={rng.randint(0, d['vehicle_ids'][1])}&limit=100", None),
+    "GET /vehicles/{id}/maintenance-orders": lambda rng, d: (
+        "GET", f"/vehicles/{rng.randint(*d['vehicle_ids'])}/maintenance-orders", None),
+    "GET /maintenance-orders/{id}": lambda rng, d: (
+        "GET", f"/maintenance-orders/{rng.randint(*d['order_ids'])}", None),
+    "GET /maintenance-orders/ (offset)": lambda rng, d: (
+        "GET", f"/maintenance-orders/?skip={rng.randint(0, max(d['orders'] - 100, 0))}&limit=100", None),
+    "GET /maintenance-orders/ (keyset)": lambda rng, d: (
+        "GET", f"/maintenance-orders/?after_id={rng.randint(0, d['order_ids'][1])}&limit=100", None),
+    "GET /maintenance-orders/?include=vehicle": lambda rng, d: (
+        "GET", f"/maintenance-orders/?include=vehicle&after_id={rng.randint(0, d['order_ids'][1])}&limit=100", None),
+    "GET /maintenance-orders/ (open orders of a vehicle)": lambda rng, d: (
+        "GET", f"/maintenance-orders/?vehicle_id={rng.randint(*d['vehicle_ids'])}&status=pending&status=in_progress",
+        None),
+    "GET /maintenance-orders/?part=": lambda rng, d: (
+        "GET", f"/maintenance-orders/?part={rng.choice(PARTS)}&limit=20", None),
+    "GET /maintenance-orders/search": lambda rng, d: (
+        "GET", f"/maintenance-orders/search?q={' '.join(rng.sample(DESCRIPTION_WORDS, 2))}&limit=20", None),
+    "GET /maintenance-orders/stats": lambda rng, d: ("GET", "/maintenance-orders/stats", None),
+    "POST /vehicles/": lambda rng, d: ("POST", "/vehicles/", {
+        "license_plate": uuid.uuid4().hex[:10].upper(),
+        "model": "Load Test",
+        "year": rng.randint(1995, 2024),
+        "owner_id": 1,
+    }),
+    "POST /maintenance-orders/": lambda rng, d: ("POST", "/maintenance-orders/", new_order(rng, d)),
+    "POST /maintenance-orders/bulk": lambda rng, d: (
+        "POST", "/maintenance-orders/bulk", [new_order(rng, d) for _ in range(100)]),
+}
+
+
+def summarize(latencies, statuses, elapsed):
+    ms = sorted(latency * 1000 for latency in latencies)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {
+        "requests": len(ms),
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "status_codes": {str(status): count for status, count in sorted(statuses.items())},
+        "throughput_rps": round(len(ms) / elapsed, 1),
+        "p50_ms": round(cuts[49], 2),
+        "p95_ms": round(cuts[94], 2),
+        "p99_ms": round(cuts[98], 2),
+        "max_ms": round(ms[-1], 2),
+    }
+
+
+async def drive_route(client, requests, concurrency):
+    """
+    Send the prepared requests with ``concurrency`` clients and time each one.
+    """
+    latencies = []
+    statuses = Counter()
+    pending = iter(requests)
+
+    async def worker():
+        for method, url, body in pending:
+            started = time.perf_counter()
+            response = await client.request(method, url, json=body)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return summarize(latencies, statuses, time.perf_counter() - started)
+
+
+async def run(routes, dataset, args):
+    import httpx
+
+    from app.main import app
+
+    rng = random.Random(args.seed)
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        for name in routes:
+            build = ROUTES[name]
+            await drive_route(client, [build(rng, dataset) for _ in range(args.warmup)], args.concurrency)
+            requests = [build(rng, dataset) for _ in range(args.requests)]
+            results[name] = await drive_route(client, requests, args.concurrency)
+            print(f"{name}: {results[name]['throughput_rps']} req/s, p95 {results[name]['p95_ms']} ms",
+                  file=sys.stderr)
+    return results
+
+
+def compare(results, baseline):
+    """
+    Add the relative change of throughput and latency against a previous report.
+    """
+    for name, result in results.items():
+        previous = baseline.get("routes", {}).get(name)
+        if not previous:
+            continue
+        result["change_pct"] = {
+            key: round((result[key] - previous[key]) / previous[key] * 100, 1)
+            for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+            if previous.get(key)
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=1000, help="Vehicles of a newly generated fleet")
+    parser.add_argument("--orders", type=int, default=10000, help="Maintenance orders of a newly generated fleet")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the fleet and of the request parameters")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per route")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per route")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent clients")
+    parser.add_argument("--routes", help="Comma-separated route names to run (default: all); see --list")
+    parser.add_argument("--read-only", action="store_true", help="Skip the routes that write")
+    parser.add_argument("--list", action="store_true", help="List the route names and exit")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args()
+
+    if args.list:
+        print("\n".join(ROUTES))
+        return
+    routes = [name.strip() for name in args.routes.split(",")] if args.routes else list(ROUTES)
+    unknown = [name for name in routes if name not in ROUTES]
+    if unknown:
+        parser.error(f"unknown routes: {', '.join(unknown)}")
+    if args.read_only:
+        routes = [name for name in routes if name.startswith("GET ")]
+
+    dataset = generate_fleet(args.vehicles, args.orders, args.seed)
+    results = asyncio.run(run(routes, dataset, args))
+    report = {
+        "config": {
+            "requests": args.requests,
+            "warmup": args.warmup,
+            "concurrency": args.concurrency,
+            "seed": args.seed,
+            "database_async": os.getenv("DATABASE_ASYNC", ""),
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "dataset": dataset,
+        "routes": results,
+    }
+    if args.compare:
+        with open(args.compare) as f:
+            compare(results, json.load(f))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Compare the serialization paths of the list endpoints on 100-row pages.
+
+- orm: ORM objects validated through the response_model and encoded by FastAPI (default path)
+- fast: plain SQL rows checked with a precompiled TypeAdapter and encoded with orjson
+
+Both paths are measured end to end through the ASGI app, and the serialization step
+alone is measured without the database.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/serialization.py --requests 300
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi.encoders import jsonable_encoder  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+from pydantic import TypeAdapter  # noqa: E402
+from typing import List  # noqa: E402
+
+from app import serialization  # noqa: E402
+from app.crud.maintenance import (  # noqa: E402
+    create_maintenance_orders,
+    get_maintenance_order_rows,
+    get_maintenance_orders,
+)
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+from app.schemas.maintenance import MaintenanceOrder, MaintenanceOrderCreate  # noqa: E402
+from app.seed import create_initial_data  # noqa: E402
+
+PAGE = 100
+
+
+def ensure_orders(count: int):
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        create_initial_data(db)
+        existing = len(get_maintenance_order_rows(db, limit=count))
+        missing = count - existing
+        if missing > 0:
+            orders = [
+                MaintenanceOrderCreate(
+                    vehicle_id=1 + i % 5,
+                    service_type="Oil Change",
+                    description=f"Benchmark order {i} with a description of typical length",
+                    status="pending",
+                    mechanical_parts=["Engine oil filter", "Air filter", "Spark plugs"],
+                )
+                for i in range(missing)
+            ]
+            create_maintenance_orders(db, orders)
+
+
+def time_requests(client, url, requests):
+    samples = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = client.get(url)
+        samples.append(time.perf_counter() - start)
+        assert response.status_code == 200
+    return samples
+
+
+def summarize(samples):
+    ms = sorted(s * 1000 for s in samples)
+    return {
+        "median_ms": round(statistics.median(ms), 3),
+        "p95_ms": round(ms[int(len(ms) * 0.95) - 1], 3),
+        "per_second": round(len(ms) / (sum(ms) / 1000), 1),
+    }
+
+
+def time_serialization(rounds):
+    orm_adapter = TypeAdapter(List[MaintenanceOrder])
+    with SessionLocal() as db:
+        orders = get_maintenance_orders(db, skip=0, limit=PAGE)
+        rows = get_maintenance_order_rows(db, skip=0, limit=PAGE)
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            # What FastAPI does for response_model: validate, dump to JSON-able data, json.dumps
+            models = orm_adapter.validate_python(orders, from_attributes=True)
+            json.dumps(jsonable_encoder(orm_adapter.dump_python(models, mode="json")))
+        orm_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        for _ in range(rounds):
+            serialization.rows_response(serialization.MAINTENANCE_ORDER_ROWS, rows)
+        fast_seconds = time.perf_counter() - start
+    return {
+        "orm_us_per_page": round(orm_seconds / rounds * 1e6, 1),
+        "fast_us_per_page": round(fast_seconds / rounds * 1e6, 1),
+        "speedup": round(orm_seconds / fast_seconds, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare list serialization paths")
+    parser.add_argument("--requests", type=int, default=300, help="Requests per path")
+    parser.add_argument("--rounds", type=int, default=2000, help="Serialization-only rounds per path")
+    args = parser.parse_args()
+
+    ensure_orders(PAGE)
+    url = f"/maintenance-orders/?skip=0&limit={PAGE}"
+    results = {}
+    with TestClient(app) as client:
+        for name, endpoints in (("orm", set()), ("fast", {"maintenance_orders"})):
+            serialization.FAST_SERIALIZATION_ENDPOINTS = endpoints
+            time_requests(client, url, 20)
+            results[name] = summarize(time_requests(client, url, args.requests))
+    results["serialization_only"] = time_serialization(args.rounds)
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Measure the cold start of a worker: importing app.main and running its startup.
+
+Each sample runs in a fresh interpreter, like a new uvicorn worker or reload would.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/startup.py --runs 10
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+PROBE = """
+import time
+start = time.perf_counter()
+import app.main
+imported = time.perf_counter()
+from fastapi.testclient import TestClient
+client = TestClient(app.main.app)
+client.__enter__()
+ready = time.perf_counter()
+client.__exit__(None, None, None)
+print(imported - start, ready - imported)
+"""
+
+
+def sample():
+    output = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", PROBE],
+        cwd=ROOT,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    import_seconds, startup_seconds = map(float, output.split())
+    return import_seconds, startup_seconds
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Number of fresh interpreters to sample")
+    args = parser.parse_args()
+
+    samples = [sample() for _ in range(args.runs)]
+    imports = [s[0] * 1000 for s in samples]
+    startups = [s[1] * 1000 for s in samples]
+    totals = [i + s for i, s in zip(imports, startups)]
+    print(json.dumps({
+        "runs": args.runs,
+        "import_ms_median": round(statistics.median(imports), 1),
+        "startup_ms_median": round(statistics.median(startups), 1),
+        "total_ms_median": round(statistics.median(totals), 1),
+        "total_ms_min": round(min(totals), 1),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
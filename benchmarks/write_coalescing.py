@@ -0,0 +1,100 @@
+"""
+Measure the throughput of concurrent single-order creates with and without group commit.
+
+Every case sends the same number of `POST /maintenance-orders/` requests with concurrent
+clients, first with one transaction per request and then with the write coalescer at
+several collection windows. The fleet is generated as in benchmarks/load.py; the report
+gives throughput, p50/p95/p99 latency and the average batch size as JSON.
+
+Usage:
+    DATABASE_URL=sqlite:///./bench.db python benchmarks/write_coalescing.py --concurrency 64
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from load import drive_route, generate_fleet, new_order  # noqa: E402
+
+
+def use_coalescer(coalescer):
+    """
+    Swap the coalescer used by the create route, in the sync and async routers.
+    """
+    from app.routers import maintenance
+
+    maintenance.order_coalescer = coalescer
+    if "app.routers.maintenance_async" in sys.modules:
+        sys.modules["app.routers.maintenance_async"].order_coalescer = coalescer
+
+
+async def run(dataset, args):
+    import httpx
+
+    from app.coalescer import WriteCoalescer
+    from app.main import app
+    from app.routers.maintenance import write_order, write_order_group
+
+    rng = random.Random(args.seed)
+    cases = {"one transaction per request": None}
+    for wait_ms in args.max_wait_ms:
+        cases[f"group commit (max_wait_ms={wait_ms:g})"] = lambda wait_ms=wait_ms: WriteCoalescer(
+            write_order_group, write_order, max_batch=args.max_batch, max_wait_ms=wait_ms)
+
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    results = {}
+    async with httpx.AsyncClient(transport=transport, base_url="http://load-test", timeout=None) as client:
+        for name, build in cases.items():
+            coalescer = build() if build else None
+            use_coalescer(coalescer)
+            warmup = [("POST", "/maintenance-orders/", new_order(rng, dataset)) for _ in range(args.warmup)]
+            await drive_route(client, warmup, args.concurrency)
+            requests = [("POST", "/maintenance-orders/", new_order(rng, dataset)) for _ in range(args.requests)]
+            batches_before, items_before = (coalescer.batches, coalescer.items) if coalescer else (0, 0)
+            results[name] = await drive_route(client, requests, args.concurrency)
+            if coalescer is not None:
+                batches = coalescer.batches - batches_before
+                results[name]["avg_batch_size"] = round((coalescer.items - items_before) / batches, 1)
+                coalescer.close()
+            print(f"{name}: {results[name]['throughput_rps']} req/s, p95 {results[name]['p95_ms']} ms",
+                  file=sys.stderr)
+    use_coalescer(None)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=1000, help="Vehicles of a newly generated fleet")
+    parser.add_argument("--orders", type=int, default=10000, help="Maintenance orders of a newly generated fleet")
+    parser.add_argument("--seed", type=int, default=42, help="Seed of the fleet and of the request parameters")
+    parser.add_argument("--requests", type=int, default=2000, help="Measured requests per case")
+    parser.add_argument("--warmup", type=int, default=50, help="Unmeasured requests per case")
+    parser.add_argument("--concurrency", type=int, default=64, help="Concurrent clients")
+    parser.add_argument("--max-batch", type=int, default=100, help="Most orders per group commit")
+    parser.add_argument("--max-wait-ms", type=float, nargs="+", default=[0, 2, 5],
+                        help="Collection windows of the group commit cases")
+    args = parser.parse_args()
+
+    dataset = generate_fleet(args.vehicles, args.orders, args.seed)
+    results = asyncio.run(run(dataset, args))
+    report = {
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "max_batch": args.max_batch,
+            "database_async": os.getenv("DATABASE_ASYNC", ""),
+        },
+        "environment": {"python": platform.python_version(), "platform": platform.platform()},
+        "dataset": dataset,
+        "cases": results,
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
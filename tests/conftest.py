@@ -0,0 +1,49 @@
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app import database
+from app.database import Base, SessionLocal, engine
+from app.main import app  # noqa: F401 - registers every model in the metadata
+from app.seed import create_initial_data
+
+
+@pytest.fixture(scope="session", autouse=True)
+def initial_data():
+    """
+    Create the tables and load the initial data once per test session; the tests
+    rely on the seeded vehicles (for example vehicle 1 with plate ABC123).
+    """
+    Base.metadata.create_all(bind=engine)
+    with SessionLocal() as db:
+        create_initial_data(db)
+
+
+@pytest.fixture
+def count_queries():
+    """
+    Count the SQL statements run by the application (sync and async engines) inside a block.
+
+    Usage: ``with count_queries() as queries: ...`` then ``len(queries)``.
+    """
+    engines = [engine]
+    if database.async_engine is not None:
+        engines.append(database.async_engine.sync_engine)
+
+    @contextmanager
+    def counter():
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        for target in engines:
+            event.listen(target, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            for target in engines:
+                event.remove(target, "before_cursor_execute", record)
+
+    return counter
@@ -0,0 +1,104 @@
+import asyncio
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import pytest
+from faker import Faker
+
+from app.config import DATABASE_URL
+from app.crud import vehicle_async as crud_vehicle
+from app.database import to_async_url
+from app.routers import vehicle_async, maintenance_async
+from app.schemas.vehicle import VehicleCreate
+
+fake = Faker()
+
+
+@pytest.fixture(scope="module")
+def session_factory():
+    """
+    Fixture to provide an async session factory bound to the test database.
+    """
+    engine = create_async_engine(to_async_url(DATABASE_URL))
+    yield async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture(scope="module")
+def test_client(session_factory):
+    """
+    Fixture to provide a test client serving the async routers.
+    """
+    async def override_get_db():
+        async with session_factory() as db:
+            yield db
+
+    async_app = FastAPI()
+    async_app.include_router(vehicle_async.router)
+    async_app.include_router(maintenance_async.router)
+    async_app.dependency_overrides[vehicle_async.get_db] = override_get_db
+    async_app.dependency_overrides[maintenance_async.get_db] = override_get_db
+    async_app.dependency_overrides[vehicle_async.get_read_db] = override_get_db
+    async_app.dependency_overrides[maintenance_async.get_read_db] = override_get_db
+    with TestClient(async_app) as c:
+        yield c
+
+
+def test_to_async_url():
+    """
+    Unit test for the translation of sync URLs into async driver URLs.
+    """
+    assert to_async_url("postgresql://u:p@db:5432/x").drivername == "postgresql+asyncpg"
+    assert to_async_url("sqlite:///./local.db").drivername == "sqlite+aiosqlite"
+
+
+def test_async_crud_create_and_get_vehicle(session_factory):
+    """
+    Unit test for the async vehicle CRUD functions.
+    """
+    vehicle_data = VehicleCreate(
+        license_plate=fake.lexify(text="???###"),
+        model=fake.word(),
+        year=fake.random_int(min=1980, max=2023),
+        owner_id=fake.random_int(min=1, max=100)
+    )
+
+    async def scenario():
+        async with session_factory() as db:
+            created = await crud_vehicle.create_vehicle(db, vehicle_data)
+            by_id = await crud_vehicle.get_vehicle(db, created.id)
+            by_plate = await crud_vehicle.get_vehicle_by_license_plate(db, vehicle_data.license_plate)
+            return created, by_id, by_plate
+
+    created, by_id, by_plate = asyncio.run(scenario())
+    assert by_id.id == created.id
+    assert by_plate.id == created.id
+
+
+def test_async_endpoints(test_client):
+    """
+    Unit test for the async vehicle and maintenance order endpoints.
+    """
+    response = test_client.get("/vehicles/1")
+    assert response.status_code == 200
+    assert response.json()["id"] == 1
+
+    order_data = {
+        "vehicle_id": 1,
+        "service_type": fake.word(),
+        "description": fake.sentence(),
+        "status": "pending",
+        "mechanical_parts": [fake.word()]
+    }
+    response = test_client.post("/maintenance-orders/", json=order_data)
+    assert response.status_code == 200
+    order_id = response.json()["id"]
+
+    response = test_client.get(f"/maintenance-orders/{order_id}")
+    assert response.status_code == 200
+    assert response.json()["description"] == order_data["description"]
+
+    response = test_client.get("/maintenance-orders/?limit=5")
+    assert response.status_code == 200
+    assert len(response.json()) <= 5
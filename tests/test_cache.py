@@ -0,0 +1,76 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.cache import TTLCache
+from app.crud.vehicle import vehicle_cache
+import pytest
+
+
+@pytest.fixture(scope="module")
+def test_client():
+    """
+    Fixture to provide a test client configured with the application.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_cache_evicts_least_recently_used():
+    """
+    Unit test for the LRU eviction of the cache.
+    """
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_cache_expires_entries():
+    """
+    Unit test for the time to live of the cache entries.
+    """
+    clock = FakeClock()
+    cache = TTLCache(maxsize=10, ttl=5, clock=clock)
+    cache.set("a", 1)
+    clock.now = 4.9
+    assert cache.get("a") == 1
+    clock.now = 5
+    assert cache.get("a") is None
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 1
+    assert stats["expirations"] == 1
+    assert stats["size"] == 0
+
+
+def test_vehicle_lookups_are_cached(test_client):
+    """
+    Unit test to check repeated vehicle lookups are served from the cache.
+    """
+    if vehicle_cache is None:
+        pytest.skip("Vehicle cache disabled")
+    vehicle_cache.clear()
+    test_client.get("/vehicles/1")
+    hits_before = test_client.get("/monitoring/cache").json()["hits"]
+
+    response = test_client.get("/vehicles/1")
+    assert response.status_code == 200
+    assert response.json()["license_plate"] == "ABC123"
+
+    stats = test_client.get("/monitoring/cache").json()
+    assert stats["enabled"] is True
+    assert stats["hits"] == hits_before + 1
@@ -0,0 +1,100 @@
+import threading
+
+from app.coalescer import WriteCoalescer
+from app.crud.maintenance import create_maintenance_order_group, get_maintenance_order
+from app.crud.stats import get_order_stats
+from app.database import SessionLocal
+from app.schemas.maintenance import MaintenanceOrderCreate
+
+
+def test_coalescer_groups_concurrent_writes():
+    """
+    Unit test to check that writes submitted while a batch is being collected share one batch.
+    """
+    batches = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def write_batch(items):
+        started.set()
+        release.wait(5)
+        batches.append(items)
+        return [item * 10 for item in items]
+
+    coalescer = WriteCoalescer(write_batch, max_batch=10, max_wait_ms=0)
+    # The first write keeps the writer busy while the next ones are queued
+    first = coalescer.submit(0)
+    assert started.wait(5)
+    futures = [coalescer.submit(item) for item in range(1, 6)]
+    release.set()
+
+    assert first.result(timeout=5) == 0
+    assert [future.result(timeout=5) for future in futures] == [10, 20, 30, 40, 50]
+    assert batches == [[0], [1, 2, 3, 4, 5]]
+    coalescer.close()
+    assert coalescer.stats()["batches"] == 2
+
+
+def test_coalescer_isolates_failing_items():
+    """
+    Unit test to check that a failed batch is retried item by item, failing only the bad item.
+    """
+    def write_batch(items):
+        raise ValueError("batch failed")
+
+    def write_one(item):
+        if item < 0:
+            raise ValueError(f"bad item {item}")
+        return item
+
+    coalescer = WriteCoalescer(write_batch, write_one, max_batch=3, max_wait_ms=50)
+    futures = [coalescer.submit(item) for item in (1, -2, 3)]
+    coalescer.close()
+
+    assert futures[0].result() == 1
+    assert str(futures[1].exception()) == "bad item -2"
+    assert futures[2].result() == 3
+    assert coalescer.stats()["fallbacks"] == 1
+
+
+def test_coalescer_fails_writes_without_results():
+    """
+    Unit test to check that a batch returning fewer results than writes fails its callers
+    instead of leaving some of them waiting forever.
+    """
+    coalescer = WriteCoalescer(lambda items: items[:-1], max_batch=3, max_wait_ms=50)
+    futures = [coalescer.submit(item) for item in (1, 2, 3)]
+    coalescer.close()
+
+    for future in futures:
+        assert isinstance(future.exception(timeout=5), RuntimeError)
+
+
+def test_create_maintenance_order_group(count_queries):
+    """
+    Unit test for the group commit of orders from several requests, including an unknown vehicle.
+    """
+    order = {
+        "service_type": "Brake Service",
+        "description": "Replace front brake pads",
+        "status": "pending",
+        "mechanical_parts": ["Brake pads"],
+    }
+    orders = [
+        MaintenanceOrderCreate(vehicle_id=1, **order),
+        MaintenanceOrderCreate(vehicle_id=999999, **order),
+        MaintenanceOrderCreate(vehicle_id=2, **order),
+    ]
+    with SessionLocal() as db:
+        pending_before = get_order_stats(db)["by_status"]["pending"]
+        with count_queries() as queries:
+            created = create_maintenance_order_group(db, orders)
+
+        assert created[1] is None
+        assert [created[0].vehicle_id, created[2].vehicle_id] == [1, 2]
+        assert created[0].id < created[2].id
+        assert created[0].version_id == 1
+        assert get_maintenance_order(db, created[2].id).mechanical_parts == ["Brake pads"]
+        assert get_order_stats(db)["by_status"]["pending"] == pending_before + 2
+    # Vehicle lookup, one INSERT for the orders, their parts and the counters
+    assert sum(statement.startswith("INSERT INTO maintenance_orders") for statement in queries) == 1
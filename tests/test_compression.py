@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+from app.main import app
+from app.compression import choose_encoding
+import pytest
+
+
+@pytest.fixture(scope="module")
+def test_client():
+    """
+    Fixture to provide a test client configured with the application.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+def test_choose_encoding():
+    """
+    Unit test for the negotiation of the response encoding.
+    """
+    available = ["zstd", "br", "gzip"]
+    assert choose_encoding(None, available) is None
+    assert choose_encoding("gzip, deflate", available) == "gzip"
+    assert choose_encoding("gzip, br", available) == "br"
+    assert choose_encoding("gzip;q=1.0, br;q=0.5", available) == "gzip"
+    assert choose_encoding("*", available) == "zstd"
+    assert choose_encoding("*, zstd;q=0", available) == "br"
+    assert choose_encoding("identity", available) is None
+
+
+def test_compress_listing(test_client):
+    """
+    Unit test for the gzip compression of a listing page and the ETag shared by its encodings.
+    """
+    # Enough orders for a page well above the minimum size
+    order = {
+        "vehicle_id": 1,
+        "service_type": "Oil Change",
+        "description": "Routine oil change and filter replacement",
+        "status": "pending",
+        "mechanical_parts": ["Engine oil filter", "Air filter"],
+    }
+    test_client.post("/maintenance-orders/bulk", json=[order] * 20)
+    params = {"after_id": 0, "limit": 100}
+    plain = test_client.get("/maintenance-orders/", params=params, headers={"Accept-Encoding": "identity"})
+    compressed = test_client.get("/maintenance-orders/", params=params, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert compressed.headers["vary"] == "Accept-Encoding"
+    assert int(compressed.headers["content-length"]) < int(plain.headers["content-length"])
+    assert compressed.json() == plain.json()
+    assert compressed.headers["etag"] == plain.headers["etag"]
+
+    response = test_client.get(
+        "/maintenance-orders/", params=params,
+        headers={"Accept-Encoding": "gzip", "If-None-Match": plain.headers["etag"]},
+    )
+    assert response.status_code == 304
+
+
+def test_small_response_not_compressed(test_client):
+    """
+    Unit test to check that responses under the minimum size are sent as they are.
+    """
+    response = test_client.get("/vehicles/1", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert "content-encoding" not in response.headers
+    assert not response.headers["etag"].startswith("W/")
+
+
+def test_compress_streamed_export(test_client):
+    """
+    Unit test for the chunk by chunk compression of a streamed export.
+    """
+    plain = test_client.get("/maintenance-orders/export", headers={"Accept-Encoding": "identity"})
+    compressed = test_client.get("/maintenance-orders/export", headers={"Accept-Encoding": "gzip"})
+
+    assert compressed.headers["content-encoding"] == "gzip"
+    assert "content-length" not in compressed.headers
+    assert compressed.text == plain.text
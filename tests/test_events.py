@@ -0,0 +1,133 @@
+import asyncio
+
+from fastapi.testclient import TestClient
+from app.events import RESET_EVENT, EventBroker, SlowConsumer, notify_payloads, sse_stream
+from app.main import app
+import orjson
+import pytest
+
+
+@pytest.fixture(scope="module")
+def test_client():
+    """
+    Fixture to provide a test client configured with the application.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+def test_broker_resumes_after_last_event_id():
+    """
+    Unit test to check that a reconnecting subscriber gets the events it missed, and a reset
+    when they are no longer kept.
+    """
+    broker = EventBroker(history=3)
+
+    async def scenario():
+        first = broker.subscribe()
+        broker.deliver([("created", {"id": 1}), ("created", {"id": 2})])
+        received = [await first.receive(1), await first.receive(1)]
+        first.close()
+        broker.deliver([("status_changed", {"id": 1}), ("created", {"id": 3})])
+
+        resumed = broker.subscribe(received[0].id)
+        replayed = [(await resumed.receive(1)).data["id"] for _ in range(3)]
+        idle = await resumed.receive(0.01)
+        resumed.close()
+
+        broker.deliver([("created", {"id": 4})])
+        too_old = broker.subscribe(received[0].id)
+        other_worker = broker.subscribe("0000-1")
+        return replayed, idle, await too_old.receive(1), await other_worker.receive(1)
+
+    replayed, idle, too_old, other_worker = asyncio.run(scenario())
+    assert replayed == [2, 1, 3]
+    assert idle is None
+    assert too_old.type == RESET_EVENT and too_old.id == broker.event_id(5)
+    assert other_worker.type == RESET_EVENT
+
+
+def test_slow_subscriber_is_dropped():
+    """
+    Unit test to check that a subscriber whose queue fills up gets the queued events and is
+    then dropped, without holding back the others.
+    """
+    broker = EventBroker(queue_size=2)
+
+    async def scenario():
+        slow = broker.subscribe()
+        fast = broker.subscribe()
+        for order_id in range(3):
+            broker.deliver([("created", {"id": order_id})])
+            await fast.receive(1)
+        # Let the event loop run the queued deliveries
+        await asyncio.sleep(0)
+        queued = [(await slow.receive(1)).data["id"] for _ in range(2)]
+        with pytest.raises(SlowConsumer):
+            await slow.receive(1)
+        return queued
+
+    assert asyncio.run(scenario()) == [0, 1]
+    assert broker.stats()["dropped_subscribers"] == 1
+    assert broker.stats()["subscribers"] == 1
+
+
+def test_sse_stream_and_notify_payloads():
+    """
+    Unit test for the Server-Sent Events encoding and the packing of NOTIFY payloads.
+    """
+    broker = EventBroker()
+
+    async def scenario():
+        subscription = broker.subscribe()
+        stream = sse_stream(subscription, keepalive_seconds=0.01)
+        frames = [await stream.__anext__(), await stream.__anext__()]
+        broker.deliver([("created", {"id": 7})])
+        frames.append(await stream.__anext__())
+        await stream.aclose()
+        return frames
+
+    frames = asyncio.run(scenario())
+    assert frames == [
+        "retry: 3000\n\n",
+        ": keep-alive\n\n",
+        f"id: {broker.event_id(1)}\nevent: created\ndata: {{\"id\":7}}\n\n",
+    ]
+    assert broker.stats()["subscribers"] == 0
+
+    events = [("created", {"id": order_id, "description": "x" * 100}) for order_id in range(10)]
+    events.append(("created", {"id": 10, "description": "x" * 1000}))
+    payloads = notify_payloads(events, max_size=500)
+    assert all(len(payload) <= 500 for payload in payloads)
+    items = [item for payload in payloads for item in orjson.loads(payload)]
+    assert [item["data"]["id"] for item in items] == list(range(11))
+    assert items[-1] == {"type": "created", "data": {"id": 10}, "reload": True}
+
+
+def test_websocket_streams_order_changes(test_client):
+    """
+    Test the WebSocket stream of the creations and status changes of maintenance orders.
+    """
+    with test_client.websocket_connect("/maintenance-orders/stream") as websocket:
+        response = test_client.post("/maintenance-orders/", json={
+            "vehicle_id": 1,
+            "service_type": "Inspection",
+            "description": "Order watched by the dispatch board",
+            "status": "pending",
+            "mechanical_parts": ["Brake pads"],
+        })
+        assert response.status_code == 200
+        order = response.json()
+        created = websocket.receive_json()
+        assert created["event"] == "created"
+        assert created["data"] == order
+
+        response = test_client.patch(f"/maintenance-orders/{order['id']}/status", json={"status": "in_progress"})
+        assert response.status_code == 200
+        changed = websocket.receive_json()
+        assert changed["event"] == "status_changed"
+        assert changed["data"] == {"id": order["id"], "previous_status": "pending", "status": "in_progress"}
+
+    # A client reconnecting after the creation gets the status change it missed
+    with test_client.websocket_connect(f"/maintenance-orders/stream?last_event_id={created['id']}") as websocket:
+        assert websocket.receive_json() == changed
@@ -0,0 +1,161 @@
+import time
+import uuid
+from datetime import timedelta
+
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+from sqlalchemy.exc import OperationalError
+from app import idempotency
+from app.config import IDEMPOTENCY_LEASE_SECONDS
+from app.main import app
+from app.models.idempotency import IdempotencyKey
+from app.crud.idempotency import (
+    claim_idempotency_key,
+    get_idempotency_key,
+    purge_idempotency_keys,
+    release_idempotency_key,
+    save_idempotent_response,
+)
+from app.database import SessionLocal, utcnow
+import pytest
+
+
+@pytest.fixture(scope="module")
+def test_client():
+    """
+    Fixture to provide a test client configured with the application.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+def new_order():
+    return {
+        "vehicle_id": 1,
+        "service_type": "Inspection",
+        "description": "Annual inspection requested from the mobile app",
+        "status": "pending",
+        "mechanical_parts": [],
+    }
+
+
+def test_replayed_create(test_client, count_queries):
+    """
+    Unit test to check that a retried create returns the original order without creating another.
+    """
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    first = test_client.post("/maintenance-orders/", json=new_order(), headers=headers)
+    assert first.status_code == 200
+    assert "idempotent-replayed" not in first.headers
+
+    with count_queries() as queries:
+        retry = test_client.post("/maintenance-orders/", json=new_order(), headers=headers)
+    assert retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true"
+    assert retry.json() == first.json()
+    # Served from the in-process cache, without touching the database
+    assert len(queries) == 0
+
+    # Another worker, without the response in its cache, reads it from the table
+    test_client.app.middleware_stack = None
+    other = test_client.post("/maintenance-orders/", json=new_order(), headers=headers)
+    assert other.json()["id"] == first.json()["id"]
+
+
+def test_idempotency_key_reused_for_another_request(test_client):
+    """
+    Unit test to check that a key sent with a different body is rejected.
+    """
+    headers = {"Idempotency-Key": str(uuid.uuid4())}
+    vehicle = {"license_plate": uuid.uuid4().hex[:8].upper(), "model": "Corolla", "year": 2020, "owner_id": 1}
+    assert test_client.post("/vehicles/", json=vehicle, headers=headers).status_code == 200
+
+    response = test_client.post("/vehicles/", json={**vehicle, "year": 2021}, headers=headers)
+    assert response.status_code == 422
+    assert response.json()["detail"] == "Idempotency-Key was already used for a different request"
+
+
+def test_concurrent_duplicate_is_rejected(test_client):
+    """
+    Unit test to check that a duplicate arriving while the first request runs gets 409.
+    """
+    key = str(uuid.uuid4())
+    # The key was claimed by a request that is still running, possibly on another worker
+    with SessionLocal() as db:
+        assert claim_idempotency_key(db, key, "POST /maintenance-orders/", "fingerprint", ttl=60)
+        assert not claim_idempotency_key(db, key, "POST /maintenance-orders/", "fingerprint", ttl=60)
+
+    response = test_client.post("/maintenance-orders/", json=new_order(), headers={"Idempotency-Key": key})
+    assert response.status_code == 409
+    assert response.headers["retry-after"] == "1"
+
+
+def test_key_left_in_progress_is_taken_over_after_lease(test_client, monkeypatch):
+    """
+    Unit test to check that a key whose response could not be stored (or whose worker
+    crashed) is run again once its lease is over, long before the TTL.
+    """
+    def failing_save(db, key, claimed_at, status_code, headers, body):
+        raise OperationalError("UPDATE idempotency_keys", {}, Exception("connection lost"))
+
+    monkeypatch.setattr(idempotency, "save_idempotent_response", failing_save)
+    key = str(uuid.uuid4())
+    first = test_client.post("/maintenance-orders/", json=new_order(), headers={"Idempotency-Key": key})
+    assert first.status_code == 200
+    monkeypatch.undo()
+
+    retry = test_client.post("/maintenance-orders/", json=new_order(), headers={"Idempotency-Key": key})
+    assert retry.status_code == 409
+
+    with SessionLocal() as db:
+        db.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.key == key)
+            .values(created_at=utcnow() - timedelta(seconds=IDEMPOTENCY_LEASE_SECONDS + 1))
+        )
+        db.commit()
+    retry = test_client.post("/maintenance-orders/", json=new_order(), headers={"Idempotency-Key": key})
+    assert retry.status_code == 200
+    assert "idempotent-replayed" not in retry.headers
+    assert retry.json()["id"] != first.json()["id"]
+
+
+def test_request_past_its_lease_leaves_the_new_claim_alone():
+    """
+    Unit test to check that a request whose key was taken over after its lease can neither
+    drop nor fill the claim of the retry that took it over.
+    """
+    key = str(uuid.uuid4())
+    route = "POST /maintenance-orders/"
+    with SessionLocal() as db:
+        first = claim_idempotency_key(db, key, route, "fingerprint", ttl=60, lease=0)
+        assert first is not None
+        time.sleep(0.01)
+        second = claim_idempotency_key(db, key, route, "fingerprint", ttl=60, lease=0)
+        assert second is not None and second != first
+
+        release_idempotency_key(db, key, first)
+        assert not save_idempotent_response(db, key, first, 200, [], b"{}")
+        row = get_idempotency_key(db, key)
+        assert row.status_code is None
+        db.expire_all()
+
+        assert save_idempotent_response(db, key, second, 201, [], b"{}")
+        assert get_idempotency_key(db, key).status_code == 201
+
+
+def test_client_error_is_stored_and_purged(test_client):
+    """
+    Unit test to check that 4xx responses are stored and expired keys are purged.
+    """
+    key = str(uuid.uuid4())
+    order = {**new_order(), "vehicle_id": 999999}
+    response = test_client.post("/maintenance-orders/", json=order, headers={"Idempotency-Key": key})
+    assert response.status_code == 404
+    retry = test_client.post("/maintenance-orders/", json=order, headers={"Idempotency-Key": key})
+    assert retry.status_code == 404
+    assert retry.headers["idempotent-replayed"] == "true"
+
+    with SessionLocal() as db:
+        assert purge_idempotency_keys(db, ttl=60, now=utcnow() + timedelta(seconds=61)) >= 1
+        assert get_idempotency_key(db, key) is None
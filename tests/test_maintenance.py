@@ -1,5 +1,15 @@
+import base64
+import json
+from datetime import timedelta
+
 from fastapi.testclient import TestClient
+from sqlalchemy import select, text, update
 from app.main import app
+from app import serialization
+from app.crud.archive import archive_maintenance_orders
+from app.crud.stats import rebuild_order_stats
+from app.database import SessionLocal, utcnow
+from app.models.maintenance import MaintenanceOrder, MaintenanceOrderPart
 import pytest
 from faker import Faker
 
@@ -114,3 +124,458 @@ def test_read_maintenance_orders_with_pagination(test_client):
         assert isinstance(order["description"], str)
         assert isinstance(order["vehicle_id"], int)
         assert isinstance(order["service_type"], str)
+
+def test_read_maintenance_orders_with_cursor(test_client):
+    """
+    Unit test to list maintenance orders with cursor (keyset) pagination.
+    """
+    for _ in range(3):
+        test_client.post("/maintenance-orders/", json=create_test_maintenance_order())
+
+    response = test_client.get("/maintenance-orders/?after_id=0&limit=2")
+    assert response.status_code == 200
+    first_page = response.json()
+    assert len(first_page["items"]) == 2
+    assert first_page["next_cursor"] is not None
+
+    response = test_client.get(f"/maintenance-orders/?cursor={first_page['next_cursor']}&limit=2")
+    assert response.status_code == 200
+    second_page = response.json()
+    first_ids = [order["id"] for order in first_page["items"]]
+    second_ids = [order["id"] for order in second_page["items"]]
+    # Pages are ordered by ID and never overlap
+    assert first_ids == sorted(first_ids)
+    assert min(second_ids) > max(first_ids)
+
+def test_read_maintenance_orders_with_cursor_limits(test_client):
+    """
+    Unit test to validate the limit and cursor of keyset pagination.
+    """
+    response = test_client.get("/maintenance-orders/?after_id=0&limit=101")
+    assert response.status_code == 422
+
+    response = test_client.get("/maintenance-orders/?cursor=not-a-cursor")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+
+    # Well-formed cursors with a boolean instead of an ID are rejected too
+    forged = base64.urlsafe_b64encode(b'{"id":true}').decode().rstrip("=")
+    response = test_client.get(f"/maintenance-orders/?cursor={forged}")
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
+    forged = base64.urlsafe_b64encode(b'{"rank":1.0,"id":true}').decode().rstrip("=")
+    response = test_client.get(f"/maintenance-orders/search?q=oil&cursor={forged}")
+    assert response.status_code == 400
+
+def test_create_maintenance_orders_bulk(test_client):
+    """
+    Unit test to create maintenance orders in bulk with a per-item report.
+    """
+    orders = [create_test_maintenance_order() for _ in range(3)]
+    orders[1]["vehicle_id"] = 99999
+    response = test_client.post("/maintenance-orders/bulk", json=orders)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 2
+    assert report["errors"] == 1
+    assert report["items"][1] == {
+        "index": 1,
+        "status": "error",
+        "id": None,
+        "detail": "Vehicle with id 99999 not found",
+    }
+
+    response = test_client.get(f"/maintenance-orders/{report['items'][2]['id']}")
+    assert response.status_code == 200
+    assert response.json()["description"] == orders[2]["description"]
+
+    response = test_client.post("/maintenance-orders/bulk", json=[])
+    assert response.status_code == 422
+
+def test_export_maintenance_orders(test_client):
+    """
+    Unit test to stream maintenance orders as NDJSON and CSV, with filters.
+    """
+    order_data = create_test_maintenance_order()
+    order_data["status"] = "in_progress"
+    order_id = test_client.post("/maintenance-orders/", json=order_data).json()["id"]
+
+    response = test_client.get("/maintenance-orders/export?status=in_progress&vehicle_id=1")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert order_id in [row["id"] for row in rows]
+    assert all(row["status"] == "in_progress" and row["vehicle_id"] == 1 for row in rows)
+    assert [row["id"] for row in rows] == sorted(row["id"] for row in rows)
+
+    response = test_client.get("/maintenance-orders/export?format=csv&status=in_progress")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    lines = response.text.splitlines()
+    assert lines[0] == "id,vehicle_id,service_type,description,status,mechanical_parts"
+    assert any(line.startswith(f"{order_id},1,") and ",in_progress," in line for line in lines[1:])
+
+def test_create_maintenance_order_vehicle_not_found(test_client):
+    """
+    Unit test to handle scenario where the vehicle of the order does not exist.
+    """
+    order_data = create_test_maintenance_order()
+    order_data["vehicle_id"] = 99999
+    response = test_client.post("/maintenance-orders/", json=order_data)
+
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Vehicle with id 99999 not found"}
+
+def test_read_maintenance_orders_fast_serialization(test_client, monkeypatch):
+    """
+    Unit test to check the fast serialization path returns the same orders.
+    """
+    expected = test_client.get("/maintenance-orders/?skip=0&limit=5").json()
+    expected_page = test_client.get("/maintenance-orders/?after_id=0&limit=2").json()
+
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION_ENDPOINTS", {"maintenance_orders"})
+    response = test_client.get("/maintenance-orders/?skip=0&limit=5")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert response.json() == expected
+
+    response = test_client.get("/maintenance-orders/?after_id=0&limit=2")
+    assert response.status_code == 200
+    assert response.json() == expected_page
+
+def test_read_maintenance_orders_with_filters(test_client):
+    """
+    Unit test to list maintenance orders filtered by status, vehicle and service type.
+    """
+    vehicle = {
+        "license_plate": fake.lexify(text="???###"),
+        "make": fake.company(),
+        "model": fake.word(),
+        "year": 2020,
+        "owner_id": 1
+    }
+    vehicle_id = test_client.post("/vehicles/", json=vehicle).json()["id"]
+    created = {}
+    for status, service_type in [
+        ("pending", "Oil Change"),
+        ("in_progress", "Brakes"),
+        ("completed", "Oil Change"),
+        ("pending", "Brakes"),
+    ]:
+        order_data = create_test_maintenance_order()
+        order_data.update(vehicle_id=vehicle_id, status=status, service_type=service_type)
+        order_id = test_client.post("/maintenance-orders/", json=order_data).json()["id"]
+        created[order_id] = (status, service_type)
+
+    response = test_client.get(f"/maintenance-orders/?vehicle_id={vehicle_id}&status=pending&status=in_progress")
+    assert response.status_code == 200
+    open_ids = [order["id"] for order in response.json()]
+    assert open_ids == sorted(i for i, (status, _) in created.items() if status != "completed")
+
+    response = test_client.get(f"/maintenance-orders/?vehicle_id={vehicle_id}&service_type=Brakes&status=pending")
+    assert [order["id"] for order in response.json()] == [
+        i for i, value in created.items() if value == ("pending", "Brakes")
+    ]
+
+    # Filters apply to every page of keyset pagination
+    response = test_client.get(f"/maintenance-orders/?vehicle_id={vehicle_id}&status=pending&after_id=0&limit=1")
+    first_page = response.json()
+    response = test_client.get(
+        f"/maintenance-orders/?vehicle_id={vehicle_id}&status=pending&cursor={first_page['next_cursor']}&limit=1"
+    )
+    second_page = response.json()
+    assert [order["id"] for order in first_page["items"] + second_page["items"]] == sorted(
+        i for i, (status, _) in created.items() if status == "pending"
+    )
+
+    response = test_client.get("/maintenance-orders/?status=unknown")
+    assert response.status_code == 422
+
+def test_read_maintenance_orders_include_vehicle(test_client, count_queries):
+    """
+    Unit test to embed the vehicle of every order with a query count that does not grow with the page.
+    """
+    for vehicle_id in (1, 2, 3) * 4:
+        order_data = create_test_maintenance_order()
+        order_data["vehicle_id"] = vehicle_id
+        test_client.post("/maintenance-orders/", json=order_data)
+
+    counts = []
+    for limit in (2, 10):
+        with count_queries() as queries:
+            response = test_client.get(f"/maintenance-orders/?include=vehicle&limit={limit}")
+        assert response.status_code == 200
+        orders = response.json()
+        assert len(orders) == limit
+        assert all(order["vehicle"]["id"] == order["vehicle_id"] for order in orders)
+        counts.append(len(queries))
+    # One query for the orders and one for all of their vehicles
+    assert counts == [2, 2]
+
+    with count_queries() as queries:
+        response = test_client.get("/maintenance-orders/?include=vehicle&after_id=0&limit=10")
+    page = response.json()
+    assert len(page["items"]) == 10
+    assert page["next_cursor"] is not None
+    assert page["items"][0]["vehicle"]["license_plate"]
+    assert len(queries) == 2
+
+    with count_queries() as queries:
+        response = test_client.get("/maintenance-orders/?limit=10")
+    assert "vehicle" not in response.json()[0]
+    assert len(queries) == 1
+
+    response = test_client.get("/maintenance-orders/?include=owner")
+    assert response.status_code == 422
+
+def test_read_maintenance_orders_by_part(test_client):
+    """
+    Unit test to list maintenance orders that use a mechanical part, by exact name and by prefix.
+    """
+    word = fake.lexify(text="part-????????")
+    order_data = create_test_maintenance_order()
+    order_data["mechanical_parts"] = [f"{word} Pads", "Brake fluid"]
+    pads_id = test_client.post("/maintenance-orders/", json=order_data).json()["id"]
+    bulk = [create_test_maintenance_order(), create_test_maintenance_order()]
+    bulk[0]["mechanical_parts"] = [f"{word} Discs"]
+    bulk[1]["mechanical_parts"] = [f"{word}s"]
+    discs_id, plural_id = [
+        item["id"] for item in test_client.post("/maintenance-orders/bulk", json=bulk).json()["items"]
+    ]
+
+    # Exact match ignores case and repeated spaces
+    response = test_client.get(f"/maintenance-orders/?part={word.upper()}  pads")
+    assert response.status_code == 200
+    assert [order["id"] for order in response.json()] == [pads_id]
+
+    response = test_client.get(f"/maintenance-orders/?part={word}&part_match=prefix")
+    assert [order["id"] for order in response.json()] == [pads_id, discs_id, plural_id]
+
+    response = test_client.get(f"/maintenance-orders/?part={word} D&part_match=prefix")
+    assert [order["id"] for order in response.json()] == [discs_id]
+
+    response = test_client.get(f"/maintenance-orders/?part={word}&part_match=prefix&after_id={pads_id}&limit=5")
+    assert [order["id"] for order in response.json()["items"]] == [discs_id, plural_id]
+
+    response = test_client.get(f"/maintenance-orders/?part={word}")
+    assert response.json() == []
+
+    response = test_client.get("/maintenance-orders/?part=")
+    assert response.status_code == 422
+
+def test_read_maintenance_order_stats(test_client):
+    """
+    Unit test to check the order counters follow creations and match a rebuild from the orders.
+    """
+    before = test_client.get("/maintenance-orders/stats").json()
+    assert set(before["by_status"]) == {"pending", "in_progress", "completed", "cancelled", "rejected"}
+    assert before["total"] == sum(before["by_status"].values())
+
+    service_type = fake.lexify(text="Service ????????")
+    order_data = create_test_maintenance_order()
+    order_data.update(service_type=service_type, status="completed")
+    test_client.post("/maintenance-orders/", json=order_data)
+    bulk = [create_test_maintenance_order(), create_test_maintenance_order()]
+    bulk[0].update(service_type=service_type, status="rejected")
+    bulk[1]["vehicle_id"] = 99999
+    test_client.post("/maintenance-orders/bulk", json=bulk)
+
+    response = test_client.get("/maintenance-orders/stats")
+    assert response.status_code == 200
+    after = response.json()
+    assert after["total"] == before["total"] + 2
+    assert after["by_status"]["completed"] == before["by_status"]["completed"] + 1
+    assert after["by_status"]["rejected"] == before["by_status"]["rejected"] + 1
+    assert after["by_service_type"][service_type] == 2
+
+    with SessionLocal() as db:
+        assert rebuild_order_stats(db) == after
+    assert test_client.get("/maintenance-orders/stats").json() == after
+
+def test_search_maintenance_orders(test_client):
+    """
+    Unit test to search maintenance orders by the words of their description, with ranked keyset pages.
+    """
+    word = fake.lexify(text="zz??????")
+    order_ids = []
+    for description in (
+        f"{word} noise when braking",
+        f"Customer reports {word} noises, {word} again after the last service",
+        "Unrelated routine check",
+    ):
+        order_data = create_test_maintenance_order()
+        order_data["description"] = description
+        order_ids.append(test_client.post("/maintenance-orders/", json=order_data).json()["id"])
+
+    response = test_client.get(f"/maintenance-orders/search?q={word.upper()} noise")
+    assert response.status_code == 200
+    page = response.json()
+    assert sorted(item["id"] for item in page["items"]) == order_ids[:2]
+    ranks = [item["rank"] for item in page["items"]]
+    assert ranks == sorted(ranks, reverse=True)
+    assert page["next_cursor"] is None
+
+    response = test_client.get(f"/maintenance-orders/search?q={word}&limit=1")
+    first_page = response.json()
+    assert len(first_page["items"]) == 1
+    response = test_client.get(f"/maintenance-orders/search?q={word}&limit=1&cursor={first_page['next_cursor']}")
+    second_page = response.json()
+    assert len(second_page["items"]) == 1
+    assert {first_page["items"][0]["id"], second_page["items"][0]["id"]} == set(order_ids[:2])
+    assert second_page["next_cursor"] is None
+
+    response = test_client.get(f"/maintenance-orders/search?q={word}&status=completed")
+    assert response.json()["items"] == []
+
+    response = test_client.get("/maintenance-orders/search?q=%22%21")
+    assert response.status_code == 200
+    assert response.json() == {"items": [], "next_cursor": None}
+
+    response = test_client.get(f"/maintenance-orders/search?q={word}&cursor=not-a-cursor")
+    assert response.status_code == 400
+
+def test_read_maintenance_order_conditional(test_client, count_queries):
+    """
+    Unit test for the strong ETag of an order and the 304 answered from its version alone.
+    """
+    order_id = test_client.post("/maintenance-orders/", json=create_test_maintenance_order()).json()["id"]
+    response = test_client.get(f"/maintenance-orders/{order_id}")
+    etag = response.headers["etag"]
+    assert etag == '"v1"'
+
+    with count_queries() as queries:
+        response = test_client.get(f"/maintenance-orders/{order_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.content == b""
+    assert len(queries) == 1
+    assert "description" not in queries[0]
+
+    with SessionLocal() as db:
+        db.execute(text("UPDATE maintenance_orders SET version_id = version_id + 1 WHERE id = :id"), {"id": order_id})
+        db.commit()
+    response = test_client.get(f"/maintenance-orders/{order_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] == '"v2"'
+    assert response.json()["id"] == order_id
+
+def test_read_maintenance_orders_weak_etag(test_client):
+    """
+    Unit test for the weak ETag of a listing page.
+    """
+    response = test_client.get("/maintenance-orders/", params={"after_id": 0, "limit": 5})
+    etag = response.headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = test_client.get("/maintenance-orders/", params={"after_id": 0, "limit": 5}, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+    response = test_client.get("/maintenance-orders/", params={"after_id": 0, "limit": 6}, headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+def test_update_maintenance_order_status(test_client):
+    """
+    Unit test for a single status change, its ETag and the rejected transitions.
+    """
+    order_id = test_client.post("/maintenance-orders/", json=create_test_maintenance_order()).json()["id"]
+    etag = test_client.get(f"/maintenance-orders/{order_id}").headers["etag"]
+    before = test_client.get("/maintenance-orders/stats").json()["by_status"]
+
+    response = test_client.patch(f"/maintenance-orders/{order_id}/status", json={"status": "in_progress"})
+    assert response.status_code == 200
+    assert response.json()["status"] == "in_progress"
+    assert response.headers["etag"] != etag
+    after = test_client.get("/maintenance-orders/stats").json()["by_status"]
+    assert after["pending"] == before["pending"] - 1
+    assert after["in_progress"] == before["in_progress"] + 1
+
+    response = test_client.get(f"/maintenance-orders/{order_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+
+    response = test_client.patch(f"/maintenance-orders/{order_id}/status", json={"status": "pending"})
+    assert response.status_code == 409
+    assert response.json() == {"detail": "Cannot change status from in_progress to pending"}
+
+    response = test_client.patch("/maintenance-orders/999999/status", json={"status": "completed"})
+    assert response.status_code == 404
+
+def test_update_maintenance_orders_status_batch(test_client, count_queries):
+    """
+    Unit test for a status batch applied with set-based updates, reporting the rejected orders.
+    """
+    orders = [create_test_maintenance_order() for _ in range(4)]
+    orders[3]["status"] = "completed"
+    ids = [item["id"] for item in test_client.post("/maintenance-orders/bulk", json=orders).json()["items"]]
+    test_client.patch(f"/maintenance-orders/{ids[0]}/status", json={"status": "in_progress"})
+    before = test_client.get("/maintenance-orders/stats").json()["by_status"]
+
+    with count_queries() as queries:
+        response = test_client.post(
+            "/maintenance-orders/status:batch",
+            json={"ids": ids + [999999, ids[1]], "status": "cancelled"},
+        )
+    assert response.status_code == 200
+    assert response.json() == {
+        "updated": ids[:3],
+        "rejected": [
+            {"id": ids[3], "detail": "Cannot change status from completed to cancelled"},
+            {"id": 999999, "detail": "Order not found"},
+        ],
+    }
+    # One UPDATE per source status: pending and in_progress
+    assert sum(query.lstrip().upper().startswith("UPDATE") for query in queries) == 2
+
+    after = test_client.get("/maintenance-orders/stats").json()["by_status"]
+    assert after["cancelled"] == before["cancelled"] + 3
+    assert after["pending"] == before["pending"] - 2
+    assert after["in_progress"] == before["in_progress"] - 1
+    for order_id in ids[:3]:
+        assert test_client.get(f"/maintenance-orders/{order_id}").json()["status"] == "cancelled"
+
+    response = test_client.post("/maintenance-orders/status:batch", json={"ids": [], "status": "cancelled"})
+    assert response.status_code == 422
+
+def test_archive_closed_orders(test_client):
+    """
+    Unit test for the archival of old closed orders and the fallback of the lookup by ID.
+    """
+    order_id = test_client.post("/maintenance-orders/", json=create_test_maintenance_order()).json()["id"]
+    with SessionLocal() as db:
+        created_at = db.scalar(select(MaintenanceOrder.updated_at).where(MaintenanceOrder.id == order_id))
+    test_client.patch(f"/maintenance-orders/{order_id}/status", json={"status": "in_progress"})
+    test_client.patch(f"/maintenance-orders/{order_id}/status", json={"status": "completed"})
+    order = test_client.get(f"/maintenance-orders/{order_id}")
+
+    with SessionLocal() as db:
+        # Status changes refresh updated_at; the order is then made 100 days old
+        assert db.scalar(select(MaintenanceOrder.updated_at).where(MaintenanceOrder.id == order_id)) >= created_at
+        db.execute(
+            update(MaintenanceOrder)
+            .where(MaintenanceOrder.id == order_id)
+            .values(updated_at=utcnow() - timedelta(days=100))
+        )
+        db.commit()
+    # The newest order is never archived, so its ID cannot be handed out again
+    test_client.post("/maintenance-orders/", json=create_test_maintenance_order())
+    stats = test_client.get("/maintenance-orders/stats").json()
+    with SessionLocal() as db:
+        assert archive_maintenance_orders(db, utcnow() - timedelta(days=90), batch_size=1) == 1
+        assert db.get(MaintenanceOrder, order_id) is None
+        assert db.scalar(select(MaintenanceOrderPart.order_id).where(MaintenanceOrderPart.order_id == order_id)) is None
+
+    archived = test_client.get(f"/maintenance-orders/{order_id}")
+    assert archived.status_code == 200
+    assert archived.json() == order.json()
+    assert archived.headers["etag"] == order.headers["etag"]
+    listed = test_client.get("/maintenance-orders/", params={"status": "completed", "limit": 100}).json()
+    assert order_id not in [item["id"] for item in listed]
+
+    response = test_client.patch(f"/maintenance-orders/{order_id}/status", json={"status": "cancelled"})
+    assert response.status_code == 409
+    # Archived orders are still counted, also after a rebuild
+    assert test_client.get("/maintenance-orders/stats").json() == stats
+    with SessionLocal() as db:
+        assert rebuild_order_stats(db) == stats
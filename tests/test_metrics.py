@@ -0,0 +1,65 @@
+import re
+
+from fastapi.testclient import TestClient
+from app.main import app
+from app.metrics import Histogram, REQUEST_METRICS
+import pytest
+
+
+@pytest.fixture(scope="module")
+def test_client():
+    """
+    Fixture to provide a test client configured with the application.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+def test_histogram_renders_cumulative_buckets():
+    """
+    Unit test for the Prometheus rendering of a histogram.
+    """
+    histogram = Histogram("test_seconds", "Test histogram.", ("route",), (0.1, 1.0))
+    histogram.observe(("/a",), 0.05)
+    histogram.observe(("/a",), 0.5)
+    histogram.observe(("/a",), 3.0)
+
+    lines = histogram.render()
+    assert 'test_seconds_bucket{route="/a",le="0.1"} 1' in lines
+    assert 'test_seconds_bucket{route="/a",le="1"} 2' in lines
+    assert 'test_seconds_bucket{route="/a",le="+Inf"} 3' in lines
+    assert 'test_seconds_count{route="/a"} 3' in lines
+
+
+def test_server_timing_header(test_client):
+    """
+    Unit test for the Server-Timing header reporting the SQL statements of a request.
+    """
+    response = test_client.get("/maintenance-orders/", params={"limit": 5})
+
+    assert response.status_code == 200
+    match = re.match(r'db;dur=([\d.]+);desc="(\d+) queries", app;dur=([\d.]+)', response.headers["server-timing"])
+    assert match
+    assert int(match.group(2)) >= 1
+    assert float(match.group(3)) >= float(match.group(1))
+
+
+def test_read_metrics(test_client):
+    """
+    Unit test to expose the request metrics, labelled by route template, in the Prometheus format.
+    """
+    labels = ("GET", "/vehicles/{vehicle_id}", "404")
+    before = REQUEST_METRICS.requests.get(labels)
+    test_client.get("/vehicles/999999")
+    test_client.get("/no-such-path")
+
+    assert REQUEST_METRICS.requests.get(labels) == before + 1
+    response = test_client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    body = response.text
+    assert "http_requests_in_flight 1" in body
+    assert 'http_requests_total{method="GET",route="/vehicles/{vehicle_id}",status="404"}' in body
+    assert 'http_requests_total{method="GET",route="<unmatched>",status="404"}' in body
+    assert 'http_request_db_queries_bucket{method="GET",route="/vehicles/{vehicle_id}",le="+Inf"}' in body
+    assert 'db_pool_checkouts{engine="primary"}' in body
@@ -0,0 +1,59 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.main import app
+from app.pool import InstrumentedQueuePool, instrument_engine, POOL_METRICS
+import pytest
+
+
+@pytest.fixture(scope="module")
+def test_client():
+    """
+    Fixture to provide a test client configured with the application.
+    """
+    with TestClient(app) as c:
+        yield c
+
+
+def test_pool_metrics_count_checkouts_and_timeouts(tmp_path):
+    """
+    Unit test for the checkout counters and timeouts of an instrumented pool.
+    """
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    metrics = instrument_engine(engine, "test")
+    try:
+        connection = engine.connect()
+        with pytest.raises(PoolTimeoutError):
+            engine.connect()
+        stats = metrics.snapshot()
+        assert stats["checked_out"] == 1
+        assert stats["checkout_timeouts"] == 1
+        assert stats["checkout_wait_seconds_max"] >= 0.05
+
+        connection.close()
+        stats = metrics.snapshot()
+        assert stats["checkouts"] == 1
+        assert stats["checkins"] == 1
+        assert stats["checked_out"] == 0
+    finally:
+        POOL_METRICS.pop("test", None)
+        engine.dispose()
+
+
+def test_read_pool_stats(test_client):
+    """
+    Unit test to retrieve the pool statistics of the primary engine.
+    """
+    test_client.get("/vehicles/")
+    response = test_client.get("/monitoring/pool")
+
+    assert response.status_code == 200
+    primary = response.json()["primary"]
+    assert primary["checkouts"] >= 1
+    assert isinstance(primary["checkout_wait_seconds_avg"], float)
@@ -0,0 +1,120 @@
+import sqlite3
+import time
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from app import database
+from app.database import to_async_url
+from app.main import app
+from app.replicas import READ_PRIMARY_COOKIE, ReadYourWritesMiddleware, ReplicaPool, reads_from_primary
+import pytest
+
+
+def use_replica(monkeypatch, url, eject_seconds=60):
+    """
+    Route the reads of the sync and, with DATABASE_ASYNC, async handlers to one replica.
+    """
+    pools = []
+    replica_engine = create_engine(url)
+    pools.append(ReplicaPool([replica_engine], eject_seconds))
+    pools[-1].watch(replica_engine, replica_engine)
+    monkeypatch.setattr(database, "replica_pool", pools[-1])
+    if database.async_engine is not None:
+        from sqlalchemy.ext.asyncio import create_async_engine
+
+        async_replica_engine = create_async_engine(to_async_url(url))
+        pools.append(ReplicaPool([async_replica_engine], eject_seconds))
+        pools[-1].watch(async_replica_engine, async_replica_engine.sync_engine)
+        monkeypatch.setattr(database, "async_replica_pool", pools[-1])
+    return pools
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def stale_replica(monkeypatch, tmp_path):
+    """
+    Fixture to route the reads to a copy of the test database taken now, standing in for a
+    replica that has not received the later writes.
+    """
+    if database.engine.dialect.name != "sqlite" or not database.engine.url.database:
+        pytest.skip("The replica stand-in copies a SQLite database file")
+    replica_file = tmp_path / "replica.db"
+    with sqlite3.connect(database.engine.url.database) as source, sqlite3.connect(replica_file) as target:
+        source.backup(target)
+    pools = use_replica(monkeypatch, f"sqlite:///{replica_file}")
+    yield
+    pools[0].engines[0].dispose()
+
+
+def test_replica_pool_round_robin_and_ejection():
+    """
+    Unit test for the rotation of the replicas and the ejection of an unhealthy one.
+    """
+    clock = FakeClock()
+    pool = ReplicaPool(["a", "b"], eject_seconds=30, clock=clock)
+    assert [pool.choose() for _ in range(4)] == ["a", "b", "a", "b"]
+
+    pool.eject("a")
+    assert [pool.choose() for _ in range(3)] == ["b", "b", "b"]
+    pool.eject("b")
+    assert pool.choose() is None
+
+    clock.now = 30
+    assert {pool.choose(), pool.choose()} == {"a", "b"}
+    assert pool.ejections == 2
+
+
+def test_reads_from_primary():
+    """
+    Unit test for the read-your-writes window of the cookie.
+    """
+    assert not reads_from_primary({})
+    assert reads_from_primary({READ_PRIMARY_COOKIE: "105.5"}, now=100)
+    assert not reads_from_primary({READ_PRIMARY_COOKIE: "99"}, now=100)
+    assert not reads_from_primary({READ_PRIMARY_COOKIE: "garbage"}, now=100)
+
+
+def test_reads_go_to_replica_except_after_a_write(stale_replica):
+    """
+    Unit test to check that GET handlers read from the replica, and from the primary once the
+    client has written.
+    """
+    with TestClient(ReadYourWritesMiddleware(app, window_seconds=5)) as client:
+        order = {
+            "vehicle_id": 1,
+            "service_type": "Inspection",
+            "description": "Created after the replica was copied",
+            "status": "pending",
+            "mechanical_parts": [],
+        }
+        created = client.post("/maintenance-orders/", json=order)
+        assert created.status_code == 200
+        assert float(client.cookies[READ_PRIMARY_COOKIE]) > time.time()
+
+        # The client that wrote sees its order, read from the primary
+        assert client.get(f"/maintenance-orders/{created.json()['id']}").status_code == 200
+
+        # Any other client reads from the replica, which does not have it yet
+        client.cookies.clear()
+        assert client.get(f"/maintenance-orders/{created.json()['id']}").status_code == 404
+        assert client.get("/maintenance-orders/1").status_code == 200
+
+
+def test_unreachable_replica_is_ejected(monkeypatch, tmp_path):
+    """
+    Unit test to check that a replica that cannot be reached leaves the rotation.
+    """
+    pools = use_replica(monkeypatch, f"sqlite:///{tmp_path}/missing/replica.db")
+
+    with TestClient(app, raise_server_exceptions=False) as client:
+        assert client.get("/vehicles/?limit=1").status_code == 500
+        assert pools[-1].status()[0]["healthy"] is False
+        # Until it is tried again, the reads go to the primary
+        assert client.get("/vehicles/?limit=1").status_code == 200
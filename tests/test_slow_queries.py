@@ -0,0 +1,71 @@
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import OperationalError
+from app.database import StatementTimeouts, is_statement_timeout
+from app.metrics import RequestDbStats, request_db_stats
+from app.slow_queries import SLOW_QUERIES, instrument_slow_queries
+import pytest
+
+# Never finishes on its own; only a statement timeout stops it
+ENDLESS_QUERY = "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c) SELECT count(*) FROM c"
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'queries.db'}")
+    yield engine
+    engine.dispose()
+
+
+@pytest.fixture
+def in_request():
+    """
+    Run the test as if serving ``GET /slow``.
+    """
+    scope = {"method": "GET", "route": SimpleNamespace(path="/slow")}
+    token = request_db_stats.set(RequestDbStats(scope))
+    yield
+    request_db_stats.reset(token)
+
+
+def test_slow_query_log_captures_plan(sqlite_engine, in_request):
+    """
+    Unit test for the slow query log entry of a SELECT, with its parameters, route and plan.
+    """
+    instrument_slow_queries(sqlite_engine, threshold_ms=0, explain=True)
+    with sqlite_engine.connect() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT)"))
+        connection.execute(text("SELECT name FROM items WHERE id = :id"), {"id": 7})
+
+    entry = SLOW_QUERIES[-1]
+    assert entry["statement"] == "SELECT name FROM items WHERE id = ?"
+    assert entry["parameters"] == "(7,)"
+    assert entry["route"] == "GET /slow"
+    assert entry["duration_ms"] >= 0
+    assert any("items" in line for line in entry["plan"])
+
+
+def test_statement_timeout_by_route(sqlite_engine, in_request):
+    """
+    Unit test for the per-route statement timeout interrupting a runaway query.
+    """
+    timeouts = StatementTimeouts(default_ms=0, by_route={"GET /slow": 50})
+    timeouts.attach(sqlite_engine)
+    assert timeouts.timeout_ms() == 50
+
+    with sqlite_engine.connect() as connection:
+        with pytest.raises(OperationalError) as error:
+            connection.execute(text(ENDLESS_QUERY))
+        assert is_statement_timeout(error.value)
+        # The connection stays usable and later statements get a fresh deadline
+        assert connection.execute(text("SELECT 1")).scalar() == 1
+
+
+def test_statement_timeout_outside_requests():
+    """
+    Unit test to check that statements outside requests are not limited.
+    """
+    timeouts = StatementTimeouts(default_ms=50)
+
+    assert timeouts.timeout_ms() is None
@@ -1,5 +1,16 @@
+import json
+from datetime import timedelta
+
 from fastapi.testclient import TestClient
+from sqlalchemy import insert, select, update
 from app.main import app
+from app.crud import vehicle as crud_vehicle
+from app.crud.archive import archive_maintenance_orders
+from app.database import SessionLocal, utcnow
+from app.models.maintenance import MaintenanceOrder
+from app.models.vehicle import Vehicle
+from app.schemas.vehicle import VehicleCreate
+from app import serialization
 import pytest
 from faker import Faker
 
@@ -69,6 +80,22 @@ def test_read_vehicle(test_client):
     assert isinstance(response.json()["year"], int)
     assert isinstance(response.json()["owner_id"], int)
 
+def test_read_vehicle_conditional(test_client):
+    """
+    Unit test for the ETag of a vehicle and the 304 answer to a matching If-None-Match.
+    """
+    response = test_client.get("/vehicles/1")
+    etag = response.headers["etag"]
+    assert "version_id" not in response.json()
+
+    response = test_client.get("/vehicles/1", headers={"If-None-Match": f'"v0", {etag}'})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+
+    response = test_client.get("/vehicles/1", headers={"If-None-Match": '"v0"'})
+    assert response.status_code == 200
+    assert response.headers["etag"] == etag
+
 def test_read_vehicle_not_found(test_client):
     """
     Unit test to handle scenario where the vehicle is not found.
@@ -106,3 +133,162 @@ def test_read_vehicles_with_pagination(test_client):
         assert isinstance(vehicle["model"], str)
         assert isinstance(vehicle["year"], int)
         assert isinstance(vehicle["owner_id"], int)
+
+def test_read_vehicles_with_cursor(test_client):
+    """
+    Unit test to walk through all vehicles with cursor (keyset) pagination.
+    """
+    seen_ids = []
+    response = test_client.get("/vehicles/?after_id=0&limit=2")
+    while True:
+        assert response.status_code == 200
+        page = response.json()
+        seen_ids.extend(vehicle["id"] for vehicle in page["items"])
+        if page["next_cursor"] is None:
+            break
+        response = test_client.get(f"/vehicles/?cursor={page['next_cursor']}&limit=2")
+
+    assert seen_ids == sorted(set(seen_ids))
+    assert 1 in seen_ids
+
+def test_create_vehicles_bulk(test_client):
+    """
+    Unit test to create vehicles in bulk with a per-item report.
+    """
+    plate = fake.unique.lexify(text="???###")
+    vehicles = [
+        {"license_plate": plate, "model": fake.word(), "year": 2020, "owner_id": 1},
+        {"license_plate": "ABC123", "model": fake.word(), "year": 2020, "owner_id": 1},
+        {"license_plate": plate, "model": fake.word(), "year": 2020, "owner_id": 1},
+        {"license_plate": fake.unique.lexify(text="???###"), "model": fake.word(), "year": 2021, "owner_id": 2},
+    ]
+    response = test_client.post("/vehicles/bulk", json=vehicles)
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["created"] == 2
+    assert report["errors"] == 2
+    assert [item["status"] for item in report["items"]] == ["created", "error", "error", "created"]
+    assert report["items"][1]["detail"] == "Vehicle already registered"
+
+    response = test_client.get(f"/vehicles/{report['items'][0]['id']}")
+    assert response.status_code == 200
+    assert response.json()["license_plate"] == plate
+
+def test_create_vehicles_bulk_plate_registered_concurrently(monkeypatch):
+    """
+    Unit test to check that a plate registered between the lookup of the registered plates
+    and the INSERT is reported as already registered instead of failing the batch.
+    """
+    plate = fake.unique.lexify(text="???###")
+    vehicles = [
+        VehicleCreate(license_plate=plate, model=fake.word(), year=2020, owner_id=1),
+        VehicleCreate(license_plate=fake.unique.lexify(text="???###"), model=fake.word(), year=2021, owner_id=1),
+    ]
+    original_insert = crud_vehicle.vehicle_insert
+
+    def insert_after_concurrent_create(db, values):
+        # Another request registers the first plate once the lookup has run
+        db.execute(insert(Vehicle).values(license_plate=plate, model="Concurrent", year=2019, owner_id=2))
+        return original_insert(db, values)
+
+    monkeypatch.setattr(crud_vehicle, "vehicle_insert", insert_after_concurrent_create)
+    with SessionLocal() as db:
+        results = crud_vehicle.create_vehicles(db, vehicles)
+        assert results[0] == {"index": 0, "status": "error", "detail": "Vehicle already registered"}
+        assert results[1]["status"] == "created"
+        assert db.scalar(select(Vehicle.model).where(Vehicle.license_plate == plate)) == "Concurrent"
+
+def test_export_vehicles(test_client):
+    """
+    Unit test to stream all vehicles as NDJSON.
+    """
+    response = test_client.get("/vehicles/export")
+    assert response.status_code == 200
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert rows[0]["id"] == 1
+    assert rows[0]["license_plate"] == "ABC123"
+    assert set(rows[0]) == {"id", "license_plate", "model", "year", "owner_id"}
+
+def test_read_vehicles_fast_serialization(test_client, monkeypatch):
+    """
+    Unit test to check the fast serialization path returns the same vehicles.
+    """
+    expected = test_client.get("/vehicles/?skip=0&limit=10").json()
+
+    monkeypatch.setattr(serialization, "FAST_SERIALIZATION_ENDPOINTS", {"vehicles"})
+    response = test_client.get("/vehicles/?skip=0&limit=10")
+    assert response.status_code == 200
+    assert response.json() == expected
+
+def test_read_vehicle_maintenance_orders(test_client, count_queries):
+    """
+    Unit test to retrieve a vehicle with its maintenance orders in a constant number of queries.
+    """
+    vehicle_data = {
+        "license_plate": fake.lexify(text="???###"),
+        "model": fake.word(),
+        "year": 2021,
+        "owner_id": 1
+    }
+    vehicle_id = test_client.post("/vehicles/", json=vehicle_data).json()["id"]
+
+    counts = []
+    order_ids = []
+    for status in ("pending", "completed", "pending"):
+        order_data = {
+            "vehicle_id": vehicle_id,
+            "service_type": "Oil Change",
+            "description": fake.sentence(),
+            "status": status,
+            "mechanical_parts": [fake.word()]
+        }
+        order_ids.append(test_client.post("/maintenance-orders/", json=order_data).json()["id"])
+        with count_queries() as queries:
+            response = test_client.get(f"/vehicles/{vehicle_id}/maintenance-orders")
+        assert response.status_code == 200
+        assert response.json()["license_plate"] == vehicle_data["license_plate"]
+        assert [order["id"] for order in response.json()["maintenance_orders"]] == order_ids
+        counts.append(len(queries))
+    assert counts == [3, 3, 3]
+
+    response = test_client.get(f"/vehicles/{vehicle_id}/maintenance-orders?status=pending")
+    assert [order["id"] for order in response.json()["maintenance_orders"]] == [order_ids[0], order_ids[2]]
+
+    response = test_client.get("/vehicles/99999/maintenance-orders")
+    assert response.status_code == 404
+    assert response.json() == {"detail": "Vehicle not found"}
+
+def test_read_vehicle_maintenance_orders_archived(test_client):
+    """
+    Unit test to check that the maintenance history of a vehicle keeps its archived orders.
+    """
+    vehicle_data = {"license_plate": fake.unique.lexify(text="???###"), "model": fake.word(), "year": 2018, "owner_id": 1}
+    vehicle_id = test_client.post("/vehicles/", json=vehicle_data).json()["id"]
+    order_ids = []
+    for status in ("completed", "pending"):
+        order_data = {
+            "vehicle_id": vehicle_id,
+            "service_type": "Brake Check",
+            "description": fake.sentence(),
+            "status": status,
+            "mechanical_parts": [fake.word()]
+        }
+        order_ids.append(test_client.post("/maintenance-orders/", json=order_data).json()["id"])
+    history = test_client.get(f"/vehicles/{vehicle_id}/maintenance-orders").json()
+
+    with SessionLocal() as db:
+        db.execute(
+            update(MaintenanceOrder)
+            .where(MaintenanceOrder.id == order_ids[0])
+            .values(updated_at=utcnow() - timedelta(days=100))
+        )
+        db.commit()
+        assert archive_maintenance_orders(db, utcnow() - timedelta(days=90)) >= 1
+        assert db.get(MaintenanceOrder, order_ids[0]) is None
+
+    assert test_client.get(f"/vehicles/{vehicle_id}/maintenance-orders").json() == history
+    response = test_client.get(f"/vehicles/{vehicle_id}/maintenance-orders?status=completed")
+    assert [order["id"] for order in response.json()["maintenance_orders"]] == order_ids[:1]
+    response = test_client.get(f"/vehicles/{vehicle_id}/maintenance-orders?status=pending")
+    assert [order["id"] for order in response.json()["maintenance_orders"]] == order_ids[1:]